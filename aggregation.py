@@ -0,0 +1,98 @@
+import pandas as pd
+
+GROUP_COLUMNS = ['Name', 'IBAN']
+
+
+def group_amounts(transactions: pd.DataFrame) -> pd.Series:
+    """
+    Sum the transaction amounts per Name and IBAN.
+
+    Categorical Name and IBAN columns are grouped on their observed combinations only, and the
+    result is indexed by plain (non-categorical) values so that totals of different files align.
+
+    Parameters:
+        transactions (pd.DataFrame): Normalized transactions.
+
+    Returns:
+        pd.Series: Total amount indexed by (Name, IBAN).
+    """
+    grouped = transactions.groupby(GROUP_COLUMNS, observed=True)['Amount'].sum()
+    grouped.index = grouped.index.set_levels([level.astype(object) for level in grouped.index.levels])
+    return grouped
+
+
+def income_expense_table(grouped: pd.Series) -> pd.DataFrame:
+    """
+    Lay out grouped totals as side-by-side income and expense columns.
+
+    Parameters:
+        grouped (pd.Series): Total amount indexed by (Name, IBAN), as returned by `group_amounts`.
+
+    Returns:
+        pd.DataFrame: DataFrame with 'Income Names', 'Income Amounts', 'Expense Names' and 'Expense Amounts'.
+    """
+    income_df = grouped[grouped > 0].reset_index()
+    income_df.columns = ['Income Names', 'IBAN', 'Income Amounts']
+
+    expense_df = grouped[grouped < 0].reset_index()
+    expense_df.columns = ['Expense Names', 'IBAN', 'Expense Amounts']
+
+    max_length = max(len(income_df), len(expense_df))
+    income_df = income_df.reindex(range(max_length)).astype(object).fillna('')
+    expense_df = expense_df.reindex(range(max_length)).astype(object).fillna('')
+
+    return pd.DataFrame({
+        'Income Names': income_df['Income Names'],
+        'Income Amounts': income_df['Income Amounts'],
+        'Expense Names': expense_df['Expense Names'],
+        'Expense Amounts': expense_df['Expense Amounts']
+    })
+
+
+class IncomeExpenseAggregator:
+    """
+    Running per-(Name, IBAN) totals that are built up one chunk of transactions at a time.
+
+    Only the totals are kept, so memory grows with the number of distinct counterparties
+    rather than with the number of transactions.
+
+    Attributes:
+        totals (pd.Series): Total amount indexed by (Name, IBAN) over all chunks added so far.
+        rows (int): Number of transactions added so far.
+        scale (int): Divisor that turns the summed amounts into the amounts of the table (e.g. 100 for cents).
+    """
+
+    def __init__(self, scale: int = 1):
+        """
+        Parameters:
+            scale (int): Divisor applied to the totals in `table` (e.g. 100 when adding amounts in cents).
+                         Default is 1.
+        """
+        self.totals = pd.Series(dtype='float64', index=pd.MultiIndex.from_arrays([[], []], names=GROUP_COLUMNS))
+        self.rows = 0
+        self.scale = scale
+
+    def add(self, transactions: pd.DataFrame):
+        """
+        Fold a chunk of normalized transactions into the running totals.
+
+        Parameters:
+            transactions (pd.DataFrame): A chunk of normalized transactions.
+        """
+        self.totals = self.totals.add(group_amounts(transactions), fill_value=0)
+        self.rows += len(transactions)
+
+    def table(self, canonicalizer=None) -> pd.DataFrame:
+        """
+        Build the income-expense table from the running totals.
+
+        Parameters:
+            canonicalizer (NameCanonicalizer): Merges the totals of names that belong to the same counterparty
+                                               (see `counterparties.NameCanonicalizer`). Default is None (group
+                                               on the exact names).
+
+        Returns:
+            pd.DataFrame: DataFrame with income and expense details (see `income_expense_table`).
+        """
+        totals = self.totals if canonicalizer is None else canonicalizer.regroup(self.totals)
+        return income_expense_table(totals / self.scale)
@@ -1,6 +1,65 @@
+from aggregation import IncomeExpenseAggregator, group_amounts, income_expense_table
+from bank_spec import BankSpec
+from categorizer import CATEGORY_COLUMNS, Categorizer, category_table
+from counterparties import NameCanonicalizer
+from dedup import FingerprintIndex
 from file_manager import FileManager
+from instrumentation import NULL_METRICS
+from normalizer import CENTS, COLUMN_NAMES, Normalizer, fill_iban, source_column, to_euros
+from parallel import parallel_parse
+from parse_cache import ParseCache
+from pipeline import StageCache
+from recurring import RECURRING_SHEET, recurring_table
+from writers import open_writer
+from contextlib import ExitStack
+import importlib.util
+import os
 import pandas as pd
 
+# Default number of CSV rows per chunk in streaming mode
+CHUNK_SIZE = 100_000
+
+# Default number of CSV rows read by `BankBase.sample`
+SAMPLE_ROWS = 10_000
+
+TRANSACTIONS_SHEET = 'Transactions'
+INCOME_EXPENSE_SHEET = 'Income & Expenses'
+CATEGORIES_SHEET = 'Categories'
+
+# CSV parsers for `BankBase.csv_engine`. 'auto' uses pyarrow's multithreaded parser when pyarrow is installed.
+CSV_ENGINES = ('auto', 'pyarrow', 'c')
+
+
+def _pyarrow_errors() -> tuple:
+    # pyarrow reports malformed files as ArrowInvalid (a ValueError), ArrowKeyError (a KeyError, e.g. a
+    # missing column) or other ArrowException subclasses
+    errors = (ValueError, TypeError, KeyError, ImportError)
+    try:
+        from pyarrow.lib import ArrowException
+    except ImportError:
+        return errors
+    return errors + (ArrowException,)
+
+
+def resolve_csv_engine(csv_engine: str = 'auto') -> str:
+    """
+    Resolve the CSV parser to use.
+
+    Parameters:
+        csv_engine (str): 'auto', 'pyarrow' or 'c'. Default is 'auto'.
+
+    Returns:
+        str: 'pyarrow' if it was asked for (or 'auto') and pyarrow is installed, otherwise 'c'.
+
+    Raises:
+        ValueError: If `csv_engine` is not one of `CSV_ENGINES`.
+    """
+    if csv_engine not in CSV_ENGINES:
+        raise ValueError(f"Unknown CSV engine '{csv_engine}'. Choose one of: {', '.join(CSV_ENGINES)}.")
+    if csv_engine == 'c' or importlib.util.find_spec('pyarrow') is None:
+        return 'c'
+    return 'pyarrow'
+
 
 class BankBase:
     """
@@ -13,25 +72,117 @@ class BankBase:
         encoding (str): Character encoding for file reading. Default is 'utf-8'.
         engine (str): Engine for Excel file operations. Default is 'openpyxl'.
         header (int): Row number to use as the column names. Default is None.
+        spec (BankSpec): Declarative format of the bank export (column indexes and normalization rules).
         df (pd.DataFrame): DataFrame to hold the loaded data.
         column_names (list): Standard column names for transactions.
+        stage_cache (StageCache): Cached results of the conversion stages (load, normalize, transactions,
+                                  aggregates, categories, recurring).
+        parse_cache (ParseCache): Optional on-disk cache of parsed CSV files, shared between runs.
+                                  Default is None (always parse).
+        metrics (Metrics): Records the time, rows and memory of each stage. Default is `NULL_METRICS` (off).
+        prune_columns (bool): Only read the columns the spec needs. Default is True. Set it to False to
+                              override column indexes in `csv_to_excel` and friends with other columns.
+        dedup_index (FingerprintIndex): Optional index of the transactions seen in earlier files of this
+                                        bank. Transactions already seen in another file are dropped when
+                                        normalizing. Default is None (keep every row).
+        file_path (str): Path of the loaded file, or None if `df` was assigned directly.
+        categorizer (Categorizer): Rules that assign a category to each transaction for the 'Categories'
+                                   sheet. Default is a `Categorizer` with the default rules.
+        canonicalizer (NameCanonicalizer): Merges names of the same counterparty ('ALBERT HEIJN 1234' and
+                                           'Albert Heijn 5678') on the 'Income & Expenses' sheet. The
+                                           'Transactions' sheet keeps the raw names. Default is an in-memory
+                                           `NameCanonicalizer`; set it to None to group on the exact names.
+        csv_engine (str): CSV parser used by `load_file`: 'auto' (pyarrow if installed), 'pyarrow' or 'c'.
+                          Files pyarrow cannot parse are read with the C parser. Default is 'auto'.
     """
 
     def __init__(self, file_manager: FileManager, seperator: str = ';', decimal: str = ',',
-                 encoding: str = 'utf-8', engine: str = 'openpyxl', header: int = None):
-        self.df = None
-        self.column_names = ['Date', 'IBAN', 'Name', 'Amount', 'Description']
+                 encoding: str = 'utf-8', engine: str = 'openpyxl', header: int = None, spec: BankSpec = None):
+        self._df = None
+        self._df_version = 0
+        self.stage_cache = StageCache()
+        self.parse_cache: ParseCache = None
+        self.metrics = NULL_METRICS
+        self.prune_columns = True
+        self.dedup_index: FingerprintIndex = None
+        self.file_path = None
+        self.categorizer = Categorizer()
+        self.canonicalizer = NameCanonicalizer()
+        self.csv_engine = 'auto'
+        self.column_names = list(COLUMN_NAMES)
         self.file_manager = file_manager
         self.seperator = seperator
         self.decimal = decimal
         self.encoding = encoding
         self.engine = engine
         self.header = header
+        self.spec = spec
+
+        # Expose the column indexes of the spec, as used by `csv_to_excel`
+        columns = spec.columns if spec is not None else {}
+        self.date = columns.get('Date')
+        self.iban = columns.get('IBAN')
+        self.name = columns.get('Name')
+        self.amount = columns.get('Amount')
+        self.description = columns.get('Description')
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """
+        The loaded CSV data. Assigning a new DataFrame invalidates the cached stages that depend on it.
+        """
+        return self._df
+
+    @df.setter
+    def df(self, value: pd.DataFrame):
+        if value is not self._df:
+            self._df = value
+            self._df_version += 1
+            self.file_path = None
+
+    @classmethod
+    def from_spec(cls, file_manager: FileManager, spec: BankSpec, engine: str = 'openpyxl'):
+        """
+        Create a reader for any bank described by a `BankSpec`, without a bank-specific subclass.
+
+        Parameters:
+            file_manager (FileManager): Manages file paths and operations.
+            spec (BankSpec): Format of the bank export.
+            engine (str): Engine for Excel file operations. Default is 'openpyxl'.
+
+        Returns:
+            BankBase: A reader using the parse settings and rules of the spec.
+        """
+        return cls(file_manager, spec.seperator, spec.decimal, spec.encoding, engine, spec.header, spec=spec)
+
+    def normalizer(self, date: int = None, name: int = None, amount: int = None, description: int = None,
+                   iban: int = None) -> Normalizer:
+        """
+        Compile the normalizer for this bank, optionally overriding column indexes of the spec.
+
+        Parameters:
+            date (int): Index of the Date column. Default is the index from the spec.
+            name (int): Index of the Name column. Default is the index from the spec.
+            amount (int): Index of the Amount column. Default is the index from the spec.
+            description (int): Index of the Description column. Default is the index from the spec.
+            iban (int): Index of the IBAN column. Default is the index from the spec.
+
+        Returns:
+            Normalizer: The compiled normalizer.
+        """
+        spec = self.spec if self.spec is not None else BankSpec('custom', self.seperator, self.decimal,
+                                                                self.encoding, self.header)
+        return Normalizer(spec.with_columns(Date=date, IBAN=iban, Name=name, Amount=amount,
+                                            Description=description))
 
     def load_file(self, file_path: str):
         """
         Load a CSV file into a DataFrame.
 
+        Only the columns the bank spec needs are read (see `prune_columns`); they keep their original
+        column position as label. The parsed file is cached: loading the same, unchanged file again with
+        the same parse settings reuses the DataFrame instead of reading the file again.
+
         Parameters:
             file_path (str): Path to the input CSV file.
 
@@ -41,18 +192,147 @@ class BankBase:
             Exception: For unexpected errors.
         """
         try:
-            self.df = pd.read_csv(
-                file_path,
-                sep=self.seperator,
-                decimal=self.decimal,
-                encoding=self.encoding,
-                header=self.header
-            )
-            if self.df.empty:
-                raise ValueError(f"The file at {file_path} is empty or invalid.")
+            stat = os.stat(file_path)
+            key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size, self.seperator, self.decimal,
+                   self.encoding, self.header, self._usecols(), self.csv_engine)
+            if self.metrics.enabled:
+                self.metrics.context.update({'bank': self.spec.name if self.spec else None, 'file': file_path})
+            self.df = self.stage_cache.get('load', key, lambda: self._read_file(file_path))
+            self.file_path = file_path
         except (FileNotFoundError, ValueError, Exception) as e:
             raise e
 
+    def _usecols(self) -> list:
+        return self.spec.usecols if self.prune_columns and self.spec is not None else None
+
+    def _read_settings(self) -> dict:
+        return {'sep': self.seperator, 'decimal': self.decimal, 'encoding': self.encoding, 'header': self.header,
+                'usecols': self._usecols()}
+
+    @staticmethod
+    def _read_csv(file_path: str, csv_engine: str = 'c', **settings):
+        """
+        Read a CSV file with `pd.read_csv`. Columns read with `usecols` are labelled with their position in the file.
+
+        With `csv_engine='pyarrow'` the file is parsed by pyarrow's multithreaded reader. pyarrow only selects
+        columns by name, so a header row is skipped instead and the columns keep their positions as labels.
+        Options pyarrow does not support, or files it cannot parse, fall back to the C parser. So does `chunksize`,
+        which returns a reader of chunks: pandas can only read in chunks with the C parser.
+        """
+        if csv_engine == 'pyarrow' and settings.get('chunksize') is None:
+            arrow_settings = dict(settings)
+            if arrow_settings.get('usecols') is not None and arrow_settings.get('header') is not None:
+                arrow_settings['skiprows'] = arrow_settings['header'] + 1
+                arrow_settings['header'] = None
+            try:
+                df = pd.read_csv(file_path, engine='pyarrow', **arrow_settings)
+            except _pyarrow_errors():
+                # Unsupported option or malformed file: parse the file with the C parser below
+                pass
+            else:
+                if settings.get('usecols') is not None:
+                    df.columns = settings['usecols']
+                return df
+
+        df = pd.read_csv(file_path, **settings)
+        if settings.get('usecols') is not None and settings.get('chunksize') is None:
+            df.columns = settings['usecols']
+        return df
+
+    def _read_file(self, file_path: str) -> pd.DataFrame:
+        settings = self._read_settings()
+        csv_engine = resolve_csv_engine(self.csv_engine)
+        with self.metrics.stage('load') as record:
+            if self.parse_cache is not None:
+                df = self.parse_cache.get(file_path, settings,
+                                          lambda: self._read_csv(file_path, csv_engine, **settings))
+            else:
+                df = self._read_csv(file_path, csv_engine, **settings)
+            record['rows_out'] = len(df)
+        if df.empty:
+            raise ValueError(f"The file at {file_path} is empty or invalid.")
+        return df
+
+    def memory_report(self, file_path: str) -> dict:
+        """
+        Compare the memory footprint of a file read in full with generic dtypes against the pruned,
+        compact normalized frame.
+
+        Parameters:
+            file_path (str): Path to the input CSV file.
+
+        Returns:
+            dict: 'file', 'rows', 'before_mb' (all columns, object/float64 dtypes), 'after_mb' (needed
+                  columns, datetime64/categorical/integer cents) and 'saved_percent'.
+        """
+        settings = {**self._read_settings(), 'usecols': None}
+        before = self._read_csv(file_path, **settings)
+        before_bytes = before.memory_usage(deep=True).sum()
+        rows = len(before)
+        del before
+
+        self.load_file(file_path)
+        after_bytes = self.normalize().memory_usage(deep=True).sum()
+        return {
+            'file': file_path,
+            'rows': rows,
+            'before_mb': round(before_bytes / 2 ** 20, 3),
+            'after_mb': round(after_bytes / 2 ** 20, 3),
+            'saved_percent': round((1 - after_bytes / before_bytes) * 100, 1) if before_bytes else 0.0,
+        }
+
+    def iter_chunks(self, file_path: str, chunksize: int = CHUNK_SIZE):
+        """
+        Read a CSV file in chunks of at most `chunksize` rows and normalize each chunk.
+
+        The chunks are read by `_read_csv` with the same parse settings as `load_file`.
+
+        Parameters:
+            file_path (str): Path to the input CSV file.
+            chunksize (int): Maximum number of rows per chunk. Default is `CHUNK_SIZE`.
+
+        Yields:
+            pd.DataFrame: Normalized transactions of one chunk (amounts in cents, see `normalize`).
+
+        Raises:
+            FileNotFoundError: If the file is not found.
+            ValueError: If the file is empty or invalid.
+        """
+        normalize = self.normalizer()
+        settings = self._read_settings()
+        reader = self._read_csv(file_path, resolve_csv_engine(self.csv_engine), chunksize=chunksize, **settings)
+        with reader:
+            empty = True
+            for chunk in reader:
+                empty = empty and chunk.empty
+                if settings['usecols'] is not None:
+                    chunk.columns = settings['usecols']
+                yield normalize(chunk, self.metrics)
+
+        if empty:
+            raise ValueError(f"The file at {file_path} is empty or invalid.")
+
+    def sample(self, file_path: str, nrows: int = SAMPLE_ROWS) -> pd.DataFrame:
+        """
+        Read and normalize only the first rows of a CSV file, e.g. to look at its dates without parsing the
+        whole file. The loaded data and the stage cache are left untouched.
+
+        Parameters:
+            file_path (str): Path to the input CSV file.
+            nrows (int): Number of rows to read. Default is `SAMPLE_ROWS`.
+
+        Returns:
+            pd.DataFrame: The normalized transactions of the first `nrows` rows (amounts in cents, see `normalize`).
+
+        Raises:
+            FileNotFoundError: If the file is not found.
+            ValueError: If the file is empty or invalid.
+        """
+        df = self._read_csv(file_path, nrows=nrows, **self._read_settings())
+        if df.empty:
+            raise ValueError(f"The file at {file_path} is empty or invalid.")
+        return self.normalizer()(df)
+
     def assign_iban(self, iban: int):
         """
         Replace missing or empty IBAN values with 'Unknown IBAN'.
@@ -61,101 +341,404 @@ class BankBase:
             iban (int): Index of the IBAN column.
         """
         try:
-            self.df.iloc[:, iban] = self.df.iloc[:, iban].apply(
-                lambda x: 'Unknown IBAN' if not pd.notnull(x) or x == '' else x
-            )
+            filled = fill_iban(source_column(self.df, iban))
+            if pd.api.types.is_integer_dtype(self.df.columns):
+                self.df[iban] = filled
+            else:
+                self.df.iloc[:, iban] = filled
+            self._df_version += 1
         except Exception as e:
             print(f"Error while assigning IBAN: {e}")
 
-    def create_transactions_sheet(self, date: int, name: int, amount: int, description: int, iban: int) -> pd.DataFrame:
+    def normalize(self, date: int = None, name: int = None, amount: int = None, description: int = None,
+                  iban: int = None) -> pd.DataFrame:
         """
-        Create a DataFrame with standardized transaction details.
+        Normalize the loaded data according to the bank spec (cached 'normalize' stage).
+
+        Missing IBANs (and names, if the spec has a name fallback) are filled in and amounts are signed
+        using the debit/credit column if any. Dates are parsed to datetime64, names and IBANs are stored
+        as categoricals and amounts as exact integer cents. With a `dedup_index`, transactions already seen
+        in another file of the bank are dropped. The result is only recomputed when the loaded data or the
+        column indexes change.
 
         Parameters:
-            date (int): Index of the Date column.
-            name (int): Index of the Name column.
-            amount (int): Index of the Amount column.
-            description (int): Index of the Description column.
-            iban (int): Index of the IBAN column.
+            date (int): Index of the Date column. Default is the index from the spec.
+            name (int): Index of the Name column. Default is the index from the spec.
+            amount (int): Index of the Amount column. Default is the index from the spec.
+            description (int): Index of the Description column. Default is the index from the spec.
+            iban (int): Index of the IBAN column. Default is the index from the spec.
+
+        Returns:
+            pd.DataFrame: The normalized transactions. Shared with the cache, so do not modify it in place.
+        """
+        normalize = self.normalizer(date, name, amount, description, iban)
+        key = (id(self.df), self._df_version, normalize.spec, id(self.dedup_index), self.file_path)
+        return self.stage_cache.get('normalize', key, lambda: self._normalize(normalize))
+
+    def _normalize(self, normalize: Normalizer) -> pd.DataFrame:
+        normalized = normalize(self.df, self.metrics)
+        if self.dedup_index is None or self.file_path is None:
+            return normalized
+
+        with self.metrics.stage('dedup', len(normalized)) as record:
+            source = os.path.relpath(os.path.abspath(self.file_path), os.path.abspath(self.file_manager.base_dir))
+            normalized = self.dedup_index.drop_duplicates(normalized, source.replace(os.sep, '/'))
+            record['rows_out'] = len(normalized)
+        return normalized
+
+    def create_transactions_sheet(self, date: int = None, name: int = None, amount: int = None,
+                                  description: int = None, iban: int = None) -> pd.DataFrame:
+        """
+        Create a DataFrame with standardized transaction details (cached 'transactions' stage).
+
+        Built from the cached normalized data (see `normalize`), so calling it again is free as long as
+        the loaded data does not change. Amounts are in euros.
+
+        Parameters:
+            date (int): Index of the Date column. Default is the index from the spec.
+            name (int): Index of the Name column. Default is the index from the spec.
+            amount (int): Index of the Amount column. Default is the index from the spec.
+            description (int): Index of the Description column. Default is the index from the spec.
+            iban (int): Index of the IBAN column. Default is the index from the spec.
 
         Returns:
-            pd.DataFrame: DataFrame containing transactions.
+            pd.DataFrame: DataFrame containing transactions. Shared with the cache, so do not modify it in place.
         """
         try:
-            self.assign_iban(iban)
-            column_idx = [date, iban, name, amount, description]
-            filtered_df = self.df.iloc[:, column_idx]
-            filtered_df.columns = self.column_names
-            return filtered_df
+            return self._transactions_sheet(date, name, amount, description, iban)
         except Exception as e:
             print(f"Error creating transactions sheet: {e}")
             return pd.DataFrame()
 
-    def create_income_expense_sheet(self, date: int, name: int, amount: int, description: int,
-                                    iban: int) -> pd.DataFrame:
+    def _transactions_sheet(self, *columns) -> pd.DataFrame:
+        try:
+            normalized = self.normalize(*columns)
+            key = self.stage_cache.key('normalize')
+            return self.stage_cache.get('transactions', key, lambda: self._select_columns(normalized))
+        except Exception:
+            self.stage_cache.invalidate('transactions')
+            raise
+
+    def _select_columns(self, normalized: pd.DataFrame) -> pd.DataFrame:
+        with self.metrics.stage('transactions', len(normalized)) as record:
+            transactions = to_euros(normalized)[self.column_names]
+            record['rows_out'] = len(transactions)
+        return transactions
+
+    def _group(self, normalized: pd.DataFrame) -> pd.DataFrame:
+        with self.metrics.stage('grouping', len(normalized)) as record:
+            # Sum exact cents on the categorical columns, merge the names of each counterparty, then convert to euros
+            grouped = group_amounts(normalized)
+            if self.canonicalizer is not None:
+                grouped = self.canonicalizer.regroup(grouped)
+            income_expense_df = income_expense_table(grouped / CENTS)
+            record['rows_out'] = len(income_expense_df)
+        return income_expense_df
+
+    def create_income_expense_sheet(self, date: int = None, name: int = None, amount: int = None,
+                                    description: int = None, iban: int = None) -> pd.DataFrame:
         """
-        Create an income-expense table grouped by Name and IBAN.
+        Create an income-expense table grouped by Name and IBAN (cached 'aggregates' stage). Names of the same
+        counterparty are merged by `canonicalizer`.
 
         Parameters:
-            date (int): Index of the Date column.
-            name (int): Index of the Name column.
-            amount (int): Index of the Amount column.
-            description (int): Index of the Description column.
-            iban (int): Index of the IBAN column.
+            date (int): Index of the Date column. Default is the index from the spec.
+            name (int): Index of the Name column. Default is the index from the spec.
+            amount (int): Index of the Amount column. Default is the index from the spec.
+            description (int): Index of the Description column. Default is the index from the spec.
+            iban (int): Index of the IBAN column. Default is the index from the spec.
 
         Returns:
             pd.DataFrame: DataFrame with income and expense details.
         """
         try:
-            filtered_df = self.create_transactions_sheet(date, name, amount, description, iban)
-            grouped = filtered_df.groupby(['Name', 'IBAN'])['Amount'].sum()
+            return self._income_expense_sheet(date, name, amount, description, iban)
+        except Exception as e:
+            print(f"Error creating income-expense sheet: {e}")
+            return pd.DataFrame()
 
-            income_df = grouped[grouped > 0].reset_index()
-            income_df.columns = ['Income Names', 'IBAN', 'Income Amounts']
+    def _income_expense_sheet(self, *columns) -> pd.DataFrame:
+        normalized = self.normalize(*columns)
+        key = (self.stage_cache.key('normalize'), id(self.canonicalizer))
+        return self.stage_cache.get('aggregates', key, lambda: self._group(normalized))
 
-            expense_df = grouped[grouped < 0].reset_index()
-            expense_df.columns = ['Expense Names', 'IBAN', 'Expense Amounts']
+    def create_category_sheet(self, date: int = None, name: int = None, amount: int = None,
+                              description: int = None, iban: int = None) -> pd.DataFrame:
+        """
+        Create a table of the income and expenses per category (cached 'categories' stage).
+
+        Every transaction is categorized by `categorizer`, using its name and, if no rule matches the
+        name, its description.
 
-            max_length = max(len(income_df), len(expense_df))
-            income_df = income_df.reindex(range(max_length)).fillna('')
-            expense_df = expense_df.reindex(range(max_length)).fillna('')
+        Parameters:
+            date (int): Index of the Date column. Default is the index from the spec.
+            name (int): Index of the Name column. Default is the index from the spec.
+            amount (int): Index of the Amount column. Default is the index from the spec.
+            description (int): Index of the Description column. Default is the index from the spec.
+            iban (int): Index of the IBAN column. Default is the index from the spec.
 
-            return pd.DataFrame({
-                'Income Names': income_df['Income Names'],
-                'Income Amounts': income_df['Income Amounts'],
-                'Expense Names': expense_df['Expense Names'],
-                'Expense Amounts': expense_df['Expense Amounts']
-            })
+        Returns:
+            pd.DataFrame: DataFrame with the 'Category', 'Income', 'Expenses', 'Net' and 'Transactions' columns.
+        """
+        try:
+            return self._category_sheet(date, name, amount, description, iban)
         except Exception as e:
-            print(f"Error creating income-expense sheet: {e}")
+            print(f"Error creating category sheet: {e}")
+            return pd.DataFrame()
+
+    def _category_sheet(self, *columns) -> pd.DataFrame:
+        normalized = self.normalize(*columns)
+        key = (self.stage_cache.key('normalize'), id(self.categorizer))
+        return self.stage_cache.get('categories', key, lambda: self._categorize(normalized))
+
+    def _categorize(self, normalized: pd.DataFrame) -> pd.DataFrame:
+        with self.metrics.stage('categories', len(normalized)) as record:
+            category_df = category_table(self.categorizer.totals(normalized), scale=CENTS)
+            record['rows_out'] = len(category_df)
+        return category_df
+
+    def create_recurring_sheet(self, date: int = None, name: int = None, amount: int = None,
+                               description: int = None, iban: int = None) -> pd.DataFrame:
+        """
+        Create a table of the recurring payments and unusual amounts per counterparty (cached 'recurring'
+        stage, see `recurring.recurring_table`).
+
+        Parameters:
+            date (int): Index of the Date column. Default is the index from the spec.
+            name (int): Index of the Name column. Default is the index from the spec.
+            amount (int): Index of the Amount column. Default is the index from the spec.
+            description (int): Index of the Description column. Default is the index from the spec.
+            iban (int): Index of the IBAN column. Default is the index from the spec.
+
+        Returns:
+            pd.DataFrame: DataFrame with one row per recurring counterparty and per anomaly.
+        """
+        try:
+            return self._recurring_sheet(date, name, amount, description, iban)
+        except Exception as e:
+            print(f"Error creating recurring sheet: {e}")
             return pd.DataFrame()
 
-    def csv_to_excel(self, import_path: str, transactions_path: str, date: int, name: int, amount: int,
-                     description: int, iban: int):
+    def _recurring_sheet(self, *columns) -> pd.DataFrame:
+        normalized = self.normalize(*columns)
+        key = (self.stage_cache.key('normalize'), id(self.canonicalizer))
+        return self.stage_cache.get('recurring', key, lambda: self._find_recurring(normalized))
+
+    def _find_recurring(self, normalized: pd.DataFrame) -> pd.DataFrame:
+        with self.metrics.stage('recurring', len(normalized)) as record:
+            recurring_df = recurring_table(normalized, self.canonicalizer)
+            record['rows_out'] = len(recurring_df)
+        return recurring_df
+
+    def convert(self, import_path: str, output_paths: dict, date: int = None, name: int = None,
+                amount: int = None, description: int = None, iban: int = None) -> dict:
+        """
+        Convert a CSV file to one or more output formats with transactions, income-expense, category and
+        recurring-payment sheets.
+
+        Runs the conversion pipeline load -> normalize -> transactions -> aggregates -> categories -> recurring
+        -> write.
+        Every stage but 'write' is served from the stage cache when its inputs did not change (e.g. the file
+        was already loaded with `load_file`), so writing several formats reuses the same frames. The stages
+        that were cache hits are reported.
+
+        Parameters:
+            import_path (str): Path to the input CSV file.
+            output_paths (dict): Maps each output format ('xlsx', 'csv' or 'parquet') to its path,
+                                 as returned by `FileManager.output_paths`.
+            date (int): Index of the Date column. Default is the index from the spec.
+            name (int): Index of the Name column. Default is the index from the spec.
+            amount (int): Index of the Amount column. Default is the index from the spec.
+            description (int): Index of the Description column. Default is the index from the spec.
+            iban (int): Index of the IBAN column. Default is the index from the spec.
+
+        Returns:
+            dict: The output paths that were written, or None if the conversion failed.
         """
-        Convert a CSV file to an Excel file with transactions and income-expense sheets.
+        try:
+            self.stage_cache.reset_report()
+            if self.df is None or os.path.exists(import_path):
+                self.load_file(import_path)
+            # Unlike the create_*_sheet methods, these raise on errors, so a broken file is never reported as converted
+            columns = (date, name, amount, description, iban)
+            filtered_df = self._transactions_sheet(*columns)
+            income_expense_df = self._income_expense_sheet(*columns)
+            category_df = self._category_sheet(*columns)
+            recurring_df = self._recurring_sheet(*columns)
+
+            with self.metrics.stage('write', len(filtered_df)) as record:
+                for file_format, path in output_paths.items():
+                    with open_writer(file_format, path, self.engine) as writer:
+                        writer.append(TRANSACTIONS_SHEET, filtered_df)
+                        writer.append(INCOME_EXPENSE_SHEET, income_expense_df)
+                        writer.append(CATEGORIES_SHEET, category_df)
+                        writer.append(RECURRING_SHEET, recurring_df)
+                record['rows_out'] = len(filtered_df) * len(output_paths)
+            self.stage_cache.record('write')
+
+            targets = ', '.join(f"'{path}'" for path in output_paths.values())
+            print(f"Successfully converted '{import_path}' to {targets}. Stages: {self.stage_cache.report()}.")
+            return output_paths
+        except (IndexError, Exception) as e:
+            print(f"Error during CSV conversion: {e}")
+            return None
+
+    def csv_to_excel(self, import_path: str, transactions_path: str, date: int = None, name: int = None,
+                     amount: int = None, description: int = None, iban: int = None):
+        """
+        Convert a CSV file to an Excel file with transactions, income-expense, category and recurring-payment
+        sheets.
+
+        The workbook is written in constant memory by a `StreamingExcelWriter` (see `convert`).
 
         Parameters:
             import_path (str): Path to the input CSV file.
             transactions_path (str): Path to save the output Excel file.
-            date (int): Index of the Date column.
-            name (int): Index of the Name column.
-            amount (int): Index of the Amount column.
-            description (int): Index of the Description column.
-            iban (int): Index of the IBAN column.
+            date (int): Index of the Date column. Default is the index from the spec.
+            name (int): Index of the Name column. Default is the index from the spec.
+            amount (int): Index of the Amount column. Default is the index from the spec.
+            description (int): Index of the Description column. Default is the index from the spec.
+            iban (int): Index of the IBAN column. Default is the index from the spec.
+
+        Returns:
+            str: Path to the generated Excel file, or None if the conversion failed.
+        """
+        paths = self.convert(import_path, {'xlsx': f"{transactions_path}.xlsx"}, date, name, amount,
+                             description, iban)
+        return paths['xlsx'] if paths else None
+
+    def stream_convert(self, import_path: str, output_paths: dict, chunksize: int = CHUNK_SIZE) -> dict:
+        """
+        Convert a CSV file to one or more output formats without loading the whole file into memory.
+
+        The file is read and normalized in chunks. Each chunk's transactions are written to the
+        'Transactions' sheet of every output as soon as it is read, and its per-(Name, IBAN) sums are
+        folded into a running total that becomes the 'Income & Expenses' sheet; the same goes for the
+        per-category totals of the 'Categories' sheet. Peak memory depends on the chunk size and the number
+        of distinct counterparties, not on the size of the file.
+
+        Parameters:
+            import_path (str): Path to the input CSV file.
+            output_paths (dict): Maps each output format ('xlsx', 'csv' or 'parquet') to its path.
+            chunksize (int): Maximum number of rows per chunk. Default is `CHUNK_SIZE`.
+
+        Returns:
+            dict: The output paths that were written, or None if the conversion failed.
+        """
+        try:
+            aggregator = IncomeExpenseAggregator(scale=CENTS)
+            category_totals = None
+            with ExitStack() as stack:
+                writers = [stack.enter_context(open_writer(file_format, path, self.engine))
+                           for file_format, path in output_paths.items()]
+                for normalized in self.iter_chunks(import_path, chunksize):
+                    transactions = to_euros(normalized)
+                    for writer in writers:
+                        writer.append(TRANSACTIONS_SHEET, transactions)
+                    aggregator.add(normalized)
+                    totals = self.categorizer.totals(normalized)
+                    category_totals = totals if category_totals is None else category_totals.add(totals, fill_value=0)
+
+                income_expense_df = aggregator.table(self.canonicalizer)
+                if category_totals is None:
+                    category_df = pd.DataFrame(columns=CATEGORY_COLUMNS)
+                else:
+                    category_df = category_table(category_totals, scale=CENTS)
+                for writer in writers:
+                    writer.append(INCOME_EXPENSE_SHEET, income_expense_df)
+                    writer.append(CATEGORIES_SHEET, category_df)
+
+            targets = ', '.join(f"'{path}'" for path in output_paths.values())
+            print(f"Successfully converted '{import_path}' to {targets} ({aggregator.rows} transactions).")
+            return output_paths
+        except Exception as e:
+            print(f"Error during streaming CSV conversion: {e}")
+            return None
+
+    def parallel_normalize(self, file_path: str, workers: int = None) -> pd.DataFrame:
+        """
+        Read and normalize a very large CSV file on several cores (see `parallel.parallel_parse`).
+
+        The file is memory-mapped and split into byte ranges at record boundaries, and the ranges are parsed
+        and normalized by `workers` processes. Unlike `normalize`, the result is not cached and transactions
+        are not deduplicated.
+
+        Parameters:
+            file_path (str): Path to the input CSV file.
+            workers (int): Number of worker processes. Default is the number of CPUs.
+
+        Returns:
+            pd.DataFrame: The normalized transactions (amounts in cents), in file order.
 
         Raises:
-            IndexError: If column indexes are invalid.
-            Exception: For unexpected errors during the conversion.
+            FileNotFoundError: If the file is not found.
+            ValueError: If the file is empty or invalid.
+        """
+        result = parallel_parse(file_path, self._read_settings(), self.normalizer(), workers, self.categorizer.rules,
+                                header=self.header)
+        return result['transactions']
+
+    def parallel_convert(self, import_path: str, output_paths: dict, workers: int = None,
+                         transactions: bool = True) -> dict:
+        """
+        Convert a very large CSV file to one or more output formats, parsing it on several cores.
+
+        Each worker process parses and normalizes byte ranges of the file and sums them per (Name, IBAN) and
+        per category. The partial totals are merged into the 'Income & Expenses' and 'Categories' sheets, and
+        the normalized ranges are concatenated, in file order, into the 'Transactions' sheet and analyzed for
+        the 'Recurring & Anomalies' sheet.
+
+        Parameters:
+            import_path (str): Path to the input CSV file.
+            output_paths (dict): Maps each output format ('xlsx', 'csv' or 'parquet') to its path.
+            workers (int): Number of worker processes. Default is the number of CPUs.
+            transactions (bool): Write the 'Transactions' and 'Recurring & Anomalies' sheets. Default is True.
+                                 Without them only the totals travel back from the workers, which is faster for
+                                 exports too large for one sheet.
+
+        Returns:
+            dict: The output paths that were written, or None if the conversion failed.
         """
         try:
-            filtered_df = self.create_transactions_sheet(date, name, amount, description, iban)
-            income_expense_df = self.create_income_expense_sheet(date, name, amount, description, iban)
+            with self.metrics.stage('load') as record:
+                result = parallel_parse(import_path, self._read_settings(), self.normalizer(), workers,
+                                        self.categorizer.rules, transactions, self.header)
+                record['rows_out'] = result['aggregator'].rows
+            income_expense_df = result['aggregator'].table(self.canonicalizer)
+            category_df = category_table(result['categories'], scale=CENTS)
+            transactions_df = to_euros(result['transactions']) if transactions else None
+            recurring_df = recurring_table(result['transactions'], self.canonicalizer) if transactions else None
 
-            with pd.ExcelWriter(f"{transactions_path}.xlsx", engine=self.engine) as writer:
-                filtered_df.to_excel(writer, index=False, sheet_name='Transactions')
-                income_expense_df.to_excel(writer, index=False, sheet_name='Income & Expenses')
+            with self.metrics.stage('write', result['aggregator'].rows) as record:
+                for file_format, path in output_paths.items():
+                    with open_writer(file_format, path, self.engine) as writer:
+                        if transactions_df is not None:
+                            writer.append(TRANSACTIONS_SHEET, transactions_df)
+                        writer.append(INCOME_EXPENSE_SHEET, income_expense_df)
+                        writer.append(CATEGORIES_SHEET, category_df)
+                        if recurring_df is not None:
+                            writer.append(RECURRING_SHEET, recurring_df)
+                record['rows_out'] = result['aggregator'].rows * len(output_paths)
 
-            print(f"Successfully converted '{import_path}' to '{transactions_path}.xlsx'.")
-        except (IndexError, Exception) as e:
-            print(f"Error during CSV to Excel conversion: {e}")
+            targets = ', '.join(f"'{path}'" for path in output_paths.values())
+            print(f"Successfully converted '{import_path}' to {targets} ({result['aggregator'].rows} transactions, "
+                  f"{result['ranges']} byte ranges).")
+            return output_paths
+        except Exception as e:
+            print(f"Error during parallel CSV conversion: {e}")
+            return None
+
+    def stream_to_excel(self, import_path: str, transactions_path: str, chunksize: int = CHUNK_SIZE):
+        """
+        Convert a CSV file to an Excel file without loading the whole file into memory (see `stream_convert`).
+
+        Parameters:
+            import_path (str): Path to the input CSV file.
+            transactions_path (str): Path to save the output Excel file.
+            chunksize (int): Maximum number of rows per chunk. Default is `CHUNK_SIZE`.
+
+        Returns:
+            str: Path to the generated Excel file, or None if the conversion failed.
+        """
+        paths = self.stream_convert(import_path, {'xlsx': f"{transactions_path}.xlsx"}, chunksize)
+        return paths['xlsx'] if paths else None
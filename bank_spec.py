@@ -0,0 +1,108 @@
+from dataclasses import dataclass, field, replace
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class BankSpec:
+    """
+    Declarative description of a bank's CSV export format.
+
+    A spec holds everything needed to turn a bank export into the standard transactions layout, so
+    adding a new bank only means adding a new spec (see `BANK_SPECS`).
+
+    Attributes:
+        name (str): Short name of the bank (e.g., 'sns'). Also used as the data folder name.
+        seperator (str): Delimiter used in the CSV files.
+        decimal (str): Decimal separator used in the CSV files.
+        encoding (str): Character encoding of the CSV files.
+        header (int): Row number to use as the column names, or None if the export has no header.
+        columns (dict): Maps the standard column names ('Date', 'IBAN', 'Name', 'Amount', 'Description')
+                        to their column index in the export.
+        sign_column (int): Index of a debit/credit column. If set, amounts are made negative for debit rows
+                           and positive otherwise. Default is None (amounts are already signed).
+        debit_value (str): Value of `sign_column` that marks a debit. Default is 'Debit'.
+        name_fallback (str): If set, missing names are taken from the description up to this delimiter
+                             ('Unknown' if the description is missing too). Default is None (no fallback).
+        drop_empty_rows (bool): Remove rows where every value is missing. Default is False.
+        date_format (str): `strftime` format of the Date column. Default is None (let pandas infer it).
+        account_column (int): Index of the column with the IBAN of the own account. Default is None (not in
+                              the export). Needed to match transfers between own accounts.
+    """
+    name: str
+    seperator: str = ';'
+    decimal: str = ','
+    encoding: str = 'utf-8'
+    header: Optional[int] = None
+    columns: Dict[str, int] = field(default_factory=dict)
+    sign_column: Optional[int] = None
+    debit_value: str = 'Debit'
+    name_fallback: Optional[str] = None
+    drop_empty_rows: bool = False
+    date_format: Optional[str] = None
+    account_column: Optional[int] = None
+
+    @property
+    def usecols(self) -> list:
+        """
+        The column indexes the normalization needs, in file order. Every other column can be skipped when reading.
+        """
+        used = set(self.columns.values())
+        for index in (self.sign_column, self.account_column):
+            if index is not None:
+                used.add(index)
+        return sorted(used)
+
+    def with_columns(self, **columns) -> 'BankSpec':
+        """
+        Return a copy of the spec with some column indexes replaced.
+
+        Parameters:
+            **columns: Standard column names mapped to their new index. None values are ignored.
+
+        Returns:
+            BankSpec: The updated spec.
+        """
+        updates = {key: value for key, value in columns.items() if value is not None}
+        if not updates:
+            return self
+        return replace(self, columns={**self.columns, **updates})
+
+
+SNS_SPEC = BankSpec(
+    name='sns',
+    seperator=';',
+    decimal=',',
+    encoding='utf-8',
+    header=None,
+    columns={'Date': 0, 'IBAN': 2, 'Name': 3, 'Amount': 10, 'Description': 17},
+    name_fallback='>',
+    date_format='%d-%m-%Y',
+    account_column=1,
+)
+
+RABO_SPEC = BankSpec(
+    name='rabo',
+    seperator=',',
+    decimal=',',
+    encoding='cp1252',
+    header=0,
+    columns={'Date': 4, 'IBAN': 8, 'Name': 9, 'Amount': 6, 'Description': 19},
+    date_format='%Y-%m-%d',
+    account_column=0,
+)
+
+ING_SPEC = BankSpec(
+    name='ing',
+    seperator=';',
+    decimal=',',
+    encoding='utf-8',
+    header=0,
+    columns={'Date': 0, 'IBAN': 3, 'Name': 1, 'Amount': 6, 'Description': 8},
+    sign_column=5,
+    debit_value='Debit',
+    drop_empty_rows=True,
+    date_format='%Y%m%d',
+    account_column=2,
+)
+
+BANK_SPECS = {spec.name: spec for spec in (SNS_SPEC, RABO_SPEC, ING_SPEC)}
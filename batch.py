@@ -0,0 +1,465 @@
+import argparse
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bank_spec import BANK_SPECS
+from file_manager import FileManager
+from instrumentation import Metrics
+
+OUTPUT_FORMATS = ["xlsx", "csv", "parquet"]
+
+# Bank name -> (module, class) of its dedicated reader. Readers (and everything that needs pandas) are
+# imported lazily inside the worker processes, so importing this module stays cheap for the CLI.
+# Banks that only have a spec in `BANK_SPECS` use a plain `BankBase`.
+READERS = {
+    "sns": ("sns", "SNS"),
+    "rabo": ("rabo", "RABO"),
+    "ing": ("ing", "ING"),
+}
+BANKS = list(dict.fromkeys([*READERS, *BANK_SPECS]))
+
+
+def create_reader(bank_name: str, file_manager: FileManager):
+    """
+    Build the bank-specific reader for the given bank name.
+
+    Parameters:
+        bank_name (str): Name of the bank (e.g., 'sns', 'rabo' or 'ing').
+        file_manager (FileManager): FileManager to pass on to the reader.
+
+    Returns:
+        BankBase: An instance of the matching `SNS`, `RABO` or `ING` class, or a `BankBase` built from
+                  the bank's spec.
+
+    Raises:
+        ValueError: If the bank name is unknown.
+    """
+    if bank_name in READERS:
+        module_name, class_name = READERS[bank_name]
+        reader_class = getattr(importlib.import_module(module_name), class_name)
+        return reader_class(file_manager)
+    if bank_name in BANK_SPECS:
+        from bank_base import BankBase
+        return BankBase.from_spec(file_manager, BANK_SPECS[bank_name])
+
+    raise ValueError(f"Unknown bank '{bank_name}'. Choose one of: {', '.join(BANKS)}.")
+
+
+def find_jobs(banks: list = None, years: list = None, base_dir: str = "data", results_dir: str = "results",
+              formats: list = ("xlsx",), cache_dir: str = None, metrics_path: str = None,
+              profile: str = None, dedup: bool = False, rules_path: str = None, cube: bool = False,
+              names_path: str = None, fuzzy_names: bool = False) -> list:
+    """
+    List every CSV file under `data/<bank>/<year>/` that should be converted.
+
+    Parameters:
+        banks (list): Bank names to include. Default is all known banks.
+        years (list): Years to include. Default is every year found on disk.
+        base_dir (str): Root directory for input files. Default is 'data'.
+        results_dir (str): Root directory for output files. Default is 'results'.
+        formats (list): Output formats to write. Default is ['xlsx'].
+        cache_dir (str): Directory of the parse cache. Default is None (no cache).
+        metrics_path (str): JSON lines file to append per-stage metrics to. Default is None (no metrics).
+        profile (str): Stage to profile with cProfile ('hot' for the slowest one). Default is None.
+        dedup (bool): Drop transactions already seen in another file of the bank. Default is False.
+        rules_path (str): JSON file with categorization rules. Default is None (the default rules).
+        cube (bool): Return the aggregate cube cells of each file. Default is False.
+        names_path (str): JSON table of canonical counterparty names. Default is None (an in-memory table).
+        fuzzy_names (bool): Fuzzy-match new counterparty names. Default is False.
+
+    Returns:
+        list: Tuples of the `convert_file` arguments, one per input file.
+    """
+    jobs = []
+    for bank_name in banks or BANKS:
+        file_manager = FileManager(bank_name, base_dir, results_dir)
+        bank_years = file_manager.list_years()
+        if years:
+            bank_years = [year for year in bank_years if year in {str(y) for y in years}]
+
+        for year in bank_years:
+            for month in file_manager.list_months(year):
+                jobs.append((bank_name, year, month, base_dir, results_dir, tuple(formats), cache_dir,
+                             metrics_path, profile, dedup, rules_path, cube, names_path, fuzzy_names))
+
+    return jobs
+
+
+def convert_file(bank_name: str, year: str, month: str, base_dir: str = "data", results_dir: str = "results",
+                 formats: list = ("xlsx",), cache_dir: str = None, metrics_path: str = None,
+                 profile: str = None, dedup: bool = False, rules_path: str = None, cube: bool = False,
+                 names_path: str = None, fuzzy_names: bool = False) -> dict:
+    """
+    Convert a single bank CSV file to the requested output formats. Runs inside a worker process.
+
+    Any error is caught and reported in the result so that one bad file does not stop the batch.
+
+    Parameters:
+        bank_name (str): Name of the bank (e.g., 'sns').
+        year (str): Year folder of the input file.
+        month (str): Month name of the input file (without extension).
+        base_dir (str): Root directory for input files. Default is 'data'.
+        results_dir (str): Root directory for output files. Default is 'results'.
+        formats (list): Output formats to write. Default is ['xlsx'].
+        cache_dir (str): Directory of the parse cache. Default is None (no cache).
+        metrics_path (str): JSON lines file to append per-stage metrics to. Default is None (no metrics).
+        profile (str): Stage to profile with cProfile ('hot' for the slowest one). Profiles are written to
+                       `results/<bank>/<year>/profiles/<month>/`. Default is None.
+        dedup (bool): Drop transactions already seen in another file of the bank, using the fingerprint
+                      index in `results/<bank>/`. Default is False.
+        rules_path (str): JSON file with categorization rules (see `categorizer.load_rules`). Default is None
+                          (the default rules).
+        cube (bool): Aggregate the normalized transactions into cube cells (see `cube.cube_cells`) for the
+                     parent process to add to the cube. Default is False.
+        names_path (str): JSON table of canonical counterparty names (see `counterparties.NameCanonicalizer`).
+                          It is only read here; the names it does not know yet are returned for the parent
+                          process to add. Default is None (an in-memory table).
+        fuzzy_names (bool): Fuzzy-match new counterparty names against the known ones. Default is False.
+
+    Returns:
+        dict: The job description with 'rows', 'seconds', 'output' (format -> path), 'cache' ('hit', 'miss'
+              or None), 'duplicates' (rows dropped, or None), 'cells' (cube cells and file digest, or None),
+              'names' (counterparty names not in the name table yet, or None) and 'error' keys.
+    """
+    result = {"bank": bank_name, "year": year, "month": month, "rows": 0, "output": None, "cache": None,
+              "duplicates": None, "cells": None, "names": None, "error": None}
+    start = time.perf_counter()
+    metrics_file = open(metrics_path, "a", encoding="utf-8") if metrics_path else None
+    try:
+        from categorizer import Categorizer, load_rules
+        from counterparties import NameCanonicalizer
+        from dedup import INDEX_FILE, FingerprintIndex
+        from parse_cache import ParseCache
+
+        file_manager = FileManager(bank_name, base_dir, results_dir)
+        reader = create_reader(bank_name, file_manager)
+        if cache_dir is not None:
+            reader.parse_cache = ParseCache(cache_dir)
+        if rules_path is not None:
+            reader.categorizer = Categorizer(load_rules(rules_path))
+        if names_path is not None or fuzzy_names:
+            reader.canonicalizer = NameCanonicalizer(names_path, fuzzy_names)
+        if dedup:
+            reader.dedup_index = FingerprintIndex(os.path.join(file_manager.results_dir, INDEX_FILE))
+        if metrics_file is not None or profile is not None:
+            profile_dir = os.path.join(file_manager.results_dir, str(year), "profiles", month)
+            reader.metrics = Metrics(metrics_file, track_memory=metrics_file is not None, profile=profile,
+                                     profile_dir=profile_dir)
+        file_path = file_manager.get_file_path(year, month)
+        reader.load_file(file_path)
+        result["rows"] = len(reader.df)
+        if reader.parse_cache is not None:
+            result["cache"] = "hit" if reader.parse_cache.hits else "miss"
+
+        output_paths = file_manager.output_paths(year, month, formats)
+        result["output"] = reader.convert(file_path, output_paths)
+        if reader.dedup_index is not None:
+            result["duplicates"] = sum(reader.dedup_index.dropped.values())
+        if names_path is not None:
+            result["names"] = reader.canonicalizer.learned
+        if result["output"] is None:
+            result["error"] = "Conversion failed, see the log above."
+        elif cube:
+            from cube import cube_cells
+            from parse_cache import file_digest
+            result["cells"] = (cube_cells(reader.normalize()), file_digest(file_path))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if metrics_file is not None:
+            metrics_file.close()
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def count_names(bank_name: str, year: str, month: str, base_dir: str = "data", results_dir: str = "results",
+                cache_dir: str = None, names_path: str = None) -> dict:
+    """
+    Count the counterparty names of a single bank CSV file that are not in the name table yet. Runs inside
+    a worker process, before any file is converted (see `learn_names`).
+
+    Errors are ignored here; converting the file reports them.
+
+    Parameters:
+        bank_name (str): Name of the bank (e.g., 'sns').
+        year (str): Year folder of the input file.
+        month (str): Month name of the input file (without extension).
+        base_dir (str): Root directory for input files. Default is 'data'.
+        results_dir (str): Root directory for output files. Default is 'results'.
+        cache_dir (str): Directory of the parse cache. Default is None (no cache).
+        names_path (str): JSON table of canonical counterparty names. Default is None (an empty table).
+
+    Returns:
+        dict: Maps each new raw name to its number of transactions (empty if the file cannot be read).
+    """
+    try:
+        from counterparties import NameCanonicalizer
+        from parse_cache import ParseCache
+
+        file_manager = FileManager(bank_name, base_dir, results_dir)
+        reader = create_reader(bank_name, file_manager)
+        if cache_dir is not None:
+            reader.parse_cache = ParseCache(cache_dir)
+        reader.load_file(file_manager.get_file_path(year, month))
+        known = NameCanonicalizer(names_path).names
+        counts = reader.normalize()['Name'].value_counts()
+        return {name: count for name, count in counts.items() if count and name not in known}
+    except Exception:
+        return {}
+
+
+def learn_names(executor: ProcessPoolExecutor, jobs: list, names_path: str, fuzzy_names: bool = False):
+    """
+    Add the counterparty names of every file to the name table before the files are converted, so that
+    all files of the run label a counterparty the same way. The canonical name of a new counterparty is
+    its most frequent spelling over all files, not just the file a worker happened to read.
+
+    Parameters:
+        executor (ProcessPoolExecutor): Pool to count the names of each file on.
+        jobs (list): Tuples of the `convert_file` arguments (see `find_jobs`).
+        names_path (str): Path of the JSON name table.
+        fuzzy_names (bool): Fuzzy-match new counterparty names against the known ones. Default is False.
+    """
+    from counterparties import NameCanonicalizer
+
+    futures = [executor.submit(count_names, *job[:5], job[6], names_path) for job in jobs]
+    counts = {}
+    for future in as_completed(futures):
+        for name, count in future.result().items():
+            counts[name] = counts.get(name, 0) + count
+
+    canonicalizer = NameCanonicalizer(names_path, fuzzy_names)
+    canonicalizer.learn(counts)
+    report = canonicalizer.report()
+    canonicalizer.save()
+    print(f"Names: {report}; saved to '{names_path}'.")
+
+
+def convert_files(jobs: list) -> list:
+    """
+    Convert several files one after another in the same worker process.
+
+    Parameters:
+        jobs (list): Tuples of the `convert_file` arguments (see `find_jobs`).
+
+    Returns:
+        list: One result dictionary per file (see `convert_file`).
+    """
+    return [convert_file(*job) for job in jobs]
+
+
+def run_batch(banks: list = None, years: list = None, base_dir: str = "data", results_dir: str = "results",
+              workers: int = None, formats: list = ("xlsx",), cache_dir: str = None, metrics_path: str = None,
+              profile: str = None, dedup: bool = False, rules_path: str = None, cube: bool = False,
+              names_path: str = None, fuzzy_names: bool = False) -> list:
+    """
+    Convert every bank/year/month CSV file on a pool of worker processes.
+
+    With `dedup`, the files of one bank share a fingerprint index, so they are converted one after
+    another (in year and calendar month order, see `FileManager.list_months`) by the same worker; different
+    banks still run in parallel.
+
+    With `cube`, each worker also sends back the cube cells of its file (a few rows per counterparty and
+    day), and this process adds them to the aggregate cube in `results/cube.npz`, replacing the cells the
+    file had before.
+
+    Parameters:
+        banks (list): Bank names to include. Default is all known banks.
+        years (list): Years to include. Default is every year found on disk.
+        base_dir (str): Root directory for input files. Default is 'data'.
+        results_dir (str): Root directory for output files. Default is 'results'.
+        workers (int): Number of worker processes. Default is the number of CPUs.
+        formats (list): Output formats to write. Default is ['xlsx'].
+        cache_dir (str): Directory of the parse cache. Default is None (no cache). Stale entries are
+                         evicted at the end of the run.
+        metrics_path (str): JSON lines file to append per-stage metrics to. Default is None (no metrics).
+        profile (str): Stage to profile with cProfile ('hot' for the slowest one). Default is None.
+        dedup (bool): Drop transactions already seen in another file of the bank. Default is False.
+        rules_path (str): JSON file with categorization rules. Default is None (the default rules).
+        cube (bool): Add the converted files to the aggregate cube. Default is False.
+        names_path (str): JSON table of canonical counterparty names. The names of all files are added to it
+                          before any file is converted (see `learn_names`), so every output uses the same
+                          canonical names. Default is None (an in-memory table per file).
+        fuzzy_names (bool): Fuzzy-match new counterparty names against the known ones. Default is False.
+
+    Returns:
+        list: One result dictionary per file (see `convert_file`).
+    """
+    jobs = find_jobs(banks, years, base_dir, results_dir, formats, cache_dir, metrics_path, profile, dedup,
+                     rules_path, cube, names_path, fuzzy_names)
+    if dedup:
+        tasks = {}
+        for job in jobs:
+            tasks.setdefault(job[0], []).append(job)
+        tasks = list(tasks.values())
+    else:
+        tasks = [[job] for job in jobs]
+    results = []
+    start = time.perf_counter()
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            if names_path is not None:
+                learn_names(executor, jobs, names_path, fuzzy_names)
+            futures = {executor.submit(convert_files, task): task for task in tasks}
+            for future in as_completed(futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    # The worker process itself died (e.g., out of memory)
+                    for bank_name, year, month, *_ in futures[future]:
+                        results.append({"bank": bank_name, "year": year, "month": month, "rows": 0,
+                                        "seconds": 0.0, "output": None, "cache": None, "duplicates": None,
+                                        "cells": None, "names": None, "error": f"{type(e).__name__}: {e}"})
+
+    print_summary(results, time.perf_counter() - start)
+    if cube:
+        update_cube(results, results_dir)
+    if names_path is not None:
+        update_names(results, names_path)
+    if cache_dir is not None:
+        from parse_cache import ParseCache
+        ParseCache(cache_dir).evict()
+    return results
+
+
+def update_cube(results: list, results_dir: str = "results"):
+    """
+    Add the cube cells of converted files to the aggregate cube and save it.
+
+    Parameters:
+        results (list): Result dictionaries returned by `convert_file` with `cube` set.
+        results_dir (str): Root directory for output files. Default is 'results'.
+    """
+    from cube import CUBE_FILE, AggregateCube
+
+    aggregate_cube = AggregateCube(os.path.join(results_dir, CUBE_FILE))
+    added = 0
+    for result in results:
+        if result.get("cells") is not None:
+            cells, digest = result.pop("cells")
+            aggregate_cube.add(result["bank"], f"{result['year']}/{result['month']}", cells, digest)
+            added += 1
+    aggregate_cube.save()
+    print(f"Cube: added {added} file(s); {aggregate_cube.report()}.")
+
+
+def update_names(results: list, names_path: str):
+    """
+    Add the counterparty names first seen by the workers to the name table and save it. After
+    `learn_names` these are only the names of files that changed during the run.
+
+    Parameters:
+        results (list): Result dictionaries returned by `convert_file` with `names_path` set.
+        names_path (str): Path of the JSON name table.
+    """
+    from counterparties import NameCanonicalizer
+
+    pairs = [pair for result in results for pair in (result.pop("names", None) or {}).items()]
+    if not pairs:
+        return
+    canonicalizer = NameCanonicalizer(names_path)
+    canonicalizer.merge(pairs)
+    report = canonicalizer.report()
+    canonicalizer.save()
+    print(f"Names: {report}; saved to '{names_path}'.")
+
+
+def print_summary(results: list, elapsed: float):
+    """
+    Print the throughput and failures of a batch run.
+
+    Parameters:
+        results (list): Result dictionaries returned by `convert_file`.
+        elapsed (float): Total wall time of the batch in seconds.
+    """
+    failures = [result for result in results if result["error"]]
+    rows = sum(result["rows"] for result in results if not result["error"])
+    converted = len(results) - len(failures)
+    rate = elapsed if elapsed > 0 else float("inf")
+
+    print(f"\nConverted {converted} of {len(results)} file(s) in {elapsed:.2f}s "
+          f"({converted / rate:.2f} files/s, {rows / rate:,.0f} rows/s).")
+    cache_results = [result["cache"] for result in results if result["cache"]]
+    if cache_results:
+        print(f"Parse cache: {cache_results.count('hit')} hit(s), {cache_results.count('miss')} miss(es).")
+    duplicates = [result["duplicates"] for result in results if result["duplicates"] is not None]
+    if duplicates:
+        print(f"Duplicates: {sum(duplicates):,} row(s) already seen in other files were dropped.")
+    if failures:
+        print(f"{len(failures)} file(s) failed:")
+        for result in sorted(failures, key=lambda r: (r["bank"], r["year"], r["month"])):
+            print(f"  - {result['bank']}/{result['year']}/{result['month']}: {result['error']}")
+
+
+def print_memory_report(banks: list = None, years: list = None, base_dir: str = "data", results_dir: str = "results"):
+    """
+    Print the memory footprint of each CSV file before (all columns, generic dtypes) and after (needed
+    columns, compact dtypes) normalization. Nothing is converted.
+
+    Parameters:
+        banks (list): Bank names to include. Default is all known banks.
+        years (list): Years to include. Default is every year found on disk.
+        base_dir (str): Root directory for input files. Default is 'data'.
+        results_dir (str): Root directory for output files. Default is 'results'.
+
+    Returns:
+        list: One report dictionary per file (see `BankBase.memory_report`).
+    """
+    reports = []
+    for bank_name, year, month, *_ in find_jobs(banks, years, base_dir, results_dir):
+        file_manager = FileManager(bank_name, base_dir, results_dir)
+        try:
+            report = create_reader(bank_name, file_manager).memory_report(file_manager.get_file_path(year, month))
+        except Exception as e:
+            print(f"{bank_name}/{year}/{month}: {type(e).__name__}: {e}")
+            continue
+        reports.append(report)
+        print(f"{bank_name}/{year}/{month}: {report['rows']:,} rows, {report['before_mb']:.3f} MB -> "
+              f"{report['after_mb']:.3f} MB ({report['saved_percent']:.1f}% saved)")
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert every bank CSV file under the data folder.")
+    parser.add_argument("--bank", action="append", choices=BANKS, help="Bank to include (repeatable).")
+    parser.add_argument("--year", action="append", help="Year to include (repeatable).")
+    parser.add_argument("--data-dir", default="data", help="Root directory for input files.")
+    parser.add_argument("--results-dir", default="results", help="Root directory for output files.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes.")
+    parser.add_argument("--format", action="append", choices=OUTPUT_FORMATS,
+                        help="Output format (repeatable). Default is xlsx.")
+    parser.add_argument("--cache-dir", default=os.path.join(".cache", "parsed"),
+                        help="Directory of the parse cache of raw CSV files.")
+    parser.add_argument("--no-cache", action="store_true", help="Always parse the CSV files.")
+    parser.add_argument("--metrics", help="JSON lines file to append per-stage timing and memory metrics to.")
+    parser.add_argument("--profile", help="Stage to profile with cProfile (e.g. 'load', or 'hot' for the slowest).")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Drop transactions that were already converted from another (overlapping) file.")
+    parser.add_argument("--rules", help="JSON file with categorization rules for the 'Categories' sheet.")
+    parser.add_argument("--cube", action="store_true",
+                        help="Add the converted files to the aggregate cube for period rollups (see cube.py).")
+    parser.add_argument("--names", help="JSON table of canonical counterparty names, created if it does not exist "
+                                         "(e.g. results/names.json).")
+    parser.add_argument("--fuzzy-names", action="store_true",
+                        help="Merge new counterparty names with similar known names (e.g. typos).")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="Only print the memory footprint of each file before and after normalization.")
+    args = parser.parse_args()
+
+    if args.memory_report:
+        print_memory_report(args.bank, args.year, args.data_dir, args.results_dir)
+        return
+
+    results = run_batch(args.bank, args.year, args.data_dir, args.results_dir, args.workers, args.format or ["xlsx"],
+                        None if args.no_cache else args.cache_dir, args.metrics, args.profile, args.dedup,
+                        args.rules, args.cube, args.names, args.fuzzy_names)
+    if any(result["error"] for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from bank_base import INCOME_EXPENSE_SHEET, TRANSACTIONS_SHEET
+from batch import create_reader
+from benchmarks.synthetic import LAYOUTS, write_csv
+from file_manager import FileManager
+from writers import open_writer
+
+STAGES = ['load_file', 'create_transactions_sheet', 'create_income_expense_sheet', 'write']
+EXCEL_MAX_ROWS = 1_048_575
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+
+
+def _stages(reader, csv_path: str, output_path: str, file_format: str) -> list:
+    """
+    The benchmarked stages of one conversion, in order. Each stage reuses the cached result of the previous one.
+    The 'write' stage only writes the sheets prepared by the earlier stages, so it times the writer alone.
+    """
+    sheets = {}
+
+    def prepare(sheet_name: str, create):
+        sheets[sheet_name] = create()
+
+    def write():
+        with open_writer(file_format, output_path, reader.engine) as writer:
+            for sheet_name, df in sheets.items():
+                writer.append(sheet_name, df)
+
+    return [
+        ('load_file', lambda: reader.load_file(csv_path)),
+        ('create_transactions_sheet', lambda: prepare(TRANSACTIONS_SHEET, reader.create_transactions_sheet)),
+        ('create_income_expense_sheet', lambda: prepare(INCOME_EXPENSE_SHEET, reader.create_income_expense_sheet)),
+        ('write', write),
+    ]
+
+
+def _new_reader(bank_name: str):
+    return create_reader(bank_name, FileManager(bank_name))
+
+
+def _peak_rss_mb() -> float:
+    # The high-water mark of the resident set size covers memory allocated in C code as well, e.g. by the
+    # pyarrow CSV reader, which tracemalloc does not see. `resource` does not exist on Windows.
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+
+def run_case(bank_name: str, rows: int, csv_path: str, measure_memory: bool = True) -> list:
+    """
+    Time (and optionally memory-profile) every stage of one bank conversion.
+
+    The timing pass runs without tracemalloc, since tracing allocations slows pandas down; it records the
+    peak resident set size of the process after each stage ('peak_rss_mb'). That is a high-water mark of
+    the whole process, so run each case in a fresh process (as `main` does) and read it as the peak reached
+    by the end of the stage. The peak Python allocations of each stage ('peak_mb', from tracemalloc, which
+    sees pandas and numpy buffers but not memory allocated by C libraries such as pyarrow) are measured
+    in a second pass.
+
+    Parameters:
+        bank_name (str): Name of the bank.
+        rows (int): Number of rows of the input file.
+        csv_path (str): Path of the synthetic CSV file.
+        measure_memory (bool): Also measure the peak Python allocations of each stage. Default is True.
+
+    Returns:
+        list: One result dictionary per stage.
+    """
+    file_format = 'xlsx' if rows <= EXCEL_MAX_ROWS else 'csv'
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_path = os.path.join(output_dir, f"output.{file_format}")
+
+        reader = _new_reader(bank_name)
+        for stage, run in _stages(reader, csv_path, output_path, file_format):
+            start = time.perf_counter()
+            run()
+            seconds = time.perf_counter() - start
+            results.append({'bank': bank_name, 'rows': rows, 'stage': stage, 'seconds': round(seconds, 6),
+                            'rows_per_second': round(rows / seconds) if seconds > 0 else None,
+                            'peak_rss_mb': _peak_rss_mb(), 'peak_mb': None,
+                            'output': file_format if stage == 'write' else None})
+
+        if measure_memory:
+            reader = _new_reader(bank_name)
+            for result, (stage, run) in zip(results, _stages(reader, csv_path, output_path, file_format)):
+                tracemalloc.start()
+                run()
+                result['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+                tracemalloc.stop()
+    return results
+
+
+def compare(results: list, baseline: list, tolerance: float = 0.2) -> list:
+    """
+    Compare benchmark results with a stored baseline.
+
+    Parameters:
+        results (list): Results of the current run.
+        baseline (list): Results of the baseline run.
+        tolerance (float): Allowed relative slowdown or memory growth. Default is 0.2 (20%).
+
+    Returns:
+        list: Human-readable descriptions of the regressions. Empty if there are none.
+    """
+    previous = {(result['bank'], result['rows'], result['stage']): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result['bank'], result['rows'], result['stage']))
+        if old is None:
+            continue
+        for metric, unit in (('seconds', 's'), ('peak_rss_mb', ' MB'), ('peak_mb', ' MB')):
+            if result.get(metric) is None or not old.get(metric):
+                continue
+            if result[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{result['bank']} {result['rows']:,} rows {result['stage']}: {metric} "
+                                   f"{old[metric]}{unit} -> {result[metric]}{unit} "
+                                   f"(+{(result[metric] / old[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SNS, RABO and ING conversion stages.")
+    parser.add_argument("--bank", action="append", choices=sorted(LAYOUTS), help="Bank (repeatable).")
+    parser.add_argument("--rows", type=int, action="append",
+                        help="Number of rows (repeatable, 1k to 10M). Default is 1k, 10k and 100k.")
+    parser.add_argument("--data-dir", default=os.path.join("benchmarks", "data"),
+                        help="Directory of the generated CSV files (reused between runs).")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results.json"), help="Results file.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%).")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip the tracemalloc pass (the peak RSS is always recorded).")
+    args = parser.parse_args()
+
+    results = []
+    for bank_name in args.bank or sorted(LAYOUTS):
+        for rows in args.rows or [1_000, 10_000, 100_000]:
+            csv_path = os.path.join(args.data_dir, bank_name, f"{rows}.csv")
+            if not os.path.exists(csv_path):
+                write_csv(bank_name, rows, csv_path)
+            # A fresh process per case, so the peak RSS of one case does not carry over to the next
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                case_results = executor.submit(run_case, bank_name, rows, csv_path, not args.no_memory).result()
+            for result in case_results:
+                results.append(result)
+                print(f"{bank_name:>5} {rows:>11,} {result['stage']:<28} {result['seconds']:>10.4f}s "
+                      f"{result['rows_per_second'] or 0:>13,} rows/s"
+                      + (f" {result['peak_rss_mb']:>8.1f} MB RSS" if result['peak_rss_mb'] is not None else "")
+                      + (f" {result['peak_mb']:>10.1f} MB" if result['peak_mb'] is not None else ""))
+
+    report = {
+        'meta': {'python': sys.version.split()[0], 'pandas': pd.__version__, 'platform': platform.platform(),
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults saved to '{args.output}'.")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline saved to '{args.baseline}'.")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file)['results'], args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) compared to '{args.baseline}':")
+            for regression in regressions:
+                print(f"  - {regression}")
+            raise SystemExit(1)
+        print(f"No regressions compared to '{args.baseline}'.")
+    else:
+        print(f"No baseline at '{args.baseline}' to compare against; save one with --save-baseline.")
+
+
+if __name__ == "__main__":
+    main()
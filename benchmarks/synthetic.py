@@ -0,0 +1,146 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from bank_spec import BANK_SPECS
+
+# Column headers and per-bank details of the synthetic exports. Column positions come from the bank specs.
+LAYOUTS = {
+    'sns': {
+        'headers': None,
+        'width': 18,
+        'date_format': '%d-%m-%Y',
+        'signed': True,
+        'amount_prefix': False,
+    },
+    'rabo': {
+        'headers': ['IBAN/BBAN', 'Munt', 'BIC', 'Volgnr', 'Datum', 'Rentedatum', 'Bedrag', 'Saldo na trn',
+                    'Tegenrekening IBAN/BBAN', 'Naam tegenpartij', 'Naam uiteindelijke partij',
+                    'Naam initiërende partij', 'BIC tegenpartij', 'Code', 'Batch ID', 'Transactiereferentie',
+                    'Machtigingskenmerk', 'Incassant ID', 'Betalingskenmerk', 'Omschrijving-1', 'Omschrijving-2',
+                    'Omschrijving-3', 'Reden retour', 'Oorspr bedrag', 'Oorspr munt', 'Koers'],
+        'width': 26,
+        'date_format': '%Y-%m-%d',
+        'signed': True,
+        'amount_prefix': True,
+    },
+    'ing': {
+        'headers': ['Date', 'Name / Description', 'Account', 'Counterparty', 'Code', 'Debit/credit',
+                    'Amount (EUR)', 'Transaction type', 'Notifications'],
+        'width': 9,
+        'date_format': '%Y%m%d',
+        'signed': False,
+        'amount_prefix': False,
+    },
+}
+
+COUNTERPARTIES = ['ALBERT HEIJN 1234', 'Albert Heijn 5678', 'JUMBO SUPERMARKT', 'NS GROEP', 'ENECO',
+                  'VERHUURDER BV', 'WERKGEVER BV', 'BELASTINGDIENST', 'ZILVEREN KRUIS', 'SPOTIFY',
+                  'BOL.COM', 'COOLBLUE', 'SHELL 0042', 'KRUIDVAT 7781', 'GEMEENTE UTRECHT']
+
+
+def _ibans(rng: np.random.Generator, size: int, bank_code: str = None) -> np.ndarray:
+    banks = np.array(['ABNA', 'RABO', 'INGB', 'SNSB', 'TRIO', 'KNAB'])
+    codes = np.full(size, bank_code) if bank_code else rng.choice(banks, size)
+    numbers = rng.integers(0, 10 ** 10, size)
+    checks = rng.integers(10, 100, size)
+    return np.char.add(np.char.add(np.char.add('NL', checks.astype(str)), codes.astype(str)),
+                       np.char.zfill(numbers.astype(str), 10))
+
+
+def generate_frame(bank_name: str, rows: int, seed: int = 0, missing_rate: float = 0.05) -> pd.DataFrame:
+    """
+    Generate synthetic transactions in the exact column layout of a bank export.
+
+    Parameters:
+        bank_name (str): Name of the bank ('sns', 'rabo' or 'ing').
+        rows (int): Number of transactions.
+        seed (int): Seed of the random generator. Default is 0.
+        missing_rate (float): Fraction of rows with a missing name and, independently, a missing IBAN.
+
+    Returns:
+        pd.DataFrame: The export, with the header of the bank (or integer columns if it has none).
+    """
+    spec = BANK_SPECS[bank_name]
+    layout = LAYOUTS[bank_name]
+    rng = np.random.default_rng(seed)
+    columns = {index: np.full(rows, '', dtype=object) for index in range(layout['width'])}
+
+    counterparty_ibans = _ibans(rng, len(COUNTERPARTIES))
+    picks = rng.integers(0, len(COUNTERPARTIES), rows)
+    names = np.array(COUNTERPARTIES, dtype=object)[picks]
+    ibans = counterparty_ibans[picks].astype(object)
+    names[rng.random(rows) < missing_rate] = ''
+    ibans[rng.random(rows) < missing_rate] = ''
+
+    dates = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 10 * 365, rows), unit='D')
+    cents = np.round(rng.lognormal(3.5, 1.2, rows) * 100).astype(np.int64)
+    debit = rng.random(rows) < 0.7
+    signed = np.where(debit, -cents, cents)
+    amounts = signed if layout['signed'] else cents
+    amount_text = pd.Series(amounts / 100).map('{:.2f}'.format).str.replace('.', spec.decimal, regex=False)
+    if layout['amount_prefix']:
+        amount_text = np.where(amounts >= 0, '+', '') + amount_text
+
+    descriptions = pd.Series(names).where(names != '', 'Betaalautomaat')
+    descriptions = (descriptions + '>' + pd.Series(rng.integers(1000, 9999, rows)).astype(str)
+                    + ' transactie ' + pd.Series(np.arange(rows)).astype(str))
+
+    columns[spec.columns['Date']] = dates.strftime(layout['date_format']).to_numpy()
+    columns[spec.columns['IBAN']] = ibans
+    columns[spec.columns['Name']] = names
+    columns[spec.columns['Amount']] = np.asarray(amount_text, dtype=object)
+    columns[spec.columns['Description']] = descriptions.to_numpy()
+    columns[spec.account_column] = np.full(rows, _ibans(rng, 1, bank_name.upper()[:4].ljust(4, 'B'))[0])
+    if spec.sign_column is not None:
+        columns[spec.sign_column] = np.where(debit, spec.debit_value, 'Credit')
+
+    df = pd.DataFrame(columns)
+    if layout['headers']:
+        df.columns = layout['headers']
+    return df
+
+
+def write_csv(bank_name: str, rows: int, path: str, seed: int = 0, chunk_rows: int = 500_000) -> str:
+    """
+    Write a synthetic export of a bank to a CSV file, in chunks so that 10M-row files fit in memory.
+
+    Parameters:
+        bank_name (str): Name of the bank ('sns', 'rabo' or 'ing').
+        rows (int): Number of transactions.
+        path (str): Path of the CSV file to write.
+        seed (int): Seed of the random generator. Default is 0.
+        chunk_rows (int): Number of rows generated at a time. Default is 500,000.
+
+    Returns:
+        str: The path of the written file.
+    """
+    spec = BANK_SPECS[bank_name]
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    with open(path, 'w', newline='', encoding=spec.encoding) as file:
+        for offset in range(0, rows, chunk_rows):
+            df = generate_frame(bank_name, min(chunk_rows, rows - offset), seed + offset)
+            df.to_csv(file, sep=spec.seperator, index=False, header=offset == 0 and spec.header is not None,
+                      quoting=1 if bank_name != 'sns' else 0)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic bank exports for benchmarking.")
+    parser.add_argument("--bank", action="append", choices=sorted(LAYOUTS), help="Bank (repeatable).")
+    parser.add_argument("--rows", type=int, action="append", help="Number of rows (repeatable).")
+    parser.add_argument("--out-dir", default=os.path.join("benchmarks", "data"), help="Output directory.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator.")
+    args = parser.parse_args()
+
+    for bank_name in args.bank or sorted(LAYOUTS):
+        for rows in args.rows or [1_000]:
+            path = write_csv(bank_name, rows, os.path.join(args.out_dir, bank_name, f"{rows}.csv"), args.seed)
+            print(f"Wrote {rows:,} {bank_name.upper()} rows to '{path}'.")
+
+
+if __name__ == "__main__":
+    main()
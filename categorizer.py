@@ -0,0 +1,205 @@
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+UNCATEGORIZED = 'Uncategorized'
+CATEGORY_COLUMNS = ['Category', 'Income', 'Expenses', 'Net', 'Transactions']
+
+# Patterns starting with this prefix are regular expressions; all other patterns are keywords
+REGEX_PREFIX = 're:'
+
+# Number of distinct strings remembered by a categorizer before its memo is cleared
+MEMO_LIMIT = 1_000_000
+
+DEFAULT_RULES = {
+    'Salary': ['salaris', 'salary', 'loon', 'werkgever'],
+    'Rent': ['huur', 'verhuurder', 'woningcorporatie', 're:\\brent\\b'],
+    'Groceries': ['albert heijn', 're:\\bah\\b', 'jumbo', 'lidl', 'aldi', 'plus supermarkt', 'dirk', 'ekoplaza',
+                  'picnic', 'supermarkt'],
+    'Utilities': ['eneco', 'vattenfall', 'essent', 'greenchoice', 'vitens', 'evides', 'ziggo', 'kpn', 'odido'],
+    'Insurance': ['zilveren kruis', 'menzis', 'vgz', 'centraal beheer', 'verzekering'],
+    'Taxes': ['belastingdienst', 'gemeente', 'waterschap'],
+    'Transport': ['ns groep', 're:\\bns\\b', 'ov-chipkaart', 'shell', 'esso', 'tango', 'tinq', 'parkeren'],
+    'Subscriptions': ['spotify', 'netflix', 'disney', 'videoland', 'apple.com'],
+    'Shopping': ['bol.com', 'coolblue', 'kruidvat', 'etos', 'hema', 'action', 'ikea', 'amazon', 'zalando'],
+    'Savings': ['spaarrekening', 'sparen', 'savings'],
+}
+
+
+def load_rules(path: str) -> dict:
+    """
+    Load categorization rules from a JSON file.
+
+    The file maps each category to a list of patterns, e.g. {"Groceries": ["albert heijn", "re:\\\\bah\\\\b"]}.
+
+    Parameters:
+        path (str): Path to the JSON file.
+
+    Returns:
+        dict: The rules, in file order.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+        ValueError: If the file is not a mapping of categories to lists of patterns.
+    """
+    with open(path, encoding='utf-8') as file:
+        rules = json.load(file)
+    if not isinstance(rules, dict) or not all(isinstance(patterns, list) for patterns in rules.values()):
+        raise ValueError(f"The rules in {path} must map each category to a list of patterns.")
+    return rules
+
+
+def _to_regex(pattern: str) -> str:
+    if pattern.startswith(REGEX_PREFIX):
+        return pattern[len(REGEX_PREFIX):]
+    # Keywords match whole words only, so 'ns' does not match 'transfer'
+    regex = re.escape(pattern)
+    if pattern[:1].isalnum():
+        regex = r'\b' + regex
+    if pattern[-1:].isalnum():
+        regex = regex + r'\b'
+    return regex
+
+
+class Categorizer:
+    """
+    Assigns a category (e.g., 'Groceries', 'Rent', 'Salary') to transactions with keyword and regex rules.
+
+    All rules are compiled once into a single case-insensitive regular expression with one named group
+    per rule, so each string is scanned once no matter how many rules there are. The first rule that
+    matches at the earliest position in the text wins; rules earlier in the rule set win ties.
+
+    Columns are categorized per distinct value: a month of transactions typically has a few hundred
+    distinct names and descriptions, and each of them is matched only once. Results are memoized across
+    calls, so the same description in the next file costs a dictionary lookup.
+
+    Attributes:
+        rules (dict): Maps each category to its patterns. Patterns are keywords (whole words, case-insensitive)
+                      or, with the 're:' prefix, regular expressions.
+        pattern (re.Pattern): The combined regular expression, or None if there are no rules.
+    """
+
+    def __init__(self, rules: dict = None):
+        """
+        Compile a rule set.
+
+        Parameters:
+            rules (dict): Maps each category to a list of patterns. Default is `DEFAULT_RULES`.
+
+        Raises:
+            ValueError: If a regex pattern is invalid.
+        """
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self._categories = {}
+        self._memo = {}
+
+        alternatives = []
+        for category, patterns in self.rules.items():
+            for pattern in patterns:
+                regex = _to_regex(pattern)
+                try:
+                    re.compile(regex)
+                except re.error as e:
+                    raise ValueError(f"Invalid pattern '{pattern}' for category '{category}': {e}") from e
+                group = f"rule{len(self._categories)}"
+                self._categories[group] = category
+                alternatives.append(f"(?P<{group}>{regex})")
+        self.pattern = re.compile('|'.join(alternatives), re.IGNORECASE) if alternatives else None
+
+    def match(self, text: str) -> str:
+        """
+        Categorize a single string.
+
+        Parameters:
+            text (str): A name or description.
+
+        Returns:
+            str: The category, or None if no rule matches.
+        """
+        if self.pattern is None or not isinstance(text, str):
+            return None
+        if text in self._memo:
+            return self._memo[text]
+
+        found = self.pattern.search(text)
+        category = self._categories[found.lastgroup] if found else None
+        if len(self._memo) >= MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[text] = category
+        return category
+
+    def categorize_values(self, values: pd.Series) -> pd.Series:
+        """
+        Categorize a column, matching each distinct value once.
+
+        Parameters:
+            values (pd.Series): A Name or Description column.
+
+        Returns:
+            pd.Series: The category of each row, or None where no rule matches.
+        """
+        codes, uniques = pd.factorize(values)
+        # Code -1 (a missing value) picks the trailing None
+        labels = np.array([self.match(value) for value in uniques] + [None], dtype=object)
+        return pd.Series(labels[codes], index=values.index)
+
+    def categorize(self, transactions: pd.DataFrame) -> pd.Series:
+        """
+        Categorize transactions by their name, falling back to their description.
+
+        Parameters:
+            transactions (pd.DataFrame): Transactions with 'Name' and 'Description' columns.
+
+        Returns:
+            pd.Series: The category of each transaction ('Uncategorized' if no rule matches), as a categorical.
+        """
+        category = self.categorize_values(transactions['Name'])
+        missing = category.isna()
+        if missing.any():
+            category[missing] = self.categorize_values(transactions.loc[missing, 'Description'])
+        return category.fillna(UNCATEGORIZED).astype('category')
+
+    def totals(self, transactions: pd.DataFrame) -> pd.DataFrame:
+        """
+        Sum the income, expenses and number of transactions per category.
+
+        Parameters:
+            transactions (pd.DataFrame): Transactions with 'Name', 'Description' and 'Amount' columns.
+
+        Returns:
+            pd.DataFrame: 'Income', 'Expenses' and 'Transactions' indexed by category. Totals of several
+                          chunks can be added with `DataFrame.add(..., fill_value=0)`.
+        """
+        amount = transactions['Amount']
+        totals = pd.DataFrame({
+            'Category': self.categorize(transactions),
+            'Income': amount.where(amount > 0, 0),
+            'Expenses': amount.where(amount < 0, 0),
+            'Transactions': 1,
+        }).groupby('Category', observed=True).sum()
+        totals.index = totals.index.astype(object)
+        return totals
+
+
+def category_table(totals: pd.DataFrame, scale: int = 1) -> pd.DataFrame:
+    """
+    Lay out category totals as the 'Categories' sheet, largest expenses first.
+
+    Parameters:
+        totals (pd.DataFrame): Totals per category, as returned by `Categorizer.totals`.
+        scale (int): Divisor that turns the summed amounts into the amounts of the table (e.g. 100 for cents).
+                     Default is 1.
+
+    Returns:
+        pd.DataFrame: DataFrame with the 'Category', 'Income', 'Expenses', 'Net' and 'Transactions' columns.
+    """
+    table = pd.DataFrame({
+        'Category': totals.index,
+        'Income': totals['Income'].to_numpy() / scale,
+        'Expenses': totals['Expenses'].to_numpy() / scale,
+        'Transactions': totals['Transactions'].to_numpy().astype('int64'),
+    })
+    table['Net'] = table['Income'] + table['Expenses']
+    return table.sort_values(['Expenses', 'Category'])[CATEGORY_COLUMNS].reset_index(drop=True)
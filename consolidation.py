@@ -0,0 +1,295 @@
+import argparse
+from collections import defaultdict, deque
+
+import pandas as pd
+
+from aggregation import group_amounts, income_expense_table
+from bank_base import CATEGORIES_SHEET, INCOME_EXPENSE_SHEET, TRANSACTIONS_SHEET
+from batch import BANKS, OUTPUT_FORMATS, create_reader
+from categorizer import Categorizer, category_table
+from counterparties import NameCanonicalizer
+from file_manager import FileManager
+from normalizer import ACCOUNT_COLUMN, CENTS, COLUMN_NAMES, UNKNOWN_IBAN
+from recurring import RECURRING_SHEET, recurring_table
+from writers import open_writer
+
+BANK_COLUMN = 'Bank'
+TRANSFER_COLUMN = 'Transfer'
+TRANSFERS_SHEET = 'Internal Transfers'
+CONSOLIDATED_DIR = 'consolidated'
+
+# Maximum number of days between the two legs of an internal transfer
+DEFAULT_WINDOW_DAYS = 3
+
+
+def _iban_key(iban: pd.Series) -> pd.Series:
+    # Compare IBANs without spaces and case differences ('nl01 rabo ...' == 'NL01RABO...')
+    return iban.astype(str).str.replace(' ', '', regex=False).str.upper()
+
+
+def match_transfers(transactions: pd.DataFrame, window_days: int = DEFAULT_WINDOW_DAYS) -> pd.Series:
+    """
+    Find transfers between own accounts: a debit on one own account and a credit of the same amount on
+    another own account, booked at most `window_days` apart.
+
+    The own accounts are the values of the 'Account' column. Only rows whose counterparty IBAN is one of
+    them are candidates. The credits are put in a hash index on (from account, to account, amount), with
+    the legs of each key in date order; every debit then looks up its key and takes the earliest credit
+    within the date window. Each leg is matched at most once, and sorting the candidates is the only
+    step that is not linear in the number of rows.
+
+    Parameters:
+        transactions (pd.DataFrame): Normalized transactions with an 'Account' column and amounts in cents.
+        window_days (int): Maximum number of days between the two legs. Default is `DEFAULT_WINDOW_DAYS`.
+
+    Returns:
+        pd.Series: Transfer number of every row (the same number for both legs), or <NA> for rows that are
+                   not an internal transfer. Aligned with `transactions`.
+    """
+    transfer = pd.Series(pd.NA, index=transactions.index, dtype='Int64', name=TRANSFER_COLUMN)
+    account = _iban_key(transactions[ACCOUNT_COLUMN])
+    iban = _iban_key(transactions['IBAN'])
+    known = transactions[ACCOUNT_COLUMN].notna() & (transactions[ACCOUNT_COLUMN] != UNKNOWN_IBAN)
+    own_accounts = set(account[known].unique())
+
+    candidates = (iban.isin(own_accounts) & (iban != account) & known & (transactions['Amount'] != 0)
+                  & transactions['Date'].notna())
+    if not candidates.any():
+        return transfer
+
+    legs = pd.DataFrame({'Account': account[candidates], 'IBAN': iban[candidates],
+                         'Amount': transactions.loc[candidates, 'Amount'],
+                         'Date': transactions.loc[candidates, 'Date']}).sort_values('Date', kind='stable')
+    credits = legs[legs['Amount'] > 0]
+    debits = legs[legs['Amount'] < 0]
+
+    # (from account, to account, amount) -> credits in date order
+    index = defaultdict(deque)
+    for label, source, target, amount, date in zip(credits.index, credits['IBAN'], credits['Account'],
+                                                   credits['Amount'], credits['Date']):
+        index[(source, target, amount)].append((date, label))
+
+    window = pd.Timedelta(days=window_days)
+    pairs = []
+    for label, source, target, amount, date in zip(debits.index, debits['Account'], debits['IBAN'],
+                                                   -debits['Amount'], debits['Date']):
+        matches = index.get((source, target, amount))
+        if not matches:
+            continue
+        # Debits come in date order, so credits that are too old for this debit are too old for the next
+        while matches and matches[0][0] < date - window:
+            matches.popleft()
+        if matches and matches[0][0] <= date + window:
+            pairs.append((label, matches.popleft()[1]))
+
+    if pairs:
+        debit_labels, credit_labels = zip(*pairs)
+        numbers = range(1, len(pairs) + 1)
+        transfer[list(debit_labels)] = list(numbers)
+        transfer[list(credit_labels)] = list(numbers)
+    return transfer
+
+
+class ConsolidatedLedger:
+    """
+    One normalized view of the transactions of several banks over a period, without the transfers
+    between own accounts.
+
+    Money moved from one own account to another shows up as an expense at one bank and as income at
+    the other. The consolidated report matches those pairs (see `match_transfers`) and leaves them out
+    of the 'Transactions' and 'Income & Expenses' sheets; they are listed on an 'Internal Transfers'
+    sheet instead.
+
+    Attributes:
+        banks (list): Names of the included banks.
+        year (int): The year of the period.
+        months (list): The included months, or None for every month on disk.
+        window_days (int): Maximum number of days between the two legs of a transfer.
+        transactions (pd.DataFrame): The loaded transactions of all banks (amounts in cents), with
+                                     'Bank', 'Account' and 'Transfer' columns. None until `load` is called.
+        errors (list): Files that could not be read, as 'bank/year/month: error' strings.
+        categorizer (Categorizer): Rules for the 'Categories' sheet. Default uses the default rules.
+        canonicalizer (NameCanonicalizer): Merges names of the same counterparty on the 'Income & Expenses'
+                                           sheet. Set it to None to group on the exact names.
+    """
+
+    def __init__(self, banks: list = None, year: int = None, months: list = None, base_dir: str = 'data',
+                 results_dir: str = 'results', window_days: int = DEFAULT_WINDOW_DAYS):
+        """
+        Parameters:
+            banks (list): Names of the banks to include. Default is all known banks.
+            year (int): The year of the period.
+            months (list): The months to include (e.g., ['january']). Default is None (all months on disk).
+            base_dir (str): Root directory for input files. Default is 'data'.
+            results_dir (str): Root directory for output files. Default is 'results'.
+            window_days (int): Maximum number of days between the two legs of a transfer. Default is 3.
+        """
+        self.banks = list(banks or BANKS)
+        self.year = year
+        self.months = months
+        self.base_dir = base_dir
+        self.results_dir = results_dir
+        self.window_days = window_days
+        self.transactions: pd.DataFrame = None
+        self.errors = []
+        self.categorizer = Categorizer()
+        self.canonicalizer = NameCanonicalizer()
+
+    def load(self) -> pd.DataFrame:
+        """
+        Load and normalize the files of every bank for the period into one frame, and mark the
+        internal transfers.
+
+        Returns:
+            pd.DataFrame: The transactions of all banks, with the standard columns, 'Bank', 'Account' and
+                          'Transfer'. Amounts are in cents.
+        """
+        frames = []
+        self.errors = []
+        for bank_name in self.banks:
+            file_manager = FileManager(bank_name, self.base_dir, self.results_dir)
+            months = file_manager.list_months(self.year)
+            if self.months is not None:
+                months = [month for month in months if month in self.months]
+            if not months:
+                continue
+
+            reader = create_reader(bank_name, file_manager)
+            for month in months:
+                try:
+                    reader.load_file(file_manager.get_file_path(self.year, month))
+                    normalized = reader.normalize()
+                except Exception as e:
+                    self.errors.append(f"{bank_name}/{self.year}/{month}: {type(e).__name__}: {e}")
+                    continue
+                frame = normalized[reader.column_names].copy(deep=False)
+                frame[BANK_COLUMN] = bank_name
+                frame[ACCOUNT_COLUMN] = (normalized[ACCOUNT_COLUMN] if ACCOUNT_COLUMN in normalized
+                                         else pd.Series(pd.NA, index=normalized.index, dtype=object))
+                frames.append(frame)
+
+        columns = [*COLUMN_NAMES, BANK_COLUMN, ACCOUNT_COLUMN]
+        transactions = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        for column in ['IBAN', 'Name', BANK_COLUMN, ACCOUNT_COLUMN]:
+            transactions[column] = transactions[column].astype('category')
+        transactions[TRANSFER_COLUMN] = match_transfers(transactions, self.window_days)
+        self.transactions = transactions
+        return transactions
+
+    def external(self) -> pd.DataFrame:
+        """
+        The loaded transactions without the internal transfers, amounts in euros.
+
+        Returns:
+            pd.DataFrame: The standard columns followed by 'Bank' and 'Account'.
+        """
+        return self._euros(self.transactions[self.transactions[TRANSFER_COLUMN].isna()])
+
+    def transfers(self) -> pd.DataFrame:
+        """
+        The matched internal transfers, both legs next to each other, amounts in euros.
+
+        Returns:
+            pd.DataFrame: The standard columns followed by 'Bank', 'Account' and 'Transfer'.
+        """
+        matched = self.transactions[self.transactions[TRANSFER_COLUMN].notna()]
+        return self._euros(matched.sort_values([TRANSFER_COLUMN, 'Amount']), [TRANSFER_COLUMN])
+
+    def income_expense_sheet(self) -> pd.DataFrame:
+        """
+        The income and expenses of all banks together, without the internal transfers.
+
+        Returns:
+            pd.DataFrame: DataFrame with income and expense details.
+        """
+        external = self.transactions[self.transactions[TRANSFER_COLUMN].isna()]
+        grouped = group_amounts(external)
+        if self.canonicalizer is not None:
+            grouped = self.canonicalizer.regroup(grouped)
+        return income_expense_table(grouped / CENTS)
+
+    def category_sheet(self) -> pd.DataFrame:
+        """
+        The income and expenses per category of all banks together, without the internal transfers.
+
+        Returns:
+            pd.DataFrame: DataFrame with the 'Category', 'Income', 'Expenses', 'Net' and 'Transactions' columns.
+        """
+        external = self.transactions[self.transactions[TRANSFER_COLUMN].isna()]
+        return category_table(self.categorizer.totals(external), scale=CENTS)
+
+    def recurring_sheet(self) -> pd.DataFrame:
+        """
+        The recurring payments and unusual amounts of all banks together, without the internal transfers.
+
+        Returns:
+            pd.DataFrame: DataFrame with one row per recurring counterparty and per anomaly (see
+                          `recurring.recurring_table`).
+        """
+        external = self.transactions[self.transactions[TRANSFER_COLUMN].isna()]
+        return recurring_table(external, self.canonicalizer)
+
+    def write(self, file_types: list = ('xlsx',)) -> dict:
+        """
+        Write the consolidated report to `results/consolidated/<year>/<period>.<format>`.
+
+        Parameters:
+            file_types (list): Output formats (e.g., ['xlsx', 'parquet']). Default is ['xlsx'].
+
+        Returns:
+            dict: Maps each format to the path it was written to.
+        """
+        if self.transactions is None:
+            self.load()
+
+        period = '_'.join(self.months) if self.months else 'full_year'
+        output_paths = FileManager(CONSOLIDATED_DIR, self.base_dir, self.results_dir).output_paths(
+            self.year, period, file_types)
+        sheets = {
+            TRANSACTIONS_SHEET: self.external(),
+            INCOME_EXPENSE_SHEET: self.income_expense_sheet(),
+            CATEGORIES_SHEET: self.category_sheet(),
+            RECURRING_SHEET: self.recurring_sheet(),
+            TRANSFERS_SHEET: self.transfers(),
+        }
+        for file_format, path in output_paths.items():
+            with open_writer(file_format, path) as writer:
+                for sheet, df in sheets.items():
+                    writer.append(sheet, df)
+        return output_paths
+
+    @staticmethod
+    def _euros(transactions: pd.DataFrame, extra_columns: list = ()) -> pd.DataFrame:
+        result = transactions[[*COLUMN_NAMES, BANK_COLUMN, ACCOUNT_COLUMN, *extra_columns]].copy(deep=False)
+        result['Amount'] = transactions['Amount'] / CENTS
+        return result.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Combine the banks of a period into one report without the "
+                                                 "transfers between own accounts.")
+    parser.add_argument("--year", required=True, type=int, help="Year of the period.")
+    parser.add_argument("--month", action="append", help="Month to include (repeatable). Default is all months.")
+    parser.add_argument("--bank", action="append", choices=BANKS, help="Bank to include (repeatable).")
+    parser.add_argument("--data-dir", default="data", help="Root directory for input files.")
+    parser.add_argument("--results-dir", default="results", help="Root directory for output files.")
+    parser.add_argument("--window-days", type=int, default=DEFAULT_WINDOW_DAYS,
+                        help="Maximum number of days between the two legs of a transfer.")
+    parser.add_argument("--format", action="append", choices=OUTPUT_FORMATS,
+                        help="Output format (repeatable). Default is xlsx.")
+    args = parser.parse_args()
+
+    ledger = ConsolidatedLedger(args.bank, args.year, args.month, args.data_dir, args.results_dir, args.window_days)
+    transactions = ledger.load()
+    paths = ledger.write(args.format or ["xlsx"])
+    transfers = transactions[TRANSFER_COLUMN].nunique()
+    print(f"Consolidated {len(transactions):,} transaction(s) of {transactions[BANK_COLUMN].nunique()} bank(s); "
+          f"{transfers:,} internal transfer(s) left out. Written to {', '.join(paths.values())}.")
+    for error in ledger.errors:
+        print(f"  - {error}")
+    if ledger.errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import difflib
+import json
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# File name of the persistent name table in the results folder
+NAMES_FILE = 'names.json'
+
+# Minimum similarity (0 to 1) of two name keys for fuzzy matching to treat them as the same counterparty
+DEFAULT_THRESHOLD = 0.9
+
+# Legal forms that do not tell counterparties apart ('Werkgever BV' and 'Werkgever B.V.' are the same)
+LEGAL_FORMS = {'bv', 'nv', 'vof', 'cv', 'gmbh', 'ltd', 'inc', 'sa', 'sarl', 'llc', 'plc'}
+
+# Tokens with a digit are store, branch or terminal numbers ('ALBERT HEIJN 1234', 'SHELL 05-123', 'AH#12')
+_NUMBERED_TOKEN = re.compile(r'\S*\d\S*')
+_PUNCTUATION = re.compile(r'[^\w\s]+')
+# Dots and apostrophes join the letters around them ('B.V.' is 'bv', "McDonald's" is 'mcdonalds')
+_JOINERS = re.compile(r"[.'’`]")
+
+
+def name_key(name: str) -> str:
+    """
+    Reduce a counterparty name to the key it is grouped on: case, accents, store numbers, punctuation and
+    legal forms are dropped and whitespace is collapsed.
+
+    Parameters:
+        name (str): A raw name, e.g. 'ALBERT HEIJN 1234' or 'Albert Heijn B.V.'.
+
+    Returns:
+        str: The key, e.g. 'albert heijn'. Empty if nothing but numbers and punctuation is left.
+    """
+    text = unicodedata.normalize('NFKD', name.casefold())
+    text = ''.join(character for character in text if not unicodedata.combining(character))
+    text = _JOINERS.sub('', text)
+    text = _NUMBERED_TOKEN.sub(' ', text)
+    words = _PUNCTUATION.sub(' ', text).split()
+    return ' '.join(word for word in words if word not in LEGAL_FORMS)
+
+
+def display_name(name: str) -> str:
+    """
+    Clean a raw name for display: store numbers are dropped and whitespace is collapsed, the case is kept.
+
+    Parameters:
+        name (str): A raw name, e.g. 'ALBERT HEIJN 1234'.
+
+    Returns:
+        str: The cleaned name, e.g. 'ALBERT HEIJN', or the stripped raw name if only numbers are left.
+    """
+    cleaned = ' '.join(_NUMBERED_TOKEN.sub(' ', name).split()).strip(' -,.;:/')
+    return cleaned or name.strip()
+
+
+def _key(name: str) -> str:
+    # Names that are only numbers or punctuation are grouped on themselves
+    return name_key(name) or name.strip().casefold()
+
+
+class NameCanonicalizer:
+    """
+    Maps raw counterparty names to canonical names, so that 'ALBERT HEIJN 1234' and 'Albert Heijn 5678'
+    are grouped as one counterparty.
+
+    Every raw name is reduced to a key (see `name_key`). The canonical name of a new key is its most frequent
+    cleaned spelling (see `display_name` and `learn`); once set, it stays the canonical name of every name
+    with that key. With `fuzzy`, a new key that is not known yet is matched against the known keys that start
+    with the same letters, and joins the most similar one if it is at least `threshold` alike (e.g. a typo).
+
+    Resolved names are remembered in a mapping table from raw name to canonical name, persisted as JSON at
+    `path`. Known names resolve with a dictionary lookup per distinct name; only names that were never seen
+    before pay for the key computation and the fuzzy matching. Edit the canonical names in the file to
+    rename or merge counterparties by hand.
+
+    Attributes:
+        path (str): Path of the JSON mapping table, or None to keep the table in memory only.
+        fuzzy (bool): Match new keys against similar known keys.
+        threshold (float): Minimum similarity (0 to 1) for a fuzzy match.
+        names (dict): Maps each raw name to its canonical name.
+        keys (dict): Maps each key to its canonical name.
+        learned (dict): The raw names added to the table since it was opened or saved, with their canonical names.
+    """
+
+    def __init__(self, path: str = None, fuzzy: bool = False, threshold: float = DEFAULT_THRESHOLD):
+        """
+        Open the mapping table at `path`, loading it if it exists.
+
+        Parameters:
+            path (str): Path of the JSON mapping table (e.g., 'results/names.json'). Default is None (in memory).
+            fuzzy (bool): Match new keys against similar known keys. Default is False.
+            threshold (float): Minimum similarity for a fuzzy match. Default is `DEFAULT_THRESHOLD`.
+
+        Raises:
+            ValueError: If the file is not a valid mapping table.
+        """
+        self.path = path
+        self.fuzzy = fuzzy
+        self.threshold = threshold
+        self.names = {}
+        self.keys = {}
+        self.learned = {}
+        self._blocks = None
+
+        if path is not None and os.path.exists(path):
+            self.names, self.keys = self._read(path)
+
+    @staticmethod
+    def _read(path: str) -> tuple:
+        with open(path, encoding='utf-8') as file:
+            table = json.load(file)
+        if not isinstance(table, dict) or not isinstance(table.get('names', {}), dict) \
+                or not isinstance(table.get('keys', {}), dict):
+            raise ValueError(f"The name table in {path} must have 'names' and 'keys' mappings.")
+        return table.get('names', {}), table.get('keys', {})
+
+    def resolve(self, name: str) -> str:
+        """
+        Return the canonical name of a raw name, adding it to the table if it is new.
+
+        Parameters:
+            name (str): A raw name.
+
+        Returns:
+            str: The canonical name.
+        """
+        if name not in self.names:
+            self.learn({name: 1})
+        return self.names[name]
+
+    def learn(self, counts: dict):
+        """
+        Add new raw names to the table.
+
+        The names are grouped on their key. A key that is not known yet (and, with `fuzzy`, is not similar
+        to a known key) gets the most frequent cleaned spelling of its names as canonical name, ties broken
+        alphabetically, so the canonical name does not depend on the order in which files or chunks are read.
+        Keys are matched in alphabetical order for the same reason.
+
+        Parameters:
+            counts (dict): Maps each new raw name to its number of occurrences (e.g. transactions).
+        """
+        spellings = {}
+        for name, count in counts.items():
+            if name not in self.names:
+                cleaned = spellings.setdefault(_key(name), {})
+                spelling = display_name(name)
+                cleaned[spelling] = cleaned.get(spelling, 0) + count
+
+        for key in sorted(spellings):
+            if key in self.keys:
+                continue
+            match = self._closest(key) if self.fuzzy else None
+            if match is not None:
+                self.keys[key] = self.keys[match]
+            else:
+                self.keys[key] = min(spellings[key].items(), key=lambda item: (-item[1], item[0]))[0]
+            if self._blocks is not None:
+                self._blocks.setdefault(key[:3], []).append(key)
+
+        for name in counts:
+            if name not in self.names:
+                self.names[name] = self.learned[name] = self.keys[_key(name)]
+
+    def _closest(self, key: str) -> str:
+        if self._blocks is None:
+            # Only keys with the same first letters are compared, so a match costs a handful of comparisons
+            self._blocks = {}
+            for known in self.keys:
+                self._blocks.setdefault(known[:3], []).append(known)
+        matches = difflib.get_close_matches(key, self._blocks.get(key[:3], []), n=1, cutoff=self.threshold)
+        return matches[0] if matches else None
+
+    def canonicalize_values(self, values: pd.Series) -> pd.Series:
+        """
+        Canonicalize a Name column. New distinct names are resolved once; all names are then looked up in
+        the table in one vectorized pass.
+
+        Parameters:
+            values (pd.Series): A Name column.
+
+        Returns:
+            pd.Series: The canonical name of each row (missing names stay missing).
+        """
+        codes, uniques = pd.factorize(values)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        new = {name: count for name, count in zip(uniques, counts.tolist()) if name not in self.names}
+        if new:
+            self.learn(new)
+        # Code -1 (a missing value) picks the trailing None
+        labels = np.append(pd.Index(uniques).map(self.names).to_numpy(dtype=object), None)
+        return pd.Series(labels[codes], index=values.index)
+
+    def regroup(self, grouped: pd.Series) -> pd.Series:
+        """
+        Merge totals indexed by (Name, IBAN) on the canonical names.
+
+        Only the distinct (Name, IBAN) pairs are canonicalized, not the transactions behind them.
+
+        Parameters:
+            grouped (pd.Series): Totals indexed by (Name, IBAN), as returned by `aggregation.group_amounts`.
+
+        Returns:
+            pd.Series: The totals indexed by (canonical Name, IBAN).
+        """
+        names = self.canonicalize_values(pd.Series(grouped.index.get_level_values(0).astype(object)))
+        index = pd.MultiIndex.from_arrays([names.to_numpy(), grouped.index.get_level_values(1).astype(object)],
+                                          names=grouped.index.names)
+        return pd.Series(grouped.to_numpy(), index=index).groupby(level=[0, 1], sort=False).sum()
+
+    def merge(self, names: list):
+        """
+        Add names resolved elsewhere (e.g. the `learned` names of worker processes). Names already in the
+        table keep their canonical name, and a name whose key is already known joins that counterparty. A new
+        key gets the canonical name most of its pairs agree on, ties broken alphabetically, so the result does
+        not depend on the order of the pairs.
+
+        Parameters:
+            names (list): (raw name, canonical name) pairs.
+        """
+        votes = {}
+        for name, canonical in names:
+            if name not in self.names:
+                key_votes = votes.setdefault(_key(name), {})
+                key_votes[canonical] = key_votes.get(canonical, 0) + 1
+        for key, key_votes in votes.items():
+            if key not in self.keys:
+                self.keys[key] = min(key_votes.items(), key=lambda item: (-item[1], item[0]))[0]
+        for name, _ in names:
+            if name not in self.names:
+                self.names[name] = self.learned[name] = self.keys[_key(name)]
+        self._blocks = None
+
+    def save(self):
+        """
+        Write the mapping table to `path`, if any. Entries written by another process in the meantime are
+        kept; for names in both, the file wins, so canonical names edited by hand are never overwritten.
+        The file is replaced atomically.
+        """
+        if self.path is None:
+            return
+        if os.path.exists(self.path):
+            names, keys = self._read(self.path)
+            self.names = {**self.names, **names}
+            self.keys = {**self.keys, **keys}
+            self._blocks = None
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'names': self.names, 'keys': self.keys}, file, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+        self.learned = {}
+
+    def report(self) -> str:
+        """
+        Summarize the table.
+
+        Returns:
+            str: E.g., '1,204 names -> 310 counterparties (12 new)'.
+        """
+        return (f"{len(self.names):,} names -> {len(set(self.names.values())):,} counterparties "
+                f"({len(self.learned):,} new)")
@@ -0,0 +1,402 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from batch import BANKS, OUTPUT_FORMATS, create_reader
+from counterparties import NameCanonicalizer
+from file_manager import FileManager
+from normalizer import CENTS
+from parse_cache import file_digest
+from writers import open_writer
+
+# File name of the cube in the results folder
+CUBE_FILE = 'cube.npz'
+ROLLUPS_DIR = 'rollups'
+
+CELL_COLUMNS = ['Source', 'Bank', 'Date', 'Name', 'IBAN', 'Sign', 'Amount', 'Count']
+SLICE_COLUMNS = ['Date', 'Name', 'IBAN', 'Sign', 'Amount', 'Count']
+CATEGORICAL_COLUMNS = ['Source', 'Bank', 'Name', 'IBAN']
+MEASURE_COLUMNS = ['Income', 'Expenses', 'Net', 'Transactions']
+
+# Rollup period -> sheet name
+PERIODS = {'week': 'Weekly', 'month': 'Monthly', 'quarter': 'Quarterly'}
+
+
+def period_labels(dates: pd.Series, period: str) -> pd.Series:
+    """
+    Label dates with the period they fall in: '2024-W05' (ISO week), '2024-01' (month) or '2024-Q1' (quarter).
+
+    Each distinct date is labelled once, so labelling millions of cells costs about as much as their number
+    of distinct days.
+
+    Parameters:
+        dates (pd.Series): Dates (datetime64).
+        period (str): 'week', 'month' or 'quarter'.
+
+    Returns:
+        pd.Series: The labels, or None for missing dates.
+
+    Raises:
+        ValueError: If the period is unknown.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period '{period}'. Choose one of: {', '.join(PERIODS)}.")
+    codes, uniques = pd.factorize(dates)
+    uniques = pd.DatetimeIndex(uniques)
+    if period == 'week':
+        labels = uniques.strftime('%G-W%V')
+    elif period == 'month':
+        labels = uniques.strftime('%Y-%m')
+    else:
+        labels = uniques.year.astype(str) + '-Q' + uniques.quarter.astype(str)
+    # Code -1 (a missing date) picks the trailing None
+    labels = np.append(np.asarray(labels, dtype=object), None)
+    return pd.Series(labels[codes], index=dates.index)
+
+
+def cube_cells(normalized: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate normalized transactions into cube cells: the sum and count of the amounts per day, counterparty
+    (Name, IBAN) and sign (1 for income, -1 for expenses, 0 for zero amounts).
+
+    Parameters:
+        normalized (pd.DataFrame): Normalized transactions, amounts in cents (see `BankBase.normalize`).
+
+    Returns:
+        pd.DataFrame: The 'Date', 'Name', 'IBAN', 'Sign', 'Amount' (cents) and 'Count' columns.
+    """
+    cells = pd.DataFrame({
+        'Date': normalized['Date'].dt.normalize(),
+        'Name': normalized['Name'],
+        'IBAN': normalized['IBAN'],
+        'Sign': np.sign(normalized['Amount'].to_numpy()).astype('int8'),
+        'Amount': normalized['Amount'].to_numpy(dtype='int64'),
+    })
+    grouped = cells.groupby(['Date', 'Name', 'IBAN', 'Sign'], observed=True, dropna=False)['Amount']
+    cells = grouped.agg(['sum', 'size']).reset_index().rename(columns={'sum': 'Amount', 'size': 'Count'})
+    for column in ('Name', 'IBAN'):
+        cells[column] = cells[column].astype(object)
+    cells['Count'] = cells['Count'].astype('int64')
+    return cells
+
+
+class AggregateCube:
+    """
+    Materialized aggregate of every processed transaction over (bank, day, counterparty, IBAN, sign), holding
+    the sum of the amounts (in cents) and the number of transactions.
+
+    The cube keeps the cells of each source file in a slice of their own, so processing a new or changed file
+    only replaces the slice of that file, at a cost that depends on the size of the file and not on the size
+    of the cube. Weekly, monthly and quarterly rollups are computed from the cells alone: a month of
+    transactions collapses into a few cells per counterparty, so rollups over years of history do not touch
+    the raw transactions again.
+
+    The cube is stored as a single `.npz` file (codes plus dictionaries for the text columns), which is
+    replaced atomically on `save`.
+
+    Attributes:
+        path (str): Path of the cube file.
+        slices (dict): Maps each (bank, source) pair to its cells, with the 'Date', 'Name', 'IBAN', 'Sign',
+                       'Amount' and 'Count' columns.
+        digests (dict): Maps each (bank, source) pair to the content hash of its input file.
+    """
+
+    def __init__(self, path: str = os.path.join('results', CUBE_FILE)):
+        """
+        Open the cube at `path`, loading it if it exists.
+
+        Parameters:
+            path (str): Path of the cube file. Default is 'results/cube.npz'.
+        """
+        self.path = path
+        self.slices = {}
+        self.digests = {}
+        self._cells = None
+
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as data:
+                sources = data['Source_values'].tolist()
+                source_codes = data['Source_codes']
+                columns = {}
+                for column in SLICE_COLUMNS:
+                    if column in CATEGORICAL_COLUMNS:
+                        # Code -1 (a missing value) picks the trailing None
+                        values = np.append(np.asarray(data[f'{column}_values'].tolist(), dtype=object), None)
+                        columns[column] = values[data[f'{column}_codes']]
+                    else:
+                        columns[column] = data[column]
+                self.digests = {(bank, source): digest for bank, source, digest in data['digests'].tolist()}
+
+            cells = pd.DataFrame(columns)
+            order = np.argsort(source_codes, kind='stable')
+            bounds = np.searchsorted(source_codes[order], np.arange(len(sources) + 1))
+            for code, key in enumerate(sources):
+                bank_name, source = key.split('/', 1)
+                rows = order[bounds[code]:bounds[code + 1]]
+                self.slices[(bank_name, source)] = cells.iloc[rows].reset_index(drop=True)
+
+    def __len__(self) -> int:
+        return sum(len(cells) for cells in self.slices.values())
+
+    @property
+    def cells(self) -> pd.DataFrame:
+        """
+        All cells, with the 'Source', 'Bank', 'Date', 'Name', 'IBAN', 'Sign', 'Amount' and 'Count' columns.
+        The slices are combined on first use after a change.
+        """
+        if self._cells is None:
+            keys = list(self.slices)
+            lengths = [len(self.slices[key]) for key in keys]
+            if keys:
+                cells = pd.concat([self.slices[key] for key in keys], ignore_index=True)
+            else:
+                cells = pd.DataFrame({
+                    'Date': pd.Series(dtype='datetime64[ns]'), 'Name': pd.Series(dtype=object),
+                    'IBAN': pd.Series(dtype=object), 'Sign': pd.Series(dtype='int8'),
+                    'Amount': pd.Series(dtype='int64'), 'Count': pd.Series(dtype='int64'),
+                })
+            banks = sorted({bank_name for bank_name, _ in keys})
+            cells['Source'] = pd.Categorical.from_codes(np.repeat(np.arange(len(keys)), lengths),
+                                                        [f"{bank_name}/{source}" for bank_name, source in keys])
+            cells['Bank'] = pd.Categorical.from_codes(
+                np.repeat([banks.index(bank_name) for bank_name, _ in keys], lengths).astype(int), banks)
+            for column in ('Name', 'IBAN'):
+                cells[column] = cells[column].astype('category')
+            self._cells = cells[CELL_COLUMNS]
+        return self._cells
+
+    def add(self, bank_name: str, source: str, cells: pd.DataFrame, digest: str = ''):
+        """
+        Store the cells of one source, replacing the slice it had before.
+
+        Parameters:
+            bank_name (str): Name of the bank.
+            source (str): Name of the source (e.g., '2024/january').
+            cells (pd.DataFrame): Cells of the source, as returned by `cube_cells`.
+            digest (str): Content hash of the input file, used by `update` to skip unchanged files.
+        """
+        self.slices[(bank_name, source)] = cells[SLICE_COLUMNS].reset_index(drop=True)
+        self.digests[(bank_name, source)] = digest
+        self._cells = None
+
+    def add_transactions(self, bank_name: str, source: str, normalized: pd.DataFrame, digest: str = ''):
+        """
+        Aggregate the normalized transactions of one source and store their cells (see `add`).
+
+        Parameters:
+            bank_name (str): Name of the bank.
+            source (str): Name of the source (e.g., '2024/january').
+            normalized (pd.DataFrame): Normalized transactions, amounts in cents.
+            digest (str): Content hash of the input file.
+        """
+        self.add(bank_name, source, cube_cells(normalized), digest)
+
+    def remove(self, bank_name: str, source: str):
+        """
+        Remove the cells of one source.
+        """
+        self.slices.pop((bank_name, source), None)
+        self.digests.pop((bank_name, source), None)
+        self._cells = None
+
+    def update(self, banks: list = None, years: list = None, base_dir: str = 'data',
+               results_dir: str = 'results') -> dict:
+        """
+        Add the cells of every new or changed input file and remove the files that were deleted.
+
+        Parameters:
+            banks (list): Bank names to include. Default is all known banks.
+            years (list): Years to include. Default is every year found on disk.
+            base_dir (str): Root directory for input files. Default is 'data'.
+            results_dir (str): Root directory for output files. Default is 'results'.
+
+        Returns:
+            dict: 'added', 'removed' and 'unchanged' source counts, and 'errors' (list of messages).
+        """
+        summary = {'added': 0, 'removed': 0, 'unchanged': 0, 'errors': []}
+        year_filter = {str(year) for year in years} if years else None
+        for bank_name in banks or BANKS:
+            file_manager = FileManager(bank_name, base_dir, results_dir)
+            reader = None
+            on_disk = set()
+            for year in file_manager.list_years():
+                if year_filter and year not in year_filter:
+                    continue
+                for month in file_manager.list_months(year):
+                    source = f"{year}/{month}"
+                    on_disk.add(source)
+                    file_path = file_manager.get_file_path(year, month)
+                    digest = file_digest(file_path)
+                    if self.digests.get((bank_name, source)) == digest:
+                        summary['unchanged'] += 1
+                        continue
+                    try:
+                        reader = reader or create_reader(bank_name, file_manager)
+                        reader.load_file(file_path)
+                        self.add_transactions(bank_name, source, reader.normalize(), digest)
+                        summary['added'] += 1
+                    except Exception as e:
+                        summary['errors'].append(f"{bank_name}/{source}: {type(e).__name__}: {e}")
+
+            stored = [source for bank, source in self.digests if bank == bank_name]
+            for source in stored:
+                if source not in on_disk and (not year_filter or source.split('/')[0] in year_filter):
+                    self.remove(bank_name, source)
+                    summary['removed'] += 1
+        return summary
+
+    def rollup(self, period: str = 'month', banks: list = None, start: str = None, end: str = None,
+               by_bank: bool = True, canonicalizer=None) -> pd.DataFrame:
+        """
+        Roll the cells up to income and expenses per period and counterparty.
+
+        Parameters:
+            period (str): 'week', 'month' or 'quarter'. Default is 'month'.
+            banks (list): Bank names to include. Default is every bank in the cube.
+            start (str): First date to include (e.g., '2024-01-01'). Default is None (no limit).
+            end (str): Last date to include. Default is None (no limit).
+            by_bank (bool): Keep the banks apart. Default is True. If False, a counterparty's totals are summed
+                            over all banks and the 'Bank' column is left out.
+            canonicalizer (NameCanonicalizer): Merges names of the same counterparty (see
+                                               `counterparties.NameCanonicalizer`). Default is None (exact names).
+
+        Returns:
+            pd.DataFrame: The 'Period', 'Bank', 'Name', 'IBAN', 'Income', 'Expenses', 'Net' (in euros) and
+                          'Transactions' columns, sorted by period and largest expenses first.
+        """
+        cells = self.cells
+        mask = np.ones(len(cells), dtype=bool)
+        if banks:
+            mask &= cells['Bank'].isin(banks).to_numpy()
+        if start is not None:
+            mask &= (cells['Date'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (cells['Date'] <= pd.Timestamp(end)).to_numpy()
+        cells = cells[mask]
+        names = cells['Name']
+        if canonicalizer is not None:
+            names = canonicalizer.canonicalize_values(names).astype('category')
+
+        keys = ['Period', 'Bank', 'Name', 'IBAN'] if by_bank else ['Period', 'Name', 'IBAN']
+        table = pd.DataFrame({
+            'Period': period_labels(cells['Date'], period).fillna('Unknown date'),
+            'Bank': cells['Bank'],
+            'Name': names,
+            'IBAN': cells['IBAN'],
+            'Income': cells['Amount'].where(cells['Sign'] > 0, 0),
+            'Expenses': cells['Amount'].where(cells['Sign'] < 0, 0),
+            'Transactions': cells['Count'],
+        }).groupby(keys, observed=True, dropna=False)[['Income', 'Expenses', 'Transactions']].sum().reset_index()
+
+        # Sum in exact cents, then convert to euros
+        table['Net'] = table['Income'] + table['Expenses']
+        for column in ('Income', 'Expenses', 'Net'):
+            table[column] = table[column] / CENTS
+        table = table.sort_values(['Period', 'Expenses', *keys[1:]])[keys + MEASURE_COLUMNS].reset_index(drop=True)
+        for column in keys:
+            table[column] = table[column].astype(object)
+        return table
+
+    def write(self, output_paths: dict, periods: list = tuple(PERIODS), **filters) -> dict:
+        """
+        Write one rollup sheet per period ('Weekly', 'Monthly', 'Quarterly') to one or more output formats.
+
+        Parameters:
+            output_paths (dict): Maps each output format ('xlsx', 'csv' or 'parquet') to its path.
+            periods (list): Periods to write. Default is every period.
+            **filters: Passed on to `rollup` (banks, start, end, by_bank, canonicalizer).
+
+        Returns:
+            dict: The output paths that were written.
+        """
+        sheets = {PERIODS[period]: self.rollup(period, **filters) for period in periods}
+        for file_format, path in output_paths.items():
+            with open_writer(file_format, path) as writer:
+                for sheet, df in sheets.items():
+                    writer.append(sheet, df)
+        return output_paths
+
+    def save(self):
+        """
+        Write the cube to `path`. The file is replaced atomically, so a crash never leaves a partial cube.
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        arrays = {}
+        for column in CELL_COLUMNS:
+            values = self.cells[column]
+            if column in CATEGORICAL_COLUMNS:
+                values = values.cat.remove_unused_categories()
+                arrays[f'{column}_codes'] = values.cat.codes.to_numpy()
+                arrays[f'{column}_values'] = np.array(values.cat.categories.astype(str), dtype=str)
+            else:
+                arrays[column] = values.to_numpy()
+        digests = [(bank, source, digest) for (bank, source), digest in self.digests.items()]
+        arrays['digests'] = np.array(digests, dtype=str).reshape(len(digests), 3)
+
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(temp_path, self.path)
+
+    def report(self) -> str:
+        """
+        Summarize the cube.
+
+        Returns:
+            str: E.g., '12,480 cells from 24 file(s) of 3 bank(s), 2023-01-02 to 2024-12-31'.
+        """
+        dates = self.cells['Date'].dropna()
+        span = f", {dates.min():%Y-%m-%d} to {dates.max():%Y-%m-%d}" if len(dates) else ''
+        banks = {bank for bank, _ in self.digests}
+        return f"{len(self):,} cells from {len(self.digests)} file(s) of {len(banks)} bank(s){span}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the aggregate cube and write period rollups from it.")
+    parser.add_argument("--results-dir", default="results", help="Root directory for output files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    update_parser = commands.add_parser("update", help="Add new or changed input files to the cube.")
+    update_parser.add_argument("--bank", action="append", choices=BANKS, help="Bank to include (repeatable).")
+    update_parser.add_argument("--year", action="append", help="Year to include (repeatable).")
+    update_parser.add_argument("--data-dir", default="data", help="Root directory for input files.")
+
+    report_parser = commands.add_parser("report", help="Write weekly, monthly and quarterly rollups.")
+    report_parser.add_argument("--period", action="append", choices=list(PERIODS),
+                               help="Period to write (repeatable). Default is all.")
+    report_parser.add_argument("--bank", action="append", choices=BANKS, help="Bank to include (repeatable).")
+    report_parser.add_argument("--start", help="First date to include (YYYY-MM-DD).")
+    report_parser.add_argument("--end", help="Last date to include (YYYY-MM-DD).")
+    report_parser.add_argument("--combine-banks", action="store_true",
+                               help="Sum each counterparty over all banks instead of per bank.")
+    report_parser.add_argument("--format", action="append", choices=OUTPUT_FORMATS,
+                               help="Output format (repeatable). Default is xlsx.")
+    report_parser.add_argument("--names", help="JSON table of canonical counterparty names (see counterparties.py).")
+    args = parser.parse_args()
+
+    cube = AggregateCube(os.path.join(args.results_dir, CUBE_FILE))
+    if args.command == "update":
+        summary = cube.update(args.bank, args.year, args.data_dir, args.results_dir)
+        cube.save()
+        print(f"Added {summary['added']}, removed {summary['removed']}, unchanged {summary['unchanged']} file(s). "
+              f"Cube: {cube.report()}.")
+        for error in summary['errors']:
+            print(f"  - {error}")
+        if summary['errors']:
+            raise SystemExit(1)
+    else:
+        output_dir = os.path.join(args.results_dir, ROLLUPS_DIR)
+        os.makedirs(output_dir, exist_ok=True)
+        output_paths = {file_format: os.path.join(output_dir, f"rollups.{file_format}")
+                        for file_format in args.format or ["xlsx"]}
+        canonicalizer = NameCanonicalizer(args.names)
+        cube.write(output_paths, args.period or list(PERIODS), banks=args.bank, start=args.start, end=args.end,
+                   by_bank=not args.combine_banks, canonicalizer=canonicalizer)
+        canonicalizer.save()
+        print(f"Wrote the rollups of {cube.report()} to {', '.join(output_paths.values())}.")
+
+
+if __name__ == "__main__":
+    main()
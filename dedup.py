@@ -0,0 +1,143 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+FINGERPRINT_COLUMNS = ['Date', 'IBAN', 'Amount', 'Name', 'Description']
+
+# File name of the fingerprint index in the results folder of a bank
+INDEX_FILE = '.fingerprints.npz'
+
+
+def fingerprint(normalized: pd.DataFrame) -> np.ndarray:
+    """
+    Compute a stable 64-bit fingerprint of every normalized transaction.
+
+    The fingerprint hashes the date, IBAN, amount, name and description, together with the number of
+    identical transactions earlier in the same frame. Two identical payments on one day (e.g., two
+    coffees) therefore get different fingerprints, while re-reading the same export gives the same ones.
+
+    Parameters:
+        normalized (pd.DataFrame): Normalized transactions (see `BankBase.normalize`).
+
+    Returns:
+        np.ndarray: The fingerprints (uint64), one per row.
+    """
+    rows = pd.util.hash_pandas_object(normalized[FINGERPRINT_COLUMNS], index=False).to_numpy()
+    occurrence = pd.Series(rows).groupby(rows).cumcount().to_numpy()
+    return pd.util.hash_pandas_object(pd.DataFrame({'row': rows, 'occurrence': occurrence}), index=False).to_numpy()
+
+
+class FingerprintIndex:
+    """
+    Persistent index of the transactions a bank has seen, used to drop transactions that overlapping
+    exports (a re-downloaded month, a custom date range) contain more than once.
+
+    The index is a sorted uint64 array of fingerprints with, in a parallel array, the source file each
+    fingerprint was first seen in. Lookups are a single vectorized binary search, and the index takes
+    12 bytes per transaction on disk (an `.npz` file).
+
+    Rows that were first seen in another source are duplicates. Reading a source again replaces its own
+    fingerprints, so re-converting a file (or converting a changed version of it) drops nothing.
+
+    Attributes:
+        path (str): Path of the index file.
+        fingerprints (np.ndarray): The sorted fingerprints.
+        owners (np.ndarray): Position in `sources` of the source of each fingerprint.
+        sources (list): The source names (input file paths).
+        dropped (dict): Number of duplicate rows dropped per source since the index was opened.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the index at `path`, loading it if it exists.
+
+        Parameters:
+            path (str): Path of the index file (e.g., 'results/sns/.fingerprints.npz').
+        """
+        self.path = path
+        self.fingerprints = np.empty(0, dtype=np.uint64)
+        self.owners = np.empty(0, dtype=np.uint32)
+        self.sources = []
+        self.dropped = {}
+
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as data:
+                self.fingerprints = data['fingerprints']
+                self.owners = data['owners']
+                self.sources = data['sources'].tolist()
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def duplicates(self, fingerprints: np.ndarray, source: str) -> np.ndarray:
+        """
+        Mark the fingerprints that were first seen in a source other than `source`.
+
+        Parameters:
+            fingerprints (np.ndarray): Fingerprints to look up (see `fingerprint`).
+            source (str): Name of the source the fingerprints come from.
+
+        Returns:
+            np.ndarray: Boolean mask, True for the duplicates.
+        """
+        if not len(self.fingerprints):
+            return np.zeros(len(fingerprints), dtype=bool)
+
+        positions = np.minimum(np.searchsorted(self.fingerprints, fingerprints), len(self.fingerprints) - 1)
+        found = self.fingerprints[positions] == fingerprints
+        owner = self.sources.index(source) if source in self.sources else -1
+        return found & (self.owners[positions] != owner)
+
+    def drop_duplicates(self, normalized: pd.DataFrame, source: str) -> pd.DataFrame:
+        """
+        Remove the transactions that were already seen in another source, and record the others as
+        seen in `source`. The index is saved right away.
+
+        Parameters:
+            normalized (pd.DataFrame): Normalized transactions of one source.
+            source (str): Name of the source (e.g., the path of the input file).
+
+        Returns:
+            pd.DataFrame: The transactions that were not seen before.
+        """
+        fingerprints = fingerprint(normalized)
+        duplicate = self.duplicates(fingerprints, source)
+        self._replace(source, fingerprints[~duplicate])
+        self.save()
+
+        self.dropped[source] = int(duplicate.sum())
+        return normalized[~duplicate] if duplicate.any() else normalized
+
+    def _replace(self, source: str, fingerprints: np.ndarray):
+        if source not in self.sources:
+            self.sources.append(source)
+        owner = self.sources.index(source)
+
+        keep = self.owners != owner
+        merged = np.concatenate([self.fingerprints[keep], fingerprints])
+        owners = np.concatenate([self.owners[keep], np.full(len(fingerprints), owner, dtype=np.uint32)])
+        order = np.argsort(merged, kind='stable')
+        self.fingerprints = merged[order]
+        self.owners = owners[order]
+
+    def save(self):
+        """
+        Write the index to `path`. The file is replaced atomically, so a crash never leaves a partial index.
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'wb') as file:
+            np.savez(file, fingerprints=self.fingerprints, owners=self.owners,
+                     sources=np.array(self.sources, dtype=str))
+        os.replace(temp_path, self.path)
+
+    def report(self) -> str:
+        """
+        Summarize the index and the rows dropped since it was opened.
+
+        Returns:
+            str: E.g., '120 duplicate row(s) dropped; 5,320 fingerprints from 14 file(s)'.
+        """
+        return (f"{sum(self.dropped.values()):,} duplicate row(s) dropped; "
+                f"{len(self):,} fingerprints from {len(self.sources)} file(s)")
@@ -0,0 +1,320 @@
+import argparse
+import codecs
+import csv
+import io
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from bank_spec import BANK_SPECS, BankSpec
+
+# Number of bytes read from the start of a file to detect its format
+SAMPLE_BYTES = 64 * 1024
+# Maximum number of rows of the sample that are inspected
+SAMPLE_ROWS = 50
+# Candidate delimiters, in order of preference when two delimiters fit equally well
+SEPARATORS = (';', ',', '\t', '|')
+# Minimum share of the checks a bank spec must pass to be chosen
+MIN_SCORE = 0.8
+
+IBAN_PATTERN = re.compile(r'^[A-Z]{2}\d{2}[A-Z0-9]{4,30}$')
+AMOUNT_PATTERN = re.compile(r'^[+-]?(\d{1,3}([.,]\d{3})+|\d+)([.,]\d{1,2})?$')
+
+
+@dataclass(frozen=True)
+class FormatGuess:
+    """
+    The detected format of a bank export.
+
+    Attributes:
+        bank (str): Name of the bank whose spec fits the file best (e.g., 'rabo').
+        seperator (str): Delimiter of the file.
+        decimal (str): Decimal separator of the amounts.
+        encoding (str): Character encoding of the file.
+        header (int): Row number of the column names, or None if the file has no header.
+        score (float): Share of the checks on the sample rows that the bank spec passed (0 to 1).
+    """
+    bank: str
+    seperator: str
+    decimal: str
+    encoding: str
+    header: Optional[int]
+    score: float
+
+    def apply(self, reader):
+        """
+        Use the detected parse settings for a reader.
+
+        Parameters:
+            reader (BankBase): The reader to update.
+        """
+        reader.seperator = self.seperator
+        reader.decimal = self.decimal
+        reader.encoding = self.encoding
+        reader.header = self.header
+
+    def describe(self) -> str:
+        """
+        Summarize the guess on one line.
+
+        Returns:
+            str: E.g. "rabo (separator ',', decimal ',', encoding cp1252, header row 0, score 1.00)".
+        """
+        header = 'no header' if self.header is None else f"header row {self.header}"
+        return (f"{self.bank} (separator {self.seperator!r}, decimal {self.decimal!r}, encoding {self.encoding}, "
+                f"{header}, score {self.score:.2f})")
+
+
+def read_sample(file_path: str, sample_bytes: int = SAMPLE_BYTES) -> bytes:
+    """
+    Read the first bytes of a file.
+
+    Parameters:
+        file_path (str): Path to the file.
+        sample_bytes (int): Maximum number of bytes to read. Default is `SAMPLE_BYTES`.
+
+    Returns:
+        bytes: The start of the file.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+    """
+    with open(file_path, 'rb') as file:
+        return file.read(sample_bytes)
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Detect the character encoding of a sample.
+
+    Parameters:
+        sample (bytes): The start of a file.
+
+    Returns:
+        str: 'utf-8-sig' or 'utf-16' if the sample starts with a byte order mark, 'utf-8' if it decodes as
+             UTF-8, and 'cp1252' (the Windows encoding of most bank exports) otherwise.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A sample may end in the middle of a multi-byte character
+        if e.reason != 'unexpected end of data':
+            return 'cp1252'
+    return 'utf-8'
+
+
+def parse_rows(text: str, separator: str, truncated: bool = False) -> list:
+    """
+    Parse the first rows of a CSV sample. Quoted fields may contain delimiters and line breaks.
+
+    Parameters:
+        text (str): The decoded start of a CSV file.
+        separator (str): The delimiter.
+        truncated (bool): Whether the sample stops before the end of the file, so its last row may be cut off.
+                          Default is False.
+
+    Returns:
+        list: Up to `SAMPLE_ROWS` + 1 non-empty rows (lists of strings).
+    """
+    rows = []
+    try:
+        for row in csv.reader(io.StringIO(text, newline=''), delimiter=separator):
+            rows.append(row)
+            if len(rows) > SAMPLE_ROWS + 1:
+                break
+    except csv.Error:
+        # Not valid CSV with this delimiter; judge it on the rows parsed so far
+        pass
+    if (truncated or len(rows) > SAMPLE_ROWS + 1) and len(rows) > 1:
+        rows = rows[:-1]
+    return [row for row in rows if any(field.strip() for field in row)]
+
+
+def detect_separator(text: str, truncated: bool = False) -> str:
+    """
+    Detect the delimiter of a CSV sample: the candidate that splits the most rows into the same, largest
+    number of fields.
+
+    Parameters:
+        text (str): The decoded start of a CSV file.
+        truncated (bool): Whether the sample stops before the end of the file. Default is False.
+
+    Returns:
+        str: The delimiter.
+
+    Raises:
+        ValueError: If no candidate splits the rows into more than one field.
+    """
+    best, best_key = None, None
+    for separator in SEPARATORS:
+        widths = Counter(len(row) for row in parse_rows(text, separator, truncated))
+        width, count = widths.most_common(1)[0] if widths else (0, 0)
+        if width < 2:
+            continue
+        key = (count, width)
+        if best_key is None or key > best_key:
+            best, best_key = separator, key
+    if best is None:
+        raise ValueError("Could not detect the delimiter of the file.")
+    return best
+
+
+def detect_decimal(values: list, default: str = ',') -> str:
+    """
+    Detect the decimal separator of amounts such as '-1.234,56' or '1,234.56'.
+
+    Parameters:
+        values (list): Amounts as text.
+        default (str): Decimal separator to use if no amount has decimals. Default is ','.
+
+    Returns:
+        str: ',' or '.'.
+    """
+    votes = Counter()
+    for value in values:
+        found = re.search(r'([.,])\d{1,2}$', value.strip())
+        if found:
+            votes[found.group(1)] += 1
+    return votes.most_common(1)[0][0] if votes else default
+
+
+def _is_date(value: str, date_format: str) -> bool:
+    try:
+        if date_format is None:
+            datetime.fromisoformat(value.strip())
+        else:
+            datetime.strptime(value.strip(), date_format)
+        return True
+    except ValueError:
+        return False
+
+
+def score_spec(spec: BankSpec, rows: list) -> tuple:
+    """
+    Check how well sample rows fit a bank spec.
+
+    Every data row is checked for a date in the spec's format, an amount in the Amount column and, if the
+    spec has an account column, an IBAN in that column. A first row that fails the date check while the
+    other rows pass is taken as the header.
+
+    Parameters:
+        spec (BankSpec): The bank format to check.
+        rows (list): Parsed sample rows (lists of strings).
+
+    Returns:
+        tuple: (score, header): the share of passed checks (0 if the rows are too narrow for the spec) and
+               the detected header row (0 or None).
+    """
+    widths = Counter(len(row) for row in rows)
+    if not widths or widths.most_common(1)[0][0] <= max(spec.usecols):
+        return 0.0, None
+
+    date_column = spec.columns['Date']
+    header = None
+    if len(rows) > 1 and not (len(rows[0]) > date_column and _is_date(rows[0][date_column], spec.date_format)):
+        header = 0
+    data = [row for row in rows[0 if header is None else 1:] if len(row) > max(spec.usecols)]
+    if not data:
+        return 0.0, header
+
+    passed = checks = 0
+    for row in data:
+        results = [
+            _is_date(row[date_column], spec.date_format),
+            bool(AMOUNT_PATTERN.match(row[spec.columns['Amount']].strip())),
+        ]
+        if spec.account_column is not None:
+            results.append(bool(IBAN_PATTERN.match(row[spec.account_column].strip().replace(' ', ''))))
+        passed += sum(results)
+        checks += len(results)
+    return passed / checks, header
+
+
+def detect_format(file_path: str, specs: dict = None, sample_bytes: int = SAMPLE_BYTES) -> FormatGuess:
+    """
+    Detect the bank, delimiter, decimal separator, encoding and header row of a CSV export from its
+    first `sample_bytes` bytes.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        specs (dict): Candidate bank specs by name. Default is `BANK_SPECS`.
+        sample_bytes (int): Number of bytes to inspect. Default is `SAMPLE_BYTES`.
+
+    Returns:
+        FormatGuess: The best matching bank and its parse settings.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+        ValueError: If the file is empty or no bank spec fits the file.
+    """
+    sample = read_sample(file_path, sample_bytes)
+    encoding = detect_encoding(sample)
+    text = sample.decode(encoding, errors='ignore')
+    if not text.strip():
+        raise ValueError(f"The file at {file_path} is empty or invalid.")
+
+    truncated = len(sample) == sample_bytes
+    seperator = detect_separator(text, truncated)
+    rows = parse_rows(text, seperator, truncated)
+
+    best = None
+    for name, spec in (specs or BANK_SPECS).items():
+        score, header = score_spec(spec, rows)
+        if best is None or score > best[1]:
+            best = (spec, score, header)
+    spec, score, header = best
+    if score < MIN_SCORE:
+        raise ValueError(f"Could not detect the bank of {file_path}: no bank format fits the file "
+                         f"(best match '{spec.name}', score {score:.2f}).")
+
+    amounts = [row[spec.columns['Amount']] for row in rows[0 if header is None else 1:]
+               if len(row) > spec.columns['Amount']]
+    return FormatGuess(spec.name, seperator, detect_decimal(amounts, spec.decimal), encoding, header, score)
+
+
+def create_detected_reader(file_path: str, base_dir: str = "data", results_dir: str = "results"):
+    """
+    Detect the format of a CSV export and create the reader of its bank, using the detected parse settings.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        base_dir (str): Root directory for input files. Default is 'data'.
+        results_dir (str): Root directory for output files. Default is 'results'.
+
+    Returns:
+        tuple: (reader, guess): the `BankBase` reader and the `FormatGuess`.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+        ValueError: If no bank spec fits the file.
+    """
+    from batch import create_reader
+    from file_manager import FileManager
+
+    guess = detect_format(file_path)
+    reader = create_reader(guess.bank, FileManager(guess.bank, base_dir, results_dir))
+    guess.apply(reader)
+    return reader, guess
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect the bank and parse settings of CSV exports.")
+    parser.add_argument("files", nargs="+", help="CSV files to inspect.")
+    parser.add_argument("--sample-bytes", type=int, default=SAMPLE_BYTES, help="Number of bytes to inspect.")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        try:
+            print(f"{file_path}: {detect_format(file_path, sample_bytes=args.sample_bytes).describe()}")
+        except Exception as e:
+            print(f"{file_path}: {e}")
+
+
+if __name__ == "__main__":
+    main()
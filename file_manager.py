@@ -1,5 +1,27 @@
 import os
 
+# Month names of the input files, in calendar order
+MONTHS = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october',
+          'november', 'december']
+
+
+def month_sort_key(month: str) -> tuple:
+    """
+    Sort key that puts months in calendar order.
+
+    Parameters:
+        month (str): A month name (e.g., 'January' or 'january') or number (e.g., '01').
+
+    Returns:
+        tuple: (calendar index, name). Names that are not a month sort after the months, alphabetically.
+    """
+    name = month.lower()
+    if name in MONTHS:
+        return MONTHS.index(name), name
+    if name.isdigit() and 1 <= int(name) <= len(MONTHS):
+        return int(name) - 1, name
+    return len(MONTHS), name
+
 
 class FileManager:
     """
@@ -47,7 +69,7 @@ class FileManager:
         except ValueError as e:
             raise ValueError("Invalid input for year. Please enter a valid number.") from e
 
-    def write_new_file(self, year: int, output: str) -> str:
+    def write_new_file(self, year: int, output: str, file_type: str = None) -> str:
         """
         Construct the path to save a new file in the results directory.
 
@@ -55,13 +77,100 @@ class FileManager:
 
         Parameters:
             year (int): The year to organize output files under (e.g., 2024).
-            output (str): The name of the output file (including its extension).
+            output (str): The name of the output file (including its extension, unless `file_type` is given).
+            file_type (str): File extension/type to append to `output` (e.g., 'xlsx'). Default is None.
 
         Returns:
             str: The full path where the output file will be saved.
         """
         file_path = os.path.join(self.results_dir, str(year))
         if not os.path.exists(file_path):
-            os.makedirs(file_path)
+            os.makedirs(file_path, exist_ok=True)
 
+        if file_type is not None:
+            output = f"{output}.{file_type}"
         return os.path.join(file_path, output)
+
+    def output_paths(self, year: int, output: str, file_types: list = ("xlsx",)) -> dict:
+        """
+        Construct the paths to save an output in one or more formats.
+
+        Parameters:
+            year (int): The year to organize output files under (e.g., 2024).
+            output (str): The name of the output file without extension (e.g., 'january').
+            file_types (list): Output formats (e.g., ['xlsx', 'parquet']). Default is ['xlsx'].
+
+        Returns:
+            dict: Maps each format to the full path where it will be saved.
+        """
+        return {file_type: self.write_new_file(year, output, file_type) for file_type in file_types}
+
+    def list_years(self) -> list:
+        """
+        List the years that have an input folder for this bank.
+
+        Returns:
+            list: Sorted year folder names (e.g., ['2023', '2024']). Empty if the bank folder is missing.
+        """
+        if not os.path.isdir(self.base_dir):
+            return []
+
+        return sorted(
+            entry for entry in os.listdir(self.base_dir)
+            if os.path.isdir(os.path.join(self.base_dir, entry))
+        )
+
+    def list_months(self, year: int, file_type: str = "csv") -> list:
+        """
+        List the months available as input files for the given year.
+
+        Parameters:
+            year (int): Year folder to look in (e.g., 2024).
+            file_type (str): File extension/type to match (default is 'csv').
+
+        Returns:
+            list: Month names without extension, in calendar order (e.g., ['january', 'february']).
+        """
+        year_dir = os.path.join(self.base_dir, str(year))
+        if not os.path.isdir(year_dir):
+            return []
+
+        suffix = f".{file_type}"
+        return sorted(
+            (entry[:-len(suffix)] for entry in os.listdir(year_dir)
+             if entry.endswith(suffix) and os.path.isfile(os.path.join(year_dir, entry))),
+            key=month_sort_key
+        )
+
+    def output_status(self, year: int, month: str, file_types: list = ("xlsx",)) -> str:
+        """
+        Check whether an input file has been converted, without creating any folders.
+
+        Formats that store one file per sheet (csv, parquet) count as written when their sheet files
+        (e.g., 'january_transactions.csv') exist.
+
+        Parameters:
+            year (int): Year of the input file (e.g., 2024).
+            month (str): Month of the input file (e.g., 'january').
+            file_types (list): Output formats to check. Default is ['xlsx'].
+
+        Returns:
+            str: 'converted' if every output exists and is newer than the input file, 'outdated' if the
+                 input file changed after an output was written, and 'missing' if an output does not exist.
+        """
+        input_mtime = os.stat(os.path.join(self.base_dir, str(year), f"{month}.csv")).st_mtime_ns
+        output_dir = os.path.join(self.results_dir, str(year))
+        outputs = os.listdir(output_dir) if os.path.isdir(output_dir) else []
+
+        status = "converted"
+        for file_type in file_types:
+            suffix = f".{file_type}"
+            if f"{month}{suffix}" in outputs:
+                names = [f"{month}{suffix}"]
+            else:
+                names = [name for name in outputs if name.startswith(f"{month}_") and name.endswith(suffix)]
+            if not names:
+                return "missing"
+            if min(os.stat(os.path.join(output_dir, name)).st_mtime_ns for name in names) < input_mtime:
+                status = "outdated"
+        return status
@@ -0,0 +1,123 @@
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class NullMetrics:
+    """
+    Metrics recorder that records nothing. Used when instrumentation is off, so a stage costs one
+    method call and an empty `with` block.
+    """
+    enabled = False
+
+    def __init__(self):
+        self.context = {}
+        self.records = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None):
+        yield {}
+
+
+NULL_METRICS = NullMetrics()
+
+
+class Metrics(NullMetrics):
+    """
+    Records the wall time, rows in and out, rows per second and peak memory of each conversion stage.
+
+    Use `stage` as a context manager around the work of a stage and set `rows_out` on the yielded
+    record. Records are kept in `records` and, if a stream is given, written to it as JSON lines.
+
+    Attributes:
+        stream: Text stream to write JSON lines to (e.g., an open file or `sys.stderr`). Default is None.
+        track_memory (bool): Measure the peak memory of each stage with tracemalloc (slows pandas down).
+        profile (str): Name of a stage to profile with cProfile, or 'hot' to keep the profile of the slowest
+                       stage. Default is None (no profiling).
+        profile_dir (str): Directory for the '.prof' dumps.
+        context (dict): Extra fields added to every record (e.g., bank and file).
+        records (list): The recorded stages.
+    """
+    enabled = True
+
+    def __init__(self, stream=None, track_memory: bool = True, profile: str = None, profile_dir: str = '.'):
+        """
+        Parameters:
+            stream: Text stream to write JSON lines to. Default is None (only keep `records`).
+            track_memory (bool): Measure the peak memory of each stage. Default is True.
+            profile (str): Stage to profile with cProfile, or 'hot' for the slowest stage. Default is None.
+            profile_dir (str): Directory for the '.prof' dumps. Default is the working directory.
+        """
+        super().__init__()
+        self.stream = stream
+        self.track_memory = track_memory
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self._hot_seconds = 0.0
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None):
+        """
+        Measure one stage.
+
+        Parameters:
+            name (str): Name of the stage (e.g., 'load', 'fill', 'sign', 'transactions', 'grouping', 'write').
+            rows_in (int): Number of input rows. Default is None.
+
+        Yields:
+            dict: The record of the stage. Set its 'rows_out' key to report the number of output rows.
+        """
+        record = {**self.context, 'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        profiler = cProfile.Profile() if self.profile in (name, 'hot') else None
+        tracing = self.track_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            if tracing:
+                record['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+                tracemalloc.stop()
+
+            rows = record['rows_out'] if record['rows_out'] is not None else rows_in
+            record['seconds'] = round(seconds, 6)
+            record['rows_per_second'] = round(rows / seconds) if rows is not None and seconds > 0 else None
+            self._finish(record, profiler, seconds)
+
+    def _finish(self, record: dict, profiler: cProfile.Profile, seconds: float):
+        if profiler is not None and (self.profile != 'hot' or seconds >= self._hot_seconds):
+            self._hot_seconds = seconds
+            file_name = 'hot.prof' if self.profile == 'hot' else f"{record['stage']}.prof"
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_dir, file_name))
+            record['profile'] = os.path.join(self.profile_dir, file_name)
+
+        self.records.append(record)
+        if self.stream is not None:
+            self.stream.write(json.dumps(record, default=str) + '\n')
+            self.stream.flush()
+
+    def summary(self) -> dict:
+        """
+        Total the recorded seconds per stage.
+
+        Returns:
+            dict: Maps each stage name to its total wall time in seconds.
+        """
+        totals = {}
+        for record in self.records:
+            totals[record['stage']] = totals.get(record['stage'], 0.0) + record['seconds']
+        return totals
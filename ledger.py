@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from aggregation import GROUP_COLUMNS, group_amounts, income_expense_table
+from bank_base import INCOME_EXPENSE_SHEET, TRANSACTIONS_SHEET
+from batch import BANKS, OUTPUT_FORMATS, create_reader
+from counterparties import NameCanonicalizer
+from file_manager import FileManager, month_sort_key
+from normalizer import CENTS, to_euros
+from parse_cache import file_digest
+from writers import open_writer
+
+LEDGER_DIR = '.ledger'
+LEDGER_OUTPUT = 'year_to_date'
+
+
+class YearLedger:
+    """
+    Persistent year-to-date ledger of one bank.
+
+    The ledger keeps a manifest of the monthly CSV files it has ingested (with their content hash),
+    the normalized transactions of each month and the running per-(Name, IBAN) totals of the year.
+    Amounts are stored and summed as exact integer cents, so adding and removing months never drifts;
+    they are only converted to euros when the workbook is written.
+    `update` only parses months that are new or changed since the last run, so keeping the yearly
+    view up to date costs O(new month) instead of O(year). The yearly workbook is then written from
+    the stored state, without touching the CSV files again.
+
+    Attributes:
+        reader (BankBase): Reader of the bank, used to parse new months.
+        year (int): The year of the ledger.
+        ledger_dir (str): Directory holding the ledger state (`results/<bank>/<year>/.ledger`).
+        manifest (dict): Maps each ingested month to its content hash and number of transactions.
+        totals (pd.Series): Total amount in cents (int64) per (Name, IBAN) over all ingested months.
+    """
+
+    def __init__(self, reader, year: int):
+        """
+        Open the ledger of a bank and year, loading its stored state if there is any.
+
+        Parameters:
+            reader (BankBase): Reader of the bank (its FileManager determines the input and output folders).
+            year (int): The year of the ledger.
+        """
+        self.reader = reader
+        self.year = year
+        self.ledger_dir = reader.file_manager.write_new_file(year, LEDGER_DIR)
+        self.manifest = {}
+        self.totals = pd.Series(dtype='int64', index=pd.MultiIndex.from_arrays([[], []], names=GROUP_COLUMNS))
+
+        if os.path.exists(self._path('manifest.json')):
+            with open(self._path('manifest.json'), encoding='utf-8') as file:
+                manifest = json.load(file)
+            totals = pd.read_pickle(self._path('totals.pkl'))
+            if pd.api.types.is_integer_dtype(totals):
+                self.manifest, self.totals = manifest, totals
+            else:
+                # A ledger from before the totals were kept in cents: ingest every month again
+                for month in manifest:
+                    if os.path.exists(self._path(f"{month}.pkl")):
+                        os.remove(self._path(f"{month}.pkl"))
+
+    def update(self) -> list:
+        """
+        Ingest the months that are new or changed on disk, and drop the months that were removed.
+
+        Only the affected months are parsed; their totals are added to (or subtracted from) the
+        running totals of the year.
+
+        Returns:
+            list: The months that were ingested or removed.
+
+        Raises:
+            ValueError: If a new month cannot be read. The months ingested before it are kept.
+        """
+        file_manager = self.reader.file_manager
+        on_disk = file_manager.list_months(self.year)
+        changed = []
+
+        for month in [month for month in self.manifest if month not in on_disk]:
+            self._remove_month(month)
+            changed.append(month)
+
+        for month in on_disk:
+            file_path = file_manager.get_file_path(self.year, month)
+            digest = file_digest(file_path)
+            if self.manifest.get(month, {}).get('digest') == digest:
+                continue
+
+            self.reader.load_file(file_path)
+            try:
+                normalized = self.reader.normalize()
+            except Exception as e:
+                raise ValueError(f"Could not read the transactions of {file_path}: {e}") from e
+            if normalized.empty:
+                raise ValueError(f"Could not read the transactions of {file_path}.")
+            if month in self.manifest:
+                self._remove_month(month)
+
+            normalized.to_pickle(self._path(f"{month}.pkl"))
+            self.totals = self.totals.add(group_amounts(normalized), fill_value=0).astype('int64')
+            self.manifest[month] = {'digest': digest, 'rows': len(normalized)}
+            self._save()
+            changed.append(month)
+
+        self._save()
+        return changed
+
+    def transactions(self):
+        """
+        Yield the stored transactions of each ingested month, in calendar order.
+
+        Yields:
+            pd.DataFrame: The transactions of one month, amounts in euros (see `normalizer.to_euros`).
+        """
+        for month in sorted(self.manifest, key=month_sort_key):
+            yield to_euros(pd.read_pickle(self._path(f"{month}.pkl")))
+
+    def write(self, file_types: list = ('xlsx',)) -> dict:
+        """
+        Write the year-to-date workbook (and/or other formats) from the stored state.
+
+        Parameters:
+            file_types (list): Output formats (e.g., ['xlsx', 'parquet']). Default is ['xlsx'].
+
+        Returns:
+            dict: Maps each format to the path it was written to.
+        """
+        output_paths = self.reader.file_manager.output_paths(self.year, LEDGER_OUTPUT, file_types)
+        totals = self.totals[self.totals != 0]
+        if self.reader.canonicalizer is not None:
+            # Group on the canonical names, like the monthly sheets
+            totals = self.reader.canonicalizer.regroup(totals)
+        income_expense_df = income_expense_table(totals[totals != 0] / CENTS)
+
+        for file_format, path in output_paths.items():
+            with open_writer(file_format, path, self.reader.engine) as writer:
+                for transactions in self.transactions():
+                    writer.append(TRANSACTIONS_SHEET, transactions)
+                writer.append(INCOME_EXPENSE_SHEET, income_expense_df)
+        return output_paths
+
+    def _remove_month(self, month: str):
+        stored = pd.read_pickle(self._path(f"{month}.pkl"))
+        self.totals = self.totals.sub(group_amounts(stored), fill_value=0).astype('int64')
+        self.totals = self.totals[self.totals != 0]
+        os.remove(self._path(f"{month}.pkl"))
+        del self.manifest[month]
+
+    def _save(self):
+        self.totals.to_pickle(self._path('totals.pkl'))
+        with open(self._path('manifest.json'), 'w', encoding='utf-8') as file:
+            json.dump(self.manifest, file, indent=2)
+
+    def _path(self, name: str) -> str:
+        os.makedirs(self.ledger_dir, exist_ok=True)
+        return os.path.join(self.ledger_dir, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the year-to-date ledger of a bank with new months.")
+    parser.add_argument("--bank", required=True, choices=BANKS, help="Bank of the ledger.")
+    parser.add_argument("--year", required=True, type=int, help="Year of the ledger.")
+    parser.add_argument("--data-dir", default="data", help="Root directory for input files.")
+    parser.add_argument("--results-dir", default="results", help="Root directory for output files.")
+    parser.add_argument("--format", action="append", choices=OUTPUT_FORMATS,
+                        help="Output format (repeatable). Default is xlsx.")
+    parser.add_argument("--names", help="JSON table of canonical counterparty names (see counterparties.py).")
+    args = parser.parse_args()
+
+    reader = create_reader(args.bank, FileManager(args.bank, args.data_dir, args.results_dir))
+    if args.names is not None:
+        reader.canonicalizer = NameCanonicalizer(args.names)
+    ledger = YearLedger(reader, args.year)
+    changed = ledger.update()
+    paths = ledger.write(args.format or ["xlsx"])
+    if args.names is not None:
+        reader.canonicalizer.save()
+    print(f"Ledger {args.bank}/{args.year}: {len(changed)} month(s) updated "
+          f"({', '.join(changed) or 'none'}), {len(ledger.manifest)} month(s) in total. "
+          f"Written to {', '.join(paths.values())}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,251 @@
-from sns import SNS
-from rabo import RABO
-from ing import ING
+import argparse
+import os
+
+from batch import BANKS, OUTPUT_FORMATS, create_reader
+from detect import create_detected_reader, detect_format
 from file_manager import FileManager
 
+# pandas and the Excel engines are only imported by `create_reader`, i.e. when a command actually
+# reads or writes data. Listing files and showing their status stays fast.
+
+
+def list_files(banks: list = None, years: list = None, base_dir: str = "data", results_dir: str = "results") -> dict:
+    """
+    List the input files per bank and year.
+
+    Parameters:
+        banks (list): Bank names to include. Default is all known banks.
+        years (list): Years to include. Default is every year found on disk.
+        base_dir (str): Root directory for input files. Default is 'data'.
+        results_dir (str): Root directory for output files. Default is 'results'.
+
+    Returns:
+        dict: Maps each (bank, year) pair to its month names.
+    """
+    files = {}
+    for bank_name in banks or BANKS:
+        file_manager = FileManager(bank_name, base_dir, results_dir)
+        for year in file_manager.list_years():
+            if years and year not in {str(y) for y in years}:
+                continue
+            files[(bank_name, year)] = file_manager.list_months(year)
+    return files
+
+
+def list_command(args):
+    files = list_files(args.bank, args.year, args.data_dir, args.results_dir)
+    if not files:
+        print(f"No input files found under '{args.data_dir}'.")
+    for (bank_name, year), months in files.items():
+        print(f"{bank_name} {year}: {', '.join(months) or '-'}")
+
+
+def status_command(args):
+    formats = args.format or ["xlsx"]
+    counts = {}
+    for (bank_name, year), months in list_files(args.bank, args.year, args.data_dir, args.results_dir).items():
+        file_manager = FileManager(bank_name, args.data_dir, args.results_dir)
+        for month in months:
+            status = file_manager.output_status(year, month, formats)
+            counts[status] = counts.get(status, 0) + 1
+            print(f"{bank_name:<6} {year} {month:<12} {status}")
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"{sum(counts.values())} file(s): {summary or 'none'}")
+
+
+def detect_command(args) -> bool:
+    detected = 0
+    for file_path in args.files:
+        try:
+            print(f"{file_path}: {detect_format(file_path).describe()}")
+            detected += 1
+        except Exception as e:
+            print(f"{file_path}: {e}")
+    return detected == len(args.files)
+
+
+def convert_path(file_path: str, year: int = None, formats: list = ("xlsx",), base_dir: str = "data",
+                 results_dir: str = "results", workers: int = None, stream: bool = False, chunksize: int = None):
+    """
+    Convert a CSV export from any location, detecting its bank and parse settings from its content.
+
+    The outputs are written to `<results_dir>/<bank>/<year>/`, named after the input file.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        year (int): Year folder of the outputs. Default is the most common year of the transactions.
+        formats (list): Output formats. Default is ['xlsx'].
+        base_dir (str): Root directory for input files. Default is 'data'.
+        results_dir (str): Root directory for output files. Default is 'results'.
+        workers (int): Parse the file on this many processes (see `BankBase.parallel_convert`). Default is None
+                       (parse it in this process).
+        stream (bool): Read the file in chunks (see `BankBase.stream_convert`). Default is False.
+        chunksize (int): Maximum number of rows per chunk when streaming. Default is `bank_base.CHUNK_SIZE`.
+
+    Returns:
+        dict: The paths of the written outputs, or None if the conversion failed.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+        ValueError: If no bank format fits the file.
+    """
+    reader, guess = create_detected_reader(file_path, base_dir, results_dir)
+    print(f"Detected {guess.describe()}.")
+    if year is None:
+        if workers or stream:
+            # Only look at the start of the file instead of parsing it twice
+            normalized = reader.sample(file_path)
+        else:
+            reader.load_file(file_path)
+            normalized = reader.normalize()
+        year = int(normalized['Date'].dt.year.mode().iloc[0])
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    output_paths = reader.file_manager.output_paths(year, name, formats)
+    return convert_with(reader, file_path, output_paths, workers, stream, chunksize)
+
+
+def convert_with(reader, file_path: str, output_paths: dict, workers: int = None, stream: bool = False,
+                 chunksize: int = None):
+    if workers:
+        return reader.parallel_convert(file_path, output_paths, workers)
+    if stream:
+        from bank_base import CHUNK_SIZE
+        return reader.stream_convert(file_path, output_paths, chunksize or CHUNK_SIZE)
+    return reader.convert(file_path, output_paths)
+
+
+def convert_command(args) -> bool:
+    stream = args.stream or args.chunksize is not None
+    if args.file:
+        converted = 0
+        for file_path in args.file:
+            try:
+                if convert_path(file_path, args.year, args.format or ["xlsx"], args.data_dir, args.results_dir,
+                                args.parallel, stream, args.chunksize) is not None:
+                    converted += 1
+            except Exception as e:
+                print(f"An error occurred: {e}")
+        return converted == len(args.file)
+
+    if args.bank is None or args.year is None:
+        print("Pass --bank and --year, or --file.")
+        return False
+    file_manager = FileManager(args.bank, args.data_dir, args.results_dir)
+    months = args.month or file_manager.list_months(args.year)
+    if not months:
+        print(f"No input files found for {args.bank} {args.year}.")
+        return False
+
+    reader = create_reader(args.bank, file_manager)
+    converted = 0
+    for month in months:
+        try:
+            file_path = file_manager.get_file_path(args.year, month)
+            output_paths = file_manager.output_paths(args.year, month, args.format or ["xlsx"])
+            if convert_with(reader, file_path, output_paths, args.parallel, stream, args.chunksize) is not None:
+                converted += 1
+        except Exception as e:
+            print(f"An error occurred: {e}")
+    return converted == len(months)
+
+
+def interactive():
+    """
+    Ask for the year and month, and convert that file to Excel.
 
-def main():
+    The bank is only asked for when more than one bank has a file for that month; its parse settings
+    are detected from the file itself.
+    """
     try:
         # Prompt for year and month
         year = int(input("Enter the year: "))
         month = input("Enter the month: ").strip()
-        bank = int(input(f"Choose one of the following banks (Type in 1, 2 or 3):"
-                         f"\n{int(1)}. SNS Bank\n{int(2)}. RABO Bank\n{int(3)}. ING Bank\n"
-                         f"I choose option (type in a number): "))
-
-        # Initialize FileManager and Reader
-        file_manager = None
-        reader = None
-        if bank == 1:
-            file_manager = FileManager("sns", "data", "results")
-            reader = SNS(file_manager)
-        elif bank == 2:
-            file_manager = FileManager("rabo", "data", "results")
-            reader = RABO(file_manager)
-        elif bank == 3:
-            file_manager = FileManager("ing", "data", "results")
-            reader = ING(file_manager)
+        found = [bank_name for bank_name in BANKS if month in FileManager(bank_name).list_months(year)]
+        if len(found) == 1:
+            bank_name = found[0]
         else:
-            print("Please provide a valid option (Either option 1, 2 or 3).")
+            bank = int(input(f"Choose one of the following banks (Type in 1, 2 or 3):"
+                             f"\n{int(1)}. SNS Bank\n{int(2)}. RABO Bank\n{int(3)}. ING Bank\n"
+                             f"I choose option (type in a number): "))
+            if bank not in (1, 2, 3):
+                print("Please provide a valid option (Either option 1, 2 or 3).")
+                return
+            bank_name = ["sns", "rabo", "ing"][bank - 1]
 
-        # Get the file path and load the file
+        # Get the file path, detect its format and load the file
+        file_manager = FileManager(bank_name, "data", "results")
         file_path = file_manager.get_file_path(year, month)
+        try:
+            reader, guess = create_detected_reader(file_path)
+            print(f"Detected {guess.describe()}.")
+        except ValueError as e:
+            print(f"{e} Using the {bank_name} format.")
+            reader = create_reader(bank_name, file_manager)
+        reader.file_manager = file_manager
         reader.load_file(file_path)
 
         # Determine output path and save the Excel file
         output = file_manager.write_new_file(year, f"{month}")
-        reader.csv_to_excel(file_path, output, reader.date, reader.name, reader.amount, reader.description, reader.iban)
+        reader.csv_to_excel(file_path, output)
     except Exception as e:
         print(f"An error occurred: {e}")
 
 
+def main(argv: list = None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data-dir", default="data", help="Root directory for input files.")
+    common.add_argument("--results-dir", default="results", help="Root directory for output files.")
+
+    parser = argparse.ArgumentParser(description="Convert bank CSV exports to Excel. "
+                                                 "Run without a command for the interactive prompts.")
+    commands = parser.add_subparsers(dest="command")
+
+    list_parser = commands.add_parser("list", parents=[common], help="List the input files per bank and year.")
+    list_parser.add_argument("--bank", action="append", choices=BANKS, help="Bank to include (repeatable).")
+    list_parser.add_argument("--year", action="append", help="Year to include (repeatable).")
+
+    status_parser = commands.add_parser("status", parents=[common],
+                                        help="Show which input files are converted, outdated or missing.")
+    status_parser.add_argument("--bank", action="append", choices=BANKS, help="Bank to include (repeatable).")
+    status_parser.add_argument("--year", action="append", help="Year to include (repeatable).")
+    status_parser.add_argument("--format", action="append", choices=OUTPUT_FORMATS,
+                               help="Output format to check (repeatable). Default is xlsx.")
+
+    convert_parser = commands.add_parser("convert", parents=[common],
+                                         help="Convert the files of a bank and year, or any CSV export.")
+    convert_parser.add_argument("--bank", choices=BANKS, help="Bank of the files.")
+    convert_parser.add_argument("--year", type=int,
+                                help="Year of the files. With --file: year folder of the outputs.")
+    convert_parser.add_argument("--file", action="append",
+                                help="CSV export to convert, detecting its bank (repeatable). Replaces --bank.")
+    large_files = convert_parser.add_mutually_exclusive_group()
+    large_files.add_argument("--parallel", type=int, metavar="WORKERS",
+                             help="Parse each file on this many processes (for very large exports).")
+    large_files.add_argument("--stream", action="store_true",
+                             help="Read each file in chunks, in constant memory (for very large exports).")
+    convert_parser.add_argument("--chunksize", type=int, metavar="ROWS",
+                                help="Rows per chunk when streaming (implies --stream). Default is 100,000.")
+    convert_parser.add_argument("--month", action="append", help="Month to convert (repeatable). Default is all.")
+    convert_parser.add_argument("--format", action="append", choices=OUTPUT_FORMATS,
+                                help="Output format (repeatable). Default is xlsx.")
+
+    detect_parser = commands.add_parser("detect", help="Detect the bank and parse settings of CSV exports.")
+    detect_parser.add_argument("files", nargs="+", help="CSV files to inspect.")
+
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        list_command(args)
+    elif args.command == "status":
+        status_command(args)
+    elif args.command == "convert":
+        if not convert_command(args):
+            raise SystemExit(1)
+    elif args.command == "detect":
+        if not detect_command(args):
+            raise SystemExit(1)
+    else:
+        interactive()
+
+
 if __name__ == "__main__":
     main()
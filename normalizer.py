@@ -0,0 +1,264 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from bank_spec import BankSpec
+from instrumentation import NULL_METRICS
+
+COLUMN_NAMES = ['Date', 'IBAN', 'Name', 'Amount', 'Description']
+# IBAN of the own account, added to the normalized data when the spec has an account column
+ACCOUNT_COLUMN = 'Account'
+UNKNOWN_IBAN = 'Unknown IBAN'
+UNKNOWN_NAME = 'Unknown'
+
+# Normalized amounts are stored as integer cents
+CENTS = 100
+
+
+def source_column(df: pd.DataFrame, index: int) -> pd.Series:
+    """
+    Return the column of a raw export at position `index` of the original file.
+
+    Frames with integer column labels (files without a header, or files read with `usecols`, see
+    `BankBase.load_file`) are labelled with the original column positions and are looked up by label.
+    Frames labelled with the header of the file are looked up by position.
+
+    Parameters:
+        df (pd.DataFrame): The loaded CSV data.
+        index (int): Column index in the original file.
+
+    Returns:
+        pd.Series: The column.
+    """
+    return df[index] if _labelled_by_position(df) else df.iloc[:, index]
+
+
+def _labelled_by_position(df: pd.DataFrame) -> bool:
+    return pd.api.types.is_integer_dtype(df.columns)
+
+
+def count_unparsed(raw: pd.Series, parsed: pd.Series) -> int:
+    """
+    Count the values that could not be parsed: missing in `parsed` while the raw cell was not blank.
+
+    Parameters:
+        raw (pd.Series): The column as read from the CSV file.
+        parsed (pd.Series): The parsed column, with missing values where parsing failed.
+
+    Returns:
+        int: The number of non-blank raw values that were lost.
+    """
+    failed = parsed.isna().to_numpy()
+    if not failed.any():
+        return 0
+    lost = raw[failed]
+    return int((lost.notna() & (lost.astype(str).str.strip() != '')).sum())
+
+
+def _report_unparsed(raw: pd.Series, parsed: pd.Series, what: str, replacement: str):
+    count = count_unparsed(raw, parsed)
+    if count:
+        failed = parsed.isna().to_numpy()
+        examples = [value for value in raw[failed].dropna().astype(str) if value.strip()][:3]
+        print(f"Warning: {count:,} {what} could not be parsed and became {replacement} "
+              f"(e.g. {', '.join(repr(value) for value in examples)}).")
+
+
+def to_cents(amount: pd.Series) -> pd.Series:
+    """
+    Convert amounts in euros to exact integer cents. Missing or unparsable amounts become 0; a warning is
+    printed if any amount was not blank (see `count_unparsed`).
+
+    Parameters:
+        amount (pd.Series): Amounts in euros.
+
+    Returns:
+        pd.Series: The amounts in cents (int64).
+    """
+    euros = pd.to_numeric(amount, errors='coerce')
+    _report_unparsed(amount, euros, 'amount(s)', '0')
+    return (euros * CENTS).round().fillna(0).astype('int64')
+
+
+def to_euros(normalized: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the presentation frame of normalized transactions, with amounts in euros.
+
+    Parameters:
+        normalized (pd.DataFrame): Normalized transactions, with amounts in cents.
+
+    Returns:
+        pd.DataFrame: The 'Date', 'IBAN', 'Name', 'Amount' and 'Description' columns, amounts in euros.
+    """
+    transactions = normalized[COLUMN_NAMES].copy(deep=False)
+    transactions['Amount'] = normalized['Amount'] / CENTS
+    return transactions
+
+
+def parse_dates(date: pd.Series, date_format: str = None) -> pd.Series:
+    """
+    Parse the Date column to datetime64. Unparsable dates become NaT; a warning is printed if any date was
+    not blank (see `count_unparsed`).
+
+    Parameters:
+        date (pd.Series): The Date column as read from the CSV file.
+        date_format (str): `strftime` format of the dates. Default is None (let pandas infer it).
+
+    Returns:
+        pd.Series: The parsed dates.
+    """
+    raw = date
+    if pd.api.types.is_numeric_dtype(date):
+        # Dates such as 20240131 are read as numbers
+        date = date.astype('Int64').astype(str)
+    elif date.dtype == object and any(isinstance(value, datetime.date) for value in date.dropna().iloc[:1]):
+        # The pyarrow parser reads ISO dates as date objects; parse their text so both parsers give the same dtype
+        date = date.astype(str)
+    parsed = pd.to_datetime(date, format=date_format, errors='coerce')
+    _report_unparsed(raw, parsed, 'date(s)', 'empty dates')
+    return parsed
+
+
+def fill_iban(iban: pd.Series) -> pd.Series:
+    """
+    Replace missing or empty IBAN values with 'Unknown IBAN'.
+
+    Parameters:
+        iban (pd.Series): The IBAN column.
+
+    Returns:
+        pd.Series: The IBAN column without missing values.
+    """
+    return iban.mask(iban.isna() | (iban == ''), UNKNOWN_IBAN)
+
+
+def fill_names(name: pd.Series, description: pd.Series, delimiter: str) -> pd.Series:
+    """
+    Fill missing names with the part of the description before `delimiter`.
+
+    Only the rows with a missing name are split. Rows without a description get the name 'Unknown'.
+
+    Parameters:
+        name (pd.Series): The Name column.
+        description (pd.Series): The Description column.
+        delimiter (str): Delimiter that ends the name inside the description.
+
+    Returns:
+        pd.Series: The Name column without missing values.
+    """
+    missing = name.isna()
+    if not missing.any():
+        return name
+
+    fallback = description[missing]
+    fallback = fallback.astype(str).str.split(delimiter, n=1).str[0].where(fallback.notna(), UNKNOWN_NAME)
+    name = name.astype(object).copy()
+    name[missing] = fallback
+    return name
+
+
+def apply_sign(amount: pd.Series, amount_type: pd.Series, debit_value: str) -> pd.Series:
+    """
+    Make debit amounts negative and all other amounts positive.
+
+    Parameters:
+        amount (pd.Series): The Amount column.
+        amount_type (pd.Series): The debit/credit column.
+        debit_value (str): Value of `amount_type` that marks a debit.
+
+    Returns:
+        pd.Series: The signed Amount column.
+    """
+    magnitude = pd.to_numeric(amount, errors='coerce').abs()
+    # Report here: the amounts that failed are missing by the time `to_cents` sees them
+    _report_unparsed(amount, magnitude, 'amount(s)', '0')
+    return pd.Series(np.where(amount_type == debit_value, -magnitude, magnitude), index=amount.index)
+
+
+class Normalizer:
+    """
+    Compiles a `BankSpec` into whole-column operations that produce the standard transactions layout.
+
+    The steps are chosen once, when the normalizer is built, so normalizing a frame only runs the
+    operations the bank actually needs. The result uses compact dtypes: dates are datetime64, names
+    and IBANs are categoricals and amounts are exact integer cents (see `to_euros` for presentation).
+
+    Attributes:
+        spec (BankSpec): The bank format being normalized.
+        steps (list): Names of the compiled steps, in the order they are applied.
+    """
+
+    def __init__(self, spec: BankSpec):
+        """
+        Compile the given spec.
+
+        Parameters:
+            spec (BankSpec): The bank format to normalize.
+
+        Raises:
+            ValueError: If the spec does not map every standard column.
+        """
+        missing = [column for column in COLUMN_NAMES if column not in spec.columns]
+        if missing:
+            raise ValueError(f"Bank spec '{spec.name}' has no index for column(s): {', '.join(missing)}.")
+
+        self.spec = spec
+        self.steps = []
+        if spec.drop_empty_rows:
+            self.steps.append('drop_empty_rows')
+        if spec.name_fallback is not None:
+            self.steps.append('fill_names')
+        self.steps.append('fill_iban')
+        if spec.sign_column is not None:
+            self.steps.append('apply_sign')
+        self.steps.append('compact_dtypes')
+
+    def __call__(self, df: pd.DataFrame, metrics=NULL_METRICS) -> pd.DataFrame:
+        """
+        Normalize a raw bank export.
+
+        Parameters:
+            df (pd.DataFrame): The loaded CSV data. Left unchanged.
+            metrics (Metrics): Records the 'fill' (IBAN/name), 'sign' (amount) and 'dtypes' stages. Default is off.
+
+        Returns:
+            pd.DataFrame: DataFrame with the 'Date', 'IBAN', 'Name', 'Amount' (in cents) and 'Description' columns,
+                          followed by 'Account' (own IBAN) if the spec has an account column.
+
+        Raises:
+            IndexError: If a column index of the spec is out of range.
+        """
+        spec = self.spec
+        if _labelled_by_position(df):
+            missing = [index for index in spec.usecols if index not in df.columns]
+        else:
+            missing = [index for index in spec.usecols if index >= df.shape[1]]
+        if missing:
+            raise IndexError(f"Column index {max(missing)} is not in the loaded file "
+                             f"(columns: {', '.join(map(str, df.columns))}).")
+
+        if 'drop_empty_rows' in self.steps:
+            df = df.dropna(how='all')
+
+        columns = {column: source_column(df, spec.columns[column]) for column in COLUMN_NAMES}
+        with metrics.stage('fill', len(df)) as record:
+            if 'fill_names' in self.steps:
+                columns['Name'] = fill_names(columns['Name'], columns['Description'], spec.name_fallback)
+            columns['IBAN'] = fill_iban(columns['IBAN'])
+            record['rows_out'] = len(df)
+        if 'apply_sign' in self.steps:
+            with metrics.stage('sign', len(df)) as record:
+                amount_type = source_column(df, spec.sign_column)
+                columns['Amount'] = apply_sign(columns['Amount'], amount_type, spec.debit_value)
+                record['rows_out'] = len(df)
+        with metrics.stage('dtypes', len(df)) as record:
+            columns['Date'] = parse_dates(columns['Date'], spec.date_format)
+            columns['IBAN'] = columns['IBAN'].astype('category')
+            columns['Name'] = columns['Name'].astype('category')
+            columns['Amount'] = to_cents(columns['Amount'])
+            if spec.account_column is not None:
+                columns[ACCOUNT_COLUMN] = source_column(df, spec.account_column).astype('category')
+            record['rows_out'] = len(df)
+
+        return pd.DataFrame({column: values.array for column, values in columns.items()}, index=df.index)
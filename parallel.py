@@ -0,0 +1,237 @@
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from aggregation import IncomeExpenseAggregator, group_amounts
+from categorizer import Categorizer
+from normalizer import CENTS, Normalizer
+
+# Number of byte ranges per worker process. More ranges than workers keeps every worker busy when some
+# ranges parse slower than others, and bounds the bytes a worker holds at once.
+RANGES_PER_WORKER = 2
+# Bytes scanned at a time when counting quotes, so that a range is never copied into memory as a whole
+SCAN_BLOCK = 16 * 2 ** 20
+
+QUOTE = ord('"')
+NEWLINE = ord('\n')
+
+
+def _open_map(file_path: str):
+    file = open(file_path, 'rb')
+    try:
+        return file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except Exception:
+        file.close()
+        raise
+
+
+def _count_quotes(file_path: str, start: int, end: int) -> int:
+    file, mapped = _open_map(file_path)
+    with file, mapped:
+        return sum(mapped[offset:min(offset + SCAN_BLOCK, end)].count(b'"') for offset in range(start, end, SCAN_BLOCK))
+
+
+def _record_end(mapped: mmap.mmap, position: int, in_quotes: bool) -> int:
+    """
+    Find the end of the record that contains `position`: the first newline after it outside quotes.
+
+    Parameters:
+        mapped (mmap.mmap): The mapped file.
+        position (int): Offset to start from.
+        in_quotes (bool): Whether `position` is inside a quoted field.
+
+    Returns:
+        int: The offset just after that newline, or the file size if there is none.
+    """
+    while True:
+        newline = mapped.find(b'\n', position)
+        if newline < 0:
+            return len(mapped)
+        # Every quote toggles the state; an escaped quote ("") toggles it twice
+        in_quotes ^= mapped[position:newline].count(b'"') % 2 == 1
+        if not in_quotes:
+            return newline + 1
+        position = newline + 1
+
+
+def data_start(file_path: str, header: int = None) -> int:
+    """
+    Find the offset of the first data record, after a byte order mark and the header rows.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        header (int): Row number of the column names, or None if the file has no header.
+
+    Returns:
+        int: The offset of the first record after the header.
+    """
+    file, mapped = _open_map(file_path)
+    with file, mapped:
+        position = 3 if mapped[:3] == b'\xef\xbb\xbf' else 0
+        for _ in range(0 if header is None else header + 1):
+            position = _record_end(mapped, position, False)
+        return position
+
+
+def split_ranges(file_path: str, parts: int, header: int = None, executor: ProcessPoolExecutor = None) -> list:
+    """
+    Split a CSV file into about `parts` byte ranges that each hold whole records.
+
+    The file is cut at evenly spaced offsets, and each cut is moved forward to the end of the record it
+    falls in. Whether a cut falls inside a quoted field (e.g. a description with a line break) follows
+    from the number of quotes before it, which is counted per segment in parallel when an executor is given.
+
+    Parameters:
+        file_path (str): Path to the CSV file. Must use an encoding in which '"' and '\\n' are single bytes
+                         (UTF-8, cp1252, latin-1, ...).
+        parts (int): Number of ranges to aim for.
+        header (int): Row number of the column names, or None if the file has no header. Header rows are
+                      not part of any range.
+        executor (ProcessPoolExecutor): Pool to count quotes with. Default is None (count in this process).
+
+    Returns:
+        list: (start, end) byte offsets, in file order. Empty if the file holds no records.
+    """
+    start = data_start(file_path, header)
+    size = os.path.getsize(file_path)
+    if start >= size:
+        return []
+
+    parts = max(1, min(parts, size - start))
+    cuts = [start + (size - start) * part // parts for part in range(parts + 1)]
+    segments = list(zip(cuts[:-1], cuts[1:-1]))
+    if executor is not None:
+        quotes = list(executor.map(_count_quotes, [file_path] * len(segments), *zip(*segments))) if segments else []
+    else:
+        quotes = [_count_quotes(file_path, begin, end) for begin, end in segments]
+
+    bounds = [start]
+    file, mapped = _open_map(file_path)
+    with file, mapped:
+        parity = 0
+        for cut, count in zip(cuts[1:-1], quotes):
+            parity = (parity + count) % 2
+            boundary = _record_end(mapped, cut, parity == 1) if mapped[cut - 1] != NEWLINE or parity else cut
+            if boundary > bounds[-1]:
+                bounds.append(boundary)
+    if size > bounds[-1]:
+        bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_range(file_path: str, start: int, end: int, settings: dict, normalize: Normalizer,
+                rules: dict = None, transactions: bool = True) -> dict:
+    """
+    Parse and normalize one byte range of a CSV file (runs in a worker process).
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        start (int): Offset of the first byte of the range.
+        end (int): Offset just after the last byte of the range.
+        settings (dict): `pd.read_csv` settings (sep, decimal, encoding, usecols). The range has no header.
+        normalize (Normalizer): The normalizer of the bank.
+        rules (dict): Categorization rules, or None for the default rules.
+        transactions (bool): Return the normalized transactions too, not only the totals. Default is True.
+
+    Returns:
+        dict: 'transactions' (normalized frame or None), 'groups' (amount per (Name, IBAN)), 'categories'
+              (totals per category, see `Categorizer.totals`) and 'rows'.
+    """
+    file, mapped = _open_map(file_path)
+    with file, mapped:
+        data = mapped[start:end]
+    df = pd.read_csv(io.BytesIO(data), **{**settings, 'header': None})
+    del data
+    if settings.get('usecols') is not None:
+        df.columns = settings['usecols']
+
+    normalized = normalize(df)
+    return {
+        'transactions': normalized if transactions else None,
+        'groups': group_amounts(normalized),
+        'categories': Categorizer(rules).totals(normalized),
+        'rows': len(normalized),
+    }
+
+
+def _concat(frames: list) -> pd.DataFrame:
+    """
+    Concatenate normalized frames, keeping categorical columns categorical across frames.
+
+    A range in which a column is empty has categories of another dtype (e.g. float instead of str), and a
+    range in which every value is a number may have numeric categories. The categories of such ranges are
+    cast to the dtype of the other ranges, or to str if the ranges disagree, before they are combined.
+    """
+    combined = pd.concat(frames, ignore_index=True)
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            parts = [frame[column] for frame in frames]
+            dtypes = {str(part.cat.categories.dtype): part.cat.categories.dtype for part in parts
+                      if len(part.cat.categories)}
+            mixed = len(dtypes) != 1
+            target = str if mixed else next(iter(dtypes.values()))
+            parts = [part.cat.rename_categories(part.cat.categories.astype(target))
+                     if mixed or part.cat.categories.dtype != target else part for part in parts]
+            combined[column] = pd.api.types.union_categoricals(parts, sort_categories=True)
+    return combined
+
+
+def parallel_parse(file_path: str, settings: dict, normalize: Normalizer, workers: int = None, rules: dict = None,
+                   transactions: bool = True, header: int = None) -> dict:
+    """
+    Parse and normalize a large CSV file on several cores.
+
+    The file is memory-mapped and split into byte ranges at record boundaries (see `split_ranges`). Each
+    worker process parses and normalizes its ranges and sums them per (Name, IBAN) and per category, so the
+    totals of the summary sheets are merged from small partial results instead of being recomputed.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        settings (dict): `pd.read_csv` settings (sep, decimal, encoding, usecols).
+        normalize (Normalizer): The normalizer of the bank.
+        workers (int): Number of worker processes. Default is the number of CPUs.
+        rules (dict): Categorization rules, or None for the default rules.
+        transactions (bool): Also return the normalized transactions. Default is True. Without them only the
+                             totals travel back from the workers.
+        header (int): Row number of the column names, or None if the file has no header.
+
+    Returns:
+        dict: 'transactions' (normalized frame in file order, or None), 'aggregator' (`IncomeExpenseAggregator`
+              with the merged per-(Name, IBAN) totals in cents), 'categories' (merged totals per category, or
+              None if the file has no records) and 'ranges' (number of byte ranges).
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+        ValueError: If the file is empty, or its encoding is not byte-compatible with ASCII (e.g. UTF-16).
+    """
+    encoding = (settings.get('encoding') or 'utf-8').lower().replace('_', '-')
+    if encoding.startswith(('utf-16', 'utf-32')):
+        raise ValueError(f"Cannot split {encoding} files into byte ranges. Use `load_file` instead.")
+    workers = workers or os.cpu_count() or 1
+    settings = {key: value for key, value in settings.items() if key != 'header'}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        ranges = split_ranges(file_path, workers * RANGES_PER_WORKER, header, executor)
+        if not ranges:
+            raise ValueError(f"The file at {file_path} is empty or invalid.")
+        count = len(ranges)
+        parts = list(executor.map(parse_range, [file_path] * count, *zip(*ranges), [settings] * count,
+                                  [normalize] * count, [rules] * count, [transactions] * count))
+
+    aggregator = IncomeExpenseAggregator(scale=CENTS)
+    categories = None
+    for part in parts:
+        aggregator.totals = aggregator.totals.add(part['groups'], fill_value=0)
+        aggregator.rows += part['rows']
+        categories = part['categories'] if categories is None else categories.add(part['categories'], fill_value=0)
+
+    frames = [part['transactions'] for part in parts if part['transactions'] is not None]
+    return {
+        'transactions': _concat(frames) if frames else None,
+        'aggregator': aggregator,
+        'categories': categories,
+        'ranges': count,
+    }
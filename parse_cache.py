@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import pandas as pd
+
+# Bump when the way files are parsed changes, so old cache entries are no longer used
+CACHE_VERSION = 1
+COLUMNS_METADATA_KEY = b'finance_sheet_columns'
+
+
+def file_digest(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 hash of a file's content.
+
+    Parameters:
+        file_path (str): Path to the file.
+        block_size (int): Number of bytes read at a time. Default is 1 MiB.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed CSV files, keyed by the file content and the parse settings.
+
+    Entries are stored as Parquet when pyarrow is available (falling back to pickle otherwise, or
+    for frames Parquet cannot represent). Entries are evicted when they have not been used for
+    `max_age` seconds or when the cache grows beyond `max_bytes`, least recently used first.
+
+    Attributes:
+        cache_dir (str): Directory holding the cache entries.
+        max_bytes (int): Maximum total size of the cache in bytes.
+        max_age (float): Maximum time in seconds since an entry was last used.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that had to parse the file.
+    """
+
+    def __init__(self, cache_dir: str = os.path.join('.cache', 'parsed'), max_bytes: int = 1 << 30,
+                 max_age: float = 30 * 24 * 3600):
+        """
+        Initialize the cache.
+
+        Parameters:
+            cache_dir (str): Directory holding the cache entries. Default is '.cache/parsed'.
+            max_bytes (int): Maximum total size of the cache in bytes. Default is 1 GiB.
+            max_age (float): Maximum time in seconds since an entry was last used. Default is 30 days.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, file_path: str, settings: dict) -> str:
+        """
+        Build the cache key of a file parsed with the given settings.
+
+        Parameters:
+            file_path (str): Path to the CSV file.
+            settings (dict): Parse settings (separator, decimal, encoding, header, ...).
+
+        Returns:
+            str: The cache key.
+        """
+        settings = json.dumps({**settings, 'version': CACHE_VERSION, 'pandas': pd.__version__}, sort_keys=True)
+        settings_digest = hashlib.sha256(settings.encode('utf-8')).hexdigest()[:16]
+        return f"{file_digest(file_path)}-{settings_digest}"
+
+    def get(self, file_path: str, settings: dict, parse) -> pd.DataFrame:
+        """
+        Return the parsed file from the cache, parsing and storing it on a miss.
+
+        Parameters:
+            file_path (str): Path to the CSV file.
+            settings (dict): Parse settings that `parse` uses.
+            parse (callable): Function without arguments that parses the file.
+
+        Returns:
+            pd.DataFrame: The parsed file.
+        """
+        key = self.key(file_path, settings)
+        df = self.load(key)
+        if df is not None:
+            self.hits += 1
+            return df
+
+        self.misses += 1
+        df = parse()
+        self.store(key, df)
+        return df
+
+    def load(self, key: str) -> pd.DataFrame:
+        """
+        Load a cache entry.
+
+        Parameters:
+            key (str): The cache key.
+
+        Returns:
+            pd.DataFrame: The cached frame, or None if there is no (readable) entry.
+        """
+        formats = ((self._path(key, 'parquet'), self._read_parquet), (self._path(key, 'pkl'), pd.read_pickle))
+        for path, read in formats:
+            if os.path.exists(path):
+                try:
+                    df = read(path)
+                except Exception:
+                    continue
+                os.utime(path)  # Mark the entry as recently used
+                return df
+        return None
+
+    def store(self, key: str, df: pd.DataFrame):
+        """
+        Store a frame in the cache. Failures to write are ignored, since the cache is only an optimization.
+
+        Parameters:
+            key (str): The cache key.
+            df (pd.DataFrame): The parsed frame.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            try:
+                self._write_parquet(self._path(key, 'parquet'), df)
+            except Exception:
+                if os.path.exists(self._path(key, 'parquet')):
+                    os.remove(self._path(key, 'parquet'))
+                df.to_pickle(self._path(key, 'pkl'), protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"Could not write to the parse cache: {e}")
+
+    def evict(self) -> int:
+        """
+        Remove entries older than `max_age`, then the least recently used ones until the cache fits `max_bytes`.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for used, size, path in entries:
+            if now - used <= self.max_age and total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def report(self) -> str:
+        """
+        Summarize the cache hits and misses.
+
+        Returns:
+            str: E.g. 'Parse cache: 10 hit(s), 2 miss(es)'.
+        """
+        return f"Parse cache: {self.hits} hit(s), {self.misses} miss(es)"
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{extension}")
+
+    @staticmethod
+    def _write_parquet(path: str, df: pd.DataFrame):
+        import pyarrow
+        import pyarrow.parquet
+
+        # Parquet needs string column names; keep the original labels (e.g. integers) in the metadata
+        table = pyarrow.Table.from_pandas(df.set_axis([str(column) for column in df.columns], axis=1),
+                                          preserve_index=False)
+        metadata = {**(table.schema.metadata or {}), COLUMNS_METADATA_KEY: json.dumps(list(df.columns))}
+        pyarrow.parquet.write_table(table.replace_schema_metadata(metadata), path)
+
+    @staticmethod
+    def _read_parquet(path: str) -> pd.DataFrame:
+        import pyarrow.parquet
+
+        table = pyarrow.parquet.read_table(path)
+        df = table.to_pandas()
+        df.columns = json.loads(table.schema.metadata[COLUMNS_METADATA_KEY])
+        return df
@@ -0,0 +1,96 @@
+STAGES = ['load', 'normalize', 'transactions', 'aggregates', 'categories', 'recurring', 'write']
+
+
+class StageCache:
+    """
+    Memoizes the result of each conversion stage together with the inputs it was computed from.
+
+    A stage is only recomputed when its key (a description of its inputs) changes. Keys of later
+    stages include the key of the stage they depend on, so a change early in the pipeline
+    invalidates everything after it.
+
+    Attributes:
+        entries (dict): Maps a stage name to its (key, result) pair.
+        hits (list): Stages served from the cache since the last `reset_report`.
+        misses (list): Stages computed since the last `reset_report`.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = []
+        self.misses = []
+
+    def get(self, stage: str, key, compute):
+        """
+        Return the cached result of a stage, computing it first if its key changed.
+
+        Parameters:
+            stage (str): Name of the stage (e.g., 'normalize').
+            key: Hashable or comparable description of the stage inputs.
+            compute (callable): Function without arguments that computes the stage result.
+
+        Returns:
+            The stage result.
+        """
+        entry = self.entries.get(stage)
+        if entry is not None and entry[0] == key:
+            self.hits.append(stage)
+            return entry[1]
+
+        result = compute()
+        self.entries[stage] = (key, result)
+        self.misses.append(stage)
+        return result
+
+    def key(self, stage: str):
+        """
+        Return the key of the cached result of a stage.
+
+        Parameters:
+            stage (str): Name of the stage.
+
+        Returns:
+            The key the stage was last computed with, or None if it was not computed yet.
+        """
+        entry = self.entries.get(stage)
+        return entry[0] if entry is not None else None
+
+    def invalidate(self, stage: str = None):
+        """
+        Drop the cached result of one stage, or of all stages.
+
+        Parameters:
+            stage (str): Name of the stage to drop. Default is None (drop every stage).
+        """
+        if stage is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(stage, None)
+
+    def record(self, stage: str):
+        """
+        Record a stage that always runs (such as 'write') in the report.
+
+        Parameters:
+            stage (str): Name of the stage.
+        """
+        self.misses.append(stage)
+
+    def reset_report(self):
+        """
+        Forget the hits and misses recorded so far.
+        """
+        self.hits = []
+        self.misses = []
+
+    def report(self) -> str:
+        """
+        Describe which stages were cache hits since the last `reset_report`.
+
+        Returns:
+            str: The stages in pipeline order, e.g. 'load (cached) -> normalize -> write'.
+        """
+        ran = [stage for stage in STAGES if stage in self.hits or stage in self.misses]
+        ran += [stage for stage in dict.fromkeys(self.hits + self.misses) if stage not in STAGES]
+        return ' -> '.join(f"{stage} (cached)" if stage in self.hits and stage not in self.misses else stage
+                           for stage in ran)
@@ -0,0 +1,291 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from normalizer import CENTS, UNKNOWN_IBAN, UNKNOWN_NAME
+
+RECURRING_SHEET = 'Recurring & Anomalies'
+RECURRING_FILE = 'recurring'
+SHEET_COLUMNS = ['Type', 'Counterparty', 'IBAN', 'Period', 'Date', 'Amount', 'Expected Amount', 'Occurrences',
+                 'Next Date', 'Score', 'Detail']
+
+# Recognized payment periods: (name, length in days, tolerance in days)
+PERIODS = (
+    ('Weekly', 7.0, 1.5),
+    ('Biweekly', 14.0, 2.5),
+    ('Monthly', 30.44, 4.0),
+    ('Quarterly', 91.31, 10.0),
+    ('Yearly', 365.25, 20.0),
+)
+# Minimum number of payments (on different days) before a counterparty counts as recurring
+MIN_OCCURRENCES = 3
+# Minimum share of the intervals between payments that must be within the tolerance of the period
+MIN_REGULARITY = 0.75
+# Maximum median deviation from the typical amount, as a share of it, for a fixed amount (e.g. a subscription)
+FIXED_AMOUNT_SPREAD = 0.02
+
+# Number of earlier payments of the same counterparty an amount is compared with
+WINDOW = 12
+# Minimum number of earlier payments before an amount can be an anomaly
+MIN_HISTORY = 4
+# Minimum deviation from the expected amount, in spreads, for an anomaly
+ANOMALY_SCORE = 4.0
+# The spread is at least this share of the expected amount and at least `MIN_SPREAD` euros, so a few
+# identical payments do not make every small change an anomaly
+MIN_SPREAD_SHARE = 0.1
+MIN_SPREAD = 1.0
+
+
+def _group_starts(group: np.ndarray) -> np.ndarray:
+    return np.r_[True, group[1:] != group[:-1]] if len(group) else np.zeros(0, dtype=bool)
+
+
+def sort_by_counterparty(normalized: pd.DataFrame, canonicalizer=None) -> pd.DataFrame:
+    """
+    Sort normalized transactions by counterparty and date, once, for the windowed statistics.
+
+    A counterparty is a (canonical) name together with the direction of the money, so that refunds do not
+    mix with the payments to the same shop. Transactions without a name are grouped on their IBAN.
+    Transactions without a date or with a zero amount are left out.
+
+    Parameters:
+        normalized (pd.DataFrame): Normalized transactions (amounts in cents).
+        canonicalizer (NameCanonicalizer): Merges names of the same counterparty (see
+                                           `counterparties.NameCanonicalizer`). Default is None (exact names).
+
+    Returns:
+        pd.DataFrame: The 'Group' (counterparty number, in sorted order), 'Counterparty', 'IBAN', 'Date',
+                      'Day' (days since 1970) and 'Amount' (in euros) columns, sorted by Group and Date.
+    """
+    kept = normalized[normalized['Date'].notna() & (normalized['Amount'] != 0)]
+
+    # Canonicalize and number the distinct names only; rows without a name fall back to their IBAN
+    name_codes, names = pd.factorize(kept['Name'])
+    labels = pd.Series(np.asarray(names, dtype=object))
+    if canonicalizer is not None:
+        labels = canonicalizer.canonicalize_values(labels)
+    label_codes, labels = pd.factorize(labels.where(labels != UNKNOWN_NAME))
+    iban_codes, ibans = pd.factorize(kept['IBAN'].astype(object).fillna(UNKNOWN_IBAN))
+    codes = np.where(name_codes >= 0, label_codes[name_codes], -1)
+    codes = np.where(codes >= 0, codes, len(labels) + iban_codes)
+    remap, counterparties = pd.factorize(np.concatenate([np.asarray(labels, dtype=object),
+                                                         np.asarray(ibans, dtype=object)]))
+
+    amounts = kept['Amount'].to_numpy()
+    groups = remap[codes] * 2 + (amounts > 0)
+    days = kept['Date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    order = np.lexsort((days, groups))
+
+    return pd.DataFrame({
+        'Group': np.cumsum(_group_starts(groups[order])) - 1,
+        'Counterparty': pd.Categorical.from_codes(remap[codes][order], counterparties),
+        'IBAN': pd.Categorical.from_codes(iban_codes[order], ibans),
+        'Date': kept['Date'].to_numpy()[order],
+        'Day': days[order],
+        'Amount': amounts[order] / CENTS,
+    })
+
+
+def recurring_payments(ordered: pd.DataFrame, as_of: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Find the counterparties that are paid (or pay) at a regular interval, such as subscriptions, standing
+    orders and salaries.
+
+    The intervals between consecutive payments of each counterparty are taken from the sorted rows at once;
+    payments on the same day count as one. A counterparty is recurring when its median interval is close to
+    one of the `PERIODS` and at least `MIN_REGULARITY` of its intervals are within the tolerance of that
+    median.
+
+    Parameters:
+        ordered (pd.DataFrame): Transactions sorted by counterparty and date (see `sort_by_counterparty`).
+        as_of (pd.Timestamp): Date a recurring payment is overdue against. Default is the last date in the data.
+
+    Returns:
+        pd.DataFrame: One row per recurring counterparty, with the `SHEET_COLUMNS`. 'Date' and 'Amount' are
+                      those of the last payment, 'Expected Amount' is the median amount, 'Next Date' the
+                      expected date of the next payment and 'Score' the share of regular intervals.
+    """
+    group = ordered['Group'].to_numpy()
+    day = ordered['Day'].to_numpy()
+    if not len(group):
+        return pd.DataFrame(columns=SHEET_COLUMNS)
+    as_of_day = day.max()
+    if as_of is not None:
+        as_of_day = pd.Timestamp(as_of).to_datetime64().astype('datetime64[D]').astype(np.int64)
+
+    starts = _group_starts(group)
+    gaps = np.diff(day, prepend=day[0]).astype('float64')
+    gaps[starts] = np.nan
+    gaps[gaps == 0] = np.nan
+    events = starts | (gaps > 0)
+
+    by_group = pd.DataFrame({'Group': group, 'Gap': gaps, 'Event': events, 'Amount': ordered['Amount'].to_numpy()})
+    grouped = by_group.groupby('Group', sort=False)
+    occurrences = grouped['Event'].sum().to_numpy()
+    median_gap = grouped['Gap'].median().to_numpy()
+    median_amount = grouped['Amount'].median().to_numpy()
+
+    period_days = np.array([days for _, days, _ in PERIODS])
+    tolerance = np.array([days for _, _, days in PERIODS])
+    distance = np.abs(np.nan_to_num(median_gap, nan=-1e9)[:, None] - period_days[None, :])
+    period = np.argmin(distance / tolerance, axis=1)
+    matched = distance[np.arange(len(period)), period] <= tolerance[period]
+
+    group_tolerance = tolerance[period][group]
+    regular = np.abs(gaps - median_gap[group]) <= group_tolerance
+    regularity = pd.Series(np.where(np.isnan(gaps), np.nan, regular)).groupby(group, sort=False).mean().to_numpy()
+    spread = pd.Series(np.abs(by_group['Amount'].to_numpy() - median_amount[group])).groupby(
+        group, sort=False).median().to_numpy()
+
+    recurring = matched & (occurrences >= MIN_OCCURRENCES) & (regularity >= MIN_REGULARITY)
+    last = np.r_[np.flatnonzero(starts)[1:] - 1, len(group) - 1][recurring]
+    median_gap = median_gap[recurring]
+    next_day = day[last] + np.round(median_gap).astype(np.int64)
+    fixed = spread[recurring] <= FIXED_AMOUNT_SPREAD * np.abs(median_amount[recurring])
+    overdue = next_day + tolerance[period[recurring]] < as_of_day
+
+    detail = np.where(fixed, 'fixed amount', 'variable amount').astype(object)
+    detail[overdue] += ', overdue'
+    result = pd.DataFrame({
+        'Type': 'Recurring',
+        'Counterparty': ordered['Counterparty'].iloc[last].to_numpy(),
+        'IBAN': ordered['IBAN'].iloc[last].to_numpy(),
+        'Period': np.array([name for name, _, _ in PERIODS], dtype=object)[period[recurring]],
+        'Date': ordered['Date'].iloc[last].to_numpy(),
+        'Amount': ordered['Amount'].to_numpy()[last],
+        'Expected Amount': median_amount[recurring].round(2),
+        'Occurrences': occurrences[recurring],
+        'Next Date': next_day.astype('datetime64[D]'),
+        'Score': regularity[recurring].round(2),
+        'Detail': detail,
+    }, columns=SHEET_COLUMNS)
+    return result.sort_values('Expected Amount', key=np.abs, ascending=False, kind='stable').reset_index(drop=True)
+
+
+def amount_anomalies(ordered: pd.DataFrame) -> pd.DataFrame:
+    """
+    Find payments whose amount is far from the earlier payments of the same counterparty.
+
+    Every payment is compared with the mean of the `WINDOW` payments before it: the windowed mean and
+    standard deviation of all rows follow from two cumulative sums over the sorted rows, so no group is
+    visited on its own. A payment is an anomaly when it deviates at least `ANOMALY_SCORE` spreads from that
+    mean, and the counterparty has at least `MIN_HISTORY` earlier payments.
+
+    Parameters:
+        ordered (pd.DataFrame): Transactions sorted by counterparty and date (see `sort_by_counterparty`).
+
+    Returns:
+        pd.DataFrame: One row per anomaly, with the `SHEET_COLUMNS`. 'Expected Amount' is the windowed mean,
+                      'Occurrences' the number of payments it was computed from and 'Score' the deviation in
+                      spreads. Largest deviation first.
+    """
+    group = ordered['Group'].to_numpy()
+    amount = ordered['Amount'].to_numpy()
+    if not len(group):
+        return pd.DataFrame(columns=SHEET_COLUMNS)
+
+    starts = _group_starts(group)
+    position = np.arange(len(group))
+    first = np.maximum.accumulate(np.where(starts, position, 0))
+    history = np.minimum(position - first, WINDOW)
+
+    # Center the amounts per counterparty so that the cumulative sums stay small and precise
+    center = pd.Series(amount).groupby(group, sort=False).transform('median').to_numpy()
+    centered = amount - center
+    sums = np.r_[0.0, np.cumsum(centered)]
+    squares = np.r_[0.0, np.cumsum(centered ** 2)]
+    window_sum = sums[position] - sums[position - history]
+    window_squares = squares[position] - squares[position - history]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = window_sum / history
+        variance = (window_squares - history * mean ** 2) / (history - 1)
+    deviation = np.sqrt(np.clip(np.nan_to_num(variance, nan=0.0, posinf=0.0), 0, None))
+    expected = mean + center
+    spread = np.maximum.reduce([deviation, MIN_SPREAD_SHARE * np.abs(expected), np.full(len(amount), MIN_SPREAD)])
+    score = np.abs(amount - expected) / spread
+
+    anomaly = (history >= MIN_HISTORY) & (score >= ANOMALY_SCORE)
+    rows = np.flatnonzero(anomaly)
+    result = pd.DataFrame({
+        'Type': 'Anomaly',
+        'Counterparty': ordered['Counterparty'].iloc[rows].to_numpy(),
+        'IBAN': ordered['IBAN'].iloc[rows].to_numpy(),
+        'Period': None,
+        'Date': ordered['Date'].iloc[rows].to_numpy(),
+        'Amount': amount[rows],
+        'Expected Amount': expected[rows].round(2),
+        'Occurrences': history[rows],
+        'Next Date': pd.NaT,
+        'Score': score[rows].round(1),
+        'Detail': np.where(np.abs(amount[rows]) > np.abs(expected[rows]), 'higher than usual', 'lower than usual'),
+    }, columns=SHEET_COLUMNS)
+    return result.sort_values('Score', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def recurring_table(normalized: pd.DataFrame, canonicalizer=None, as_of: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Build the 'Recurring & Anomalies' sheet: the recurring payments, followed by the amount anomalies.
+
+    Parameters:
+        normalized (pd.DataFrame): Normalized transactions (amounts in cents).
+        canonicalizer (NameCanonicalizer): Merges names of the same counterparty. Default is None (exact names).
+        as_of (pd.Timestamp): Date a recurring payment is overdue against. Default is the last date in the data.
+
+    Returns:
+        pd.DataFrame: DataFrame with the `SHEET_COLUMNS` (amounts in euros).
+    """
+    ordered = sort_by_counterparty(normalized, canonicalizer)
+    tables = [table for table in (recurring_payments(ordered, as_of), amount_anomalies(ordered)) if len(table)]
+    if not tables:
+        return pd.DataFrame(columns=SHEET_COLUMNS)
+    return pd.concat(tables, ignore_index=True)
+
+
+def main():
+    from batch import BANKS, OUTPUT_FORMATS
+    from counterparties import NameCanonicalizer
+    from store import DEFAULT_DB, TransactionStore
+    from writers import open_writer
+
+    parser = argparse.ArgumentParser(description="Find recurring payments and unusual amounts in the full history "
+                                                 "of the transaction database (see store.py).")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Path of the database file.")
+    parser.add_argument("--bank", choices=BANKS, help="Only this bank.")
+    parser.add_argument("--start", help="First date (YYYY-MM-DD).")
+    parser.add_argument("--end", help="Last date (YYYY-MM-DD).")
+    parser.add_argument("--names", help="JSON table of canonical counterparty names (see counterparties.py).")
+    parser.add_argument("--results-dir", default="results", help="Root directory for output files.")
+    parser.add_argument("--format", action="append", choices=OUTPUT_FORMATS,
+                        help="Output format (repeatable). Default is xlsx.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"The database '{args.db}' does not exist. Run `python store.py sync` first.")
+    start = time.perf_counter()
+    with TransactionStore(args.db) as store:
+        transactions = store.query(bank=args.bank, start=args.start, end=args.end)
+    transactions['Amount'] = (transactions['Amount'] * CENTS).round().astype('int64')
+
+    canonicalizer = NameCanonicalizer(args.names)
+    table = recurring_table(transactions, canonicalizer)
+    canonicalizer.save()
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    output_paths = {file_format: os.path.join(args.results_dir, f"{RECURRING_FILE}.{file_format}")
+                    for file_format in args.format or ["xlsx"]}
+    for file_format, path in output_paths.items():
+        with open_writer(file_format, path) as writer:
+            writer.append(RECURRING_SHEET, table)
+
+    counts = table['Type'].value_counts()
+    print(f"Analyzed {len(transactions):,} transactions in {time.perf_counter() - start:.2f}s: "
+          f"{counts.get('Recurring', 0)} recurring counterparties, {counts.get('Anomaly', 0)} anomalies. "
+          f"Wrote {', '.join(output_paths.values())}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch import BANKS, create_reader
+from counterparties import NameCanonicalizer
+from file_manager import FileManager
+from normalizer import CENTS
+from parse_cache import file_digest
+
+DEFAULT_DB = os.path.join('results', 'transactions.db')
+
+# Number of rows inserted per executemany call
+INSERT_BATCH = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    bank TEXT NOT NULL,
+    source TEXT NOT NULL,
+    date TEXT,
+    iban TEXT,
+    name TEXT COLLATE NOCASE,
+    amount_cents INTEGER NOT NULL,
+    sign INTEGER NOT NULL,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS transactions_iban ON transactions (iban, date, sign, amount_cents);
+CREATE INDEX IF NOT EXISTS transactions_name ON transactions (name, date, sign, amount_cents);
+CREATE INDEX IF NOT EXISTS transactions_sign ON transactions (sign, date, amount_cents);
+CREATE INDEX IF NOT EXISTS transactions_source ON transactions (bank, source);
+CREATE TABLE IF NOT EXISTS sources (
+    bank TEXT NOT NULL,
+    source TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    loaded_at REAL NOT NULL,
+    PRIMARY KEY (bank, source)
+);
+"""
+
+# Grouping expressions accepted by `TransactionStore.totals`
+GROUPINGS = {
+    'name': 'name',
+    'iban': 'iban',
+    'bank': 'bank',
+    'year': "substr(date, 1, 4)",
+    'month': "substr(date, 1, 7)",
+}
+
+
+def _escape_like(text: str) -> str:
+    # Escape the LIKE wildcards and the escape character itself, so that the text matches literally
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class TransactionStore:
+    """
+    Local SQLite database with the normalized transactions of every bank.
+
+    Answering questions such as "what did we pay counterparty X last year" from the database takes
+    milliseconds, instead of opening or re-parsing every monthly file. The database runs in WAL mode,
+    so queries can run while new months are loaded. Transactions are indexed on date, IBAN, name
+    (case-insensitive) and amount sign. The name, IBAN and sign indexes also hold the date and amount, so
+    totals per counterparty or over a period are computed from the index alone.
+
+    Each input file is a source ('<year>/<month>') of a bank. Loading a source replaces its previous
+    rows in one transaction, and `sync` only reloads files whose content changed.
+
+    Attributes:
+        path (str): Path of the database file.
+        connection (sqlite3.Connection): Open connection to the database.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB):
+        """
+        Open (and if needed create) the database.
+
+        Parameters:
+            path (str): Path of the database file. Default is 'results/transactions.db'.
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """
+        Close the connection to the database.
+        """
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def digest(self, bank_name: str, source: str) -> str:
+        """
+        Return the content hash of a loaded source, or None if it was never loaded.
+        """
+        row = self.connection.execute('SELECT digest FROM sources WHERE bank = ? AND source = ?',
+                                      (bank_name, source)).fetchone()
+        return row[0] if row else None
+
+    def load(self, bank_name: str, source: str, normalized: pd.DataFrame, digest: str = ''):
+        """
+        Store the transactions of one source, replacing the rows it had before.
+
+        Parameters:
+            bank_name (str): Name of the bank.
+            source (str): Name of the source (e.g., '2024/january').
+            normalized (pd.DataFrame): Normalized transactions, amounts in cents (see `BankBase.normalize`).
+            digest (str): Content hash of the input file, used by `sync` to skip unchanged files.
+        """
+        dates = normalized['Date'].dt.strftime('%Y-%m-%d')
+        amounts = normalized['Amount'].to_numpy(dtype='int64')
+        columns = [
+            dates.astype(object).where(dates.notna(), None),
+            normalized['IBAN'].astype(object).where(normalized['IBAN'].notna(), None),
+            normalized['Name'].astype(object).where(normalized['Name'].notna(), None),
+            amounts.tolist(),
+            np.sign(amounts).tolist(),
+            normalized['Description'].astype(object).where(normalized['Description'].notna(), None),
+        ]
+        rows = list(zip(*columns))
+
+        with self.connection:
+            self.connection.execute('DELETE FROM transactions WHERE bank = ? AND source = ?', (bank_name, source))
+            for start in range(0, len(rows), INSERT_BATCH):
+                self.connection.executemany(
+                    'INSERT INTO transactions (bank, source, date, iban, name, amount_cents, sign, description) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    ((bank_name, source, *row) for row in rows[start:start + INSERT_BATCH]))
+            self.connection.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)',
+                                    (bank_name, source, digest, len(rows), time.time()))
+
+    def analyze(self):
+        """
+        Update the table statistics the query planner uses to pick an index. `sync` runs it after loading;
+        call it yourself after loading sources with `load`.
+        """
+        with self.connection:
+            self.connection.execute('ANALYZE')
+
+    def remove(self, bank_name: str, source: str):
+        """
+        Remove the transactions of one source.
+        """
+        with self.connection:
+            self.connection.execute('DELETE FROM transactions WHERE bank = ? AND source = ?', (bank_name, source))
+            self.connection.execute('DELETE FROM sources WHERE bank = ? AND source = ?', (bank_name, source))
+
+    def sync(self, banks: list = None, years: list = None, base_dir: str = 'data',
+             results_dir: str = 'results') -> dict:
+        """
+        Load every new or changed input file into the database and remove the files that were deleted.
+
+        Parameters:
+            banks (list): Bank names to include. Default is all known banks.
+            years (list): Years to include. Default is every year found on disk.
+            base_dir (str): Root directory for input files. Default is 'data'.
+            results_dir (str): Root directory for output files. Default is 'results'.
+
+        Returns:
+            dict: 'loaded', 'removed' and 'unchanged' source counts, and 'errors' (list of messages).
+        """
+        summary = {'loaded': 0, 'removed': 0, 'unchanged': 0, 'errors': []}
+        year_filter = {str(year) for year in years} if years else None
+        for bank_name in banks or BANKS:
+            file_manager = FileManager(bank_name, base_dir, results_dir)
+            reader = None
+            on_disk = set()
+            for year in file_manager.list_years():
+                if year_filter and year not in year_filter:
+                    continue
+                for month in file_manager.list_months(year):
+                    source = f"{year}/{month}"
+                    on_disk.add(source)
+                    file_path = file_manager.get_file_path(year, month)
+                    digest = file_digest(file_path)
+                    if self.digest(bank_name, source) == digest:
+                        summary['unchanged'] += 1
+                        continue
+                    try:
+                        reader = reader or create_reader(bank_name, file_manager)
+                        reader.load_file(file_path)
+                        self.load(bank_name, source, reader.normalize(), digest)
+                        summary['loaded'] += 1
+                    except Exception as e:
+                        summary['errors'].append(f"{bank_name}/{source}: {type(e).__name__}: {e}")
+
+            stored = [row[0] for row in self.connection.execute('SELECT source FROM sources WHERE bank = ?',
+                                                                (bank_name,))]
+            for source in stored:
+                if source not in on_disk and (not year_filter or source.split('/')[0] in year_filter):
+                    self.remove(bank_name, source)
+                    summary['removed'] += 1
+
+        if summary['loaded'] or summary['removed']:
+            self.analyze()
+        return summary
+
+    @staticmethod
+    def _where(bank: str = None, name: str = None, name_like: str = None, iban: str = None, start: str = None,
+               end: str = None, sign: str = None, min_amount: float = None, max_amount: float = None,
+               text: str = None):
+        clauses, parameters = [], []
+        if bank is not None:
+            clauses.append('bank = ?')
+            parameters.append(bank)
+        if name is not None:
+            # The name column is case-insensitive
+            clauses.append('name = ?')
+            parameters.append(name)
+        if name_like is not None:
+            clauses.append('name LIKE ?')
+            parameters.append(name_like)
+        if iban is not None:
+            clauses.append('iban = ?')
+            parameters.append(iban)
+        if start is not None:
+            clauses.append('date >= ?')
+            parameters.append(start)
+        if end is not None:
+            clauses.append('date <= ?')
+            parameters.append(end)
+        if sign is not None:
+            if sign not in ('income', 'expense'):
+                raise ValueError("sign must be 'income' or 'expense'.")
+            clauses.append('sign = ?')
+            parameters.append(1 if sign == 'income' else -1)
+        if min_amount is not None:
+            clauses.append('abs(amount_cents) >= ?')
+            parameters.append(round(min_amount * CENTS))
+        if max_amount is not None:
+            clauses.append('abs(amount_cents) <= ?')
+            parameters.append(round(max_amount * CENTS))
+        if text is not None:
+            # The text is matched literally, so '%' and '_' in it are escaped
+            clauses.append("description LIKE ? ESCAPE '\\'")
+            parameters.append(f"%{_escape_like(text)}%")
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', parameters
+
+    def query(self, limit: int = None, **filters) -> pd.DataFrame:
+        """
+        Find transactions.
+
+        Parameters:
+            limit (int): Maximum number of rows. Default is None (all).
+            **filters: Any of `bank`, `name` (exact, case-insensitive), `name_like` (a case-insensitive LIKE
+                       pattern, with '%' and '_' as wildcards), `iban`, `start` and `end` (ISO dates, inclusive),
+                       `sign` ('income' or 'expense'), `min_amount` and `max_amount` (absolute amount in euros)
+                       and `text` (part of the description, matched literally).
+
+        Returns:
+            pd.DataFrame: The 'Date', 'Bank', 'IBAN', 'Name', 'Amount' (in euros) and 'Description' columns,
+                          newest first.
+        """
+        where, parameters = self._where(**filters)
+        sql = ('SELECT date AS Date, bank AS Bank, iban AS IBAN, name AS Name, amount_cents AS Amount, '
+               f'description AS Description FROM transactions{where} ORDER BY date DESC, id')
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        result = pd.read_sql_query(sql, self.connection, params=parameters)
+        result['Date'] = pd.to_datetime(result['Date'])
+        result['Amount'] = result['Amount'] / CENTS
+        return result
+
+    def totals(self, by: str = 'name', limit: int = None, canonicalizer=None, **filters) -> pd.DataFrame:
+        """
+        Sum transactions per name, IBAN, bank, year or month.
+
+        Parameters:
+            by (str): One of 'name', 'iban', 'bank', 'year' or 'month'. Default is 'name'.
+            limit (int): Maximum number of groups, largest absolute net amount first. Default is None (all).
+            canonicalizer (NameCanonicalizer): With `by='name'`, merges names of the same counterparty (see
+                                               `counterparties.NameCanonicalizer`). Default is None (exact names).
+            **filters: The filters of `query`.
+
+        Returns:
+            pd.DataFrame: The group column followed by 'Transactions', 'Income', 'Expenses' and 'Net' (in euros).
+
+        Raises:
+            ValueError: If `by` is not a known grouping.
+        """
+        if by not in GROUPINGS:
+            raise ValueError(f"Unknown grouping '{by}'. Choose one of: {', '.join(GROUPINGS)}.")
+
+        where, parameters = self._where(**filters)
+        label = by.capitalize() if by != 'iban' else 'IBAN'
+        order = 'abs(sum(amount_cents)) DESC' if by in ('name', 'iban', 'bank') else '1'
+        sql = (f'SELECT {GROUPINGS[by]} AS "{label}", count(*) AS Transactions, '
+               'sum(CASE WHEN sign > 0 THEN amount_cents ELSE 0 END) AS Income, '
+               'sum(CASE WHEN sign < 0 THEN amount_cents ELSE 0 END) AS Expenses, '
+               f'sum(amount_cents) AS Net FROM transactions{where} GROUP BY 1 ORDER BY {order}')
+        canonical = by == 'name' and canonicalizer is not None
+        if limit is not None and not canonical:
+            sql += f' LIMIT {int(limit)}'
+        result = pd.read_sql_query(sql, self.connection, params=parameters)
+        if canonical:
+            # The distinct names are merged in pandas, so the limit applies to the merged counterparties
+            result[label] = canonicalizer.canonicalize_values(result[label])
+            result = result.groupby(label, sort=False, dropna=False).sum().reset_index()
+            result = result.iloc[(-result['Net'].abs()).argsort(kind='stable')].reset_index(drop=True)
+            if limit is not None:
+                result = result.head(int(limit))
+        for column in ('Income', 'Expenses', 'Net'):
+            result[column] = result[column] / CENTS
+        return result
+
+
+def main():
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("--bank", choices=BANKS, help="Only this bank.")
+    filters.add_argument("--name", help="Counterparty name (exact, case-insensitive).")
+    filters.add_argument("--name-like", help="Counterparty name pattern (case-insensitive; %% and _ are wildcards).")
+    filters.add_argument("--iban", help="Counterparty IBAN.")
+    filters.add_argument("--year", help="Only this year (shortcut for --start/--end).")
+    filters.add_argument("--start", help="First date (YYYY-MM-DD).")
+    filters.add_argument("--end", help="Last date (YYYY-MM-DD).")
+    filters.add_argument("--income", dest="sign", action="store_const", const="income", help="Only income.")
+    filters.add_argument("--expenses", dest="sign", action="store_const", const="expense", help="Only expenses.")
+    filters.add_argument("--min-amount", type=float, help="Minimum absolute amount in euros.")
+    filters.add_argument("--max-amount", type=float, help="Maximum absolute amount in euros.")
+    filters.add_argument("--text", help="Text in the description.")
+    filters.add_argument("--limit", type=int, help="Maximum number of rows.")
+
+    parser = argparse.ArgumentParser(description="Query the local transaction database.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Path of the database file.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync_parser = commands.add_parser("sync", help="Load new or changed CSV files into the database.")
+    sync_parser.add_argument("--bank", action="append", choices=BANKS, help="Bank to include (repeatable).")
+    sync_parser.add_argument("--year", action="append", help="Year to include (repeatable).")
+    sync_parser.add_argument("--data-dir", default="data", help="Root directory for input files.")
+    commands.add_parser("query", parents=[filters], help="List matching transactions.")
+    totals_parser = commands.add_parser("totals", parents=[filters], help="Sum matching transactions per group.")
+    totals_parser.add_argument("--by", default="name", choices=list(GROUPINGS), help="Grouping. Default is name.")
+    totals_parser.add_argument("--names", help="JSON table of canonical counterparty names, to merge the names of "
+                                               "one counterparty with --by name (see counterparties.py).")
+    args = parser.parse_args()
+
+    with TransactionStore(args.db) as store:
+        if args.command == "sync":
+            start = time.perf_counter()
+            summary = store.sync(args.bank, args.year, args.data_dir)
+            print(f"Synced '{args.db}' in {time.perf_counter() - start:.2f}s: {summary['loaded']} file(s) loaded, "
+                  f"{summary['removed']} removed, {summary['unchanged']} unchanged.")
+            for error in summary['errors']:
+                print(f"  - {error}")
+            if summary['errors']:
+                raise SystemExit(1)
+            return
+
+        selected = {'bank': args.bank, 'name': args.name, 'name_like': args.name_like, 'iban': args.iban,
+                    'start': args.start, 'end': args.end, 'sign': args.sign, 'min_amount': args.min_amount,
+                    'max_amount': args.max_amount, 'text': args.text}
+        if args.year:
+            selected['start'] = selected['start'] or f"{args.year}-01-01"
+            selected['end'] = selected['end'] or f"{args.year}-12-31"
+        selected = {key: value for key, value in selected.items() if value is not None}
+
+        start = time.perf_counter()
+        if args.command == "query":
+            result = store.query(args.limit, **selected)
+        else:
+            canonicalizer = NameCanonicalizer(args.names)
+            result = store.totals(args.by, args.limit, canonicalizer, **selected)
+            canonicalizer.save()
+        elapsed = (time.perf_counter() - start) * 1000
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(result.to_string(index=False) if not result.empty else "No matching transactions.")
+        print(f"{len(result):,} row(s) in {elapsed:.1f} ms.")
+
+
+if __name__ == "__main__":
+    main()
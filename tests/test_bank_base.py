@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+import main
+from batch import create_reader
+from benchmarks.synthetic import generate_frame
+from file_manager import FileManager
+from writers import sheet_path
+
+from test_parallel import _assert_same, _write_export
+
+
+def test_sample_is_the_normalized_head_of_the_file(tmp_path):
+    path = _write_export(tmp_path / 'export.csv', generate_frame('rabo', 300, seed=4))
+    reader = create_reader('rabo', FileManager('rabo', str(tmp_path), str(tmp_path)))
+    sample = reader.sample(path, nrows=50)
+    assert reader.df is None
+    reader.load_file(path)
+    _assert_same(reader.normalize().head(50), sample)
+
+
+def test_convert_fails_when_a_stage_fails(tmp_path, capsys):
+    path = tmp_path / 'short.csv'
+    path.write_text('01-01-2024;NL01;NL02;Jumbo\n02-01-2024;NL01;NL03;Eneco\n', encoding='utf-8')
+    reader = create_reader('sns', FileManager('sns', str(tmp_path), str(tmp_path)))
+    reader.prune_columns = False
+
+    assert reader.convert(str(path), {'csv': str(tmp_path / 'short_out.csv')}) is None
+    output = capsys.readouterr().out
+    assert 'Error during CSV conversion' in output and 'Successfully' not in output
+    # The public sheet methods still report the error and return an empty frame
+    assert reader.create_transactions_sheet().empty
+
+
+@pytest.mark.parametrize('file_format', ['csv', 'parquet'])
+def test_streamed_convert_writes_the_same_sheets_as_convert(tmp_path, file_format):
+    (tmp_path / 'data' / 'rabo' / '2024').mkdir(parents=True)
+    _write_export(tmp_path / 'data' / 'rabo' / '2024' / 'january.csv', generate_frame('rabo', 3000, seed=5))
+    read = pd.read_parquet if file_format == 'parquet' else lambda path: pd.read_csv(path, keep_default_na=False)
+
+    sheets = []
+    for results_dir, options in (('plain', []), ('streamed', ['--chunksize', '700'])):
+        main.main(['convert', '--bank', 'rabo', '--year', '2024', '--format', file_format, '--data-dir',
+                   str(tmp_path / 'data'), '--results-dir', str(tmp_path / results_dir), *options])
+        output = str(tmp_path / results_dir / 'rabo' / '2024' / f'january.{file_format}')
+        sheets.append([read(sheet_path(output, sheet)) for sheet in ('Transactions', 'Income & Expenses',
+                                                                      'Categories')])
+    for plain, streamed in zip(*sheets):
+        pd.testing.assert_frame_equal(streamed, plain, check_dtype=False, check_categorical=False)
@@ -0,0 +1,62 @@
+import re
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_frame
+from categorizer import DEFAULT_RULES, UNCATEGORIZED, Categorizer, _to_regex
+
+
+def _rule_by_rule(rules, text):
+    # Reference: try every rule on its own; the earliest match wins, then the earliest rule
+    best = None
+    for index, (category, pattern) in enumerate((c, p) for c, patterns in rules.items() for p in patterns):
+        found = re.search(_to_regex(pattern), text, re.IGNORECASE)
+        if found and (best is None or (found.start(), index) < best[:2]):
+            best = (found.start(), index, category)
+    return best[2] if best else None
+
+
+def test_the_combined_regex_matches_the_rules_one_by_one():
+    frame = generate_frame('rabo', 2000, seed=8)
+    texts = pd.concat([frame['Naam tegenpartij'], frame['Omschrijving-1']]).unique().tolist()
+    texts += ['Betaling Jumbo via salaris', 'HUUR + Albert Heijn', 'transfer to ns', 'NS GROEP', 'ah to go',
+              'rental car', 'spaarrekening eneco', 'Apple.com/bill', '']
+    categorizer = Categorizer()
+    assert [categorizer.match(text) for text in texts] == [_rule_by_rule(DEFAULT_RULES, text) for text in texts]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('shop online', 'First'),         # both rules start here: the earlier rule wins
+    ('online shop', 'Second'),        # the earliest match wins over rule order
+    ('Groceries at SHOP', 'First'),
+])
+def test_rule_order_breaks_ties_at_the_same_position(text, expected):
+    rules = {'First': ['shop'], 'Second': ['online', 'shop online']}
+    assert Categorizer(rules).match(text) == expected == _rule_by_rule(rules, text)
+    reversed_rules = dict(reversed(list(rules.items())))
+    assert Categorizer(reversed_rules).match(text) == _rule_by_rule(reversed_rules, text)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('order bol.com 123', 'Shop'),
+    ('bolxcom', None),                # the dot is a literal dot
+    ('book c++ primer', 'Books'),     # '+' is escaped and no word boundary follows it
+    ('c+++', 'Books'),
+    ('cc', None),
+    ('fee (atm) withdrawal', 'Fees'),
+    ('fee atm', None),
+    ('ticket 42 paid', 'Tickets'),    # regex rules keep their groups and classes
+    ('ticket paid', None),
+    ('price $5', 'Prices'),
+])
+def test_special_characters_in_keywords_are_escaped(text, expected):
+    rules = {'Shop': ['bol.com'], 'Books': ['c++'], 'Fees': ['(atm)'], 'Tickets': ['re:ticket (\\d+|no\\.)'],
+             'Prices': ['$5']}
+    assert Categorizer(rules).match(text) == expected == _rule_by_rule(rules, text)
+
+
+def test_categorize_falls_back_to_the_description():
+    transactions = pd.DataFrame({'Name': ['Jumbo 12', 'J. Jansen', None],
+                                 'Description': ['', 'Huur januari', 'Unknown']})
+    assert Categorizer().categorize(transactions).tolist() == ['Groceries', 'Rent', UNCATEGORIZED]
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from consolidation import match_transfers
+
+
+def _transactions(rows):
+    df = pd.DataFrame(rows, columns=['Date', 'Account', 'IBAN', 'Amount'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+
+@pytest.mark.parametrize('credit_date, matched', [('2024-01-04', True), ('2024-01-05', False),
+                                                  ('2023-12-29', True), ('2023-12-28', False)])
+def test_match_transfers_window_edges(credit_date, matched):
+    transactions = _transactions([
+        ('2024-01-01', 'NL01RABO', 'NL02INGB', -5000),
+        (credit_date, 'NL02INGB', 'nl01 rabo', 5000),
+    ])
+    transfer = match_transfers(transactions, window_days=3)
+    assert transfer.notna().tolist() == [matched, matched]
+
+
+def test_match_transfers_matches_each_leg_once():
+    transactions = _transactions([
+        ('2024-01-01', 'NL01RABO', 'NL02INGB', -5000),
+        ('2024-01-01', 'NL01RABO', 'NL02INGB', -5000),
+        ('2024-01-02', 'NL02INGB', 'NL01RABO', 5000),
+        ('2024-01-02', 'NL02INGB', 'NL01RABO', 4000),
+        ('2024-01-02', 'NL02INGB', 'NL09ABNA', 5000),
+    ])
+    transfer = match_transfers(transactions)
+    assert transfer.iloc[:2].notna().sum() == 1
+    assert transfer.iloc[2] == 1
+    assert transfer.iloc[3:].isna().all()
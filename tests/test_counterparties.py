@@ -0,0 +1,90 @@
+import pandas as pd
+
+from batch import create_reader, run_batch
+from bank_spec import BANK_SPECS
+from benchmarks.synthetic import generate_frame
+from counterparties import NameCanonicalizer, name_key
+from cube import AggregateCube
+from file_manager import FileManager
+from store import TransactionStore
+from writers import sheet_path
+
+from test_parallel import _write_export
+
+NAMES = ['ALBERT HEIJN 1234', 'Albert Heijn 5678', 'Albert Heijn 5678', 'Albert Heijn B.V.', 'JUMBO 0042']
+
+
+def test_name_key_drops_store_numbers_legal_forms_and_punctuation():
+    assert name_key('ALBERT HEIJN 1234') == name_key('Albert Heijn B.V.') == 'albert heijn'
+    assert name_key("McDonald's") == 'mcdonalds'
+
+
+def test_canonical_name_is_the_most_frequent_spelling_in_any_order():
+    for names in (NAMES, NAMES[::-1], sorted(NAMES)):
+        canonicalizer = NameCanonicalizer()
+        canonicalizer.canonicalize_values(pd.Series(names))
+        assert canonicalizer.names == {'ALBERT HEIJN 1234': 'Albert Heijn', 'Albert Heijn 5678': 'Albert Heijn',
+                                       'Albert Heijn B.V.': 'Albert Heijn', 'JUMBO 0042': 'JUMBO'}
+
+
+def test_ties_are_broken_alphabetically():
+    first, second = NameCanonicalizer(), NameCanonicalizer()
+    assert first.resolve('ALBERT HEIJN 1') == 'ALBERT HEIJN'
+    first.learn({'Albert Heijn 2': 1})
+    second.learn({'Albert Heijn 2': 1, 'ALBERT HEIJN 1': 1})
+    assert first.names == second.names
+
+
+def test_merge_does_not_depend_on_the_order_of_the_pairs():
+    pairs = [('AH 1', 'AH'), ('Ah 2', 'Ah'), ('ah 3', 'Ah')]
+    forward, backward = NameCanonicalizer(), NameCanonicalizer()
+    forward.merge(pairs)
+    backward.merge(pairs[::-1])
+    assert forward.names == backward.names == {'AH 1': 'Ah', 'Ah 2': 'Ah', 'ah 3': 'Ah'}
+
+
+def test_stream_convert_groups_names_like_convert(tmp_path):
+    path = _write_export(tmp_path / 'export.csv', generate_frame('rabo', 3000, seed=2))
+    sheets = []
+    for method, kwargs in (('convert', {}), ('stream_convert', {'chunksize': 700})):
+        reader = create_reader('rabo', FileManager('rabo', str(tmp_path), str(tmp_path)))
+        output = str(tmp_path / f'{method}.csv')
+        assert getattr(reader, method)(path, {'csv': output}, **kwargs) is not None
+        sheets.append(pd.read_csv(sheet_path(output, 'Income & Expenses'), keep_default_na=False))
+    pd.testing.assert_frame_equal(*sheets)
+    assert 'ALBERT HEIJN 1234' not in set(sheets[0]['Expense Names'])
+
+
+def test_cube_and_store_merge_names_of_one_counterparty(tmp_path):
+    normalized = pd.DataFrame({'Date': pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04']),
+                               'Name': ['ALBERT HEIJN 1234', 'Albert Heijn 5678', 'JUMBO'],
+                               'IBAN': ['NL01', 'NL01', 'NL02'], 'Amount': [-1000, -500, -200]})
+    cube = AggregateCube(str(tmp_path / 'cube.npz'))
+    cube.add_transactions('rabo', '2024/january', normalized, 'a')
+    monthly = cube.rollup('month', by_bank=False, canonicalizer=NameCanonicalizer())
+    assert monthly[['Name', 'Expenses', 'Transactions']].values.tolist() == [['ALBERT HEIJN', -15.0, 2],
+                                                                           ['JUMBO', -2.0, 1]]
+
+    with TransactionStore(str(tmp_path / 'transactions.db')) as store:
+        store.load('rabo', '2024/january', normalized.assign(Description=''), 'a')
+        totals = store.totals('name', 1, NameCanonicalizer())
+        assert totals[['Name', 'Transactions', 'Net']].values.tolist() == [['ALBERT HEIJN', 2, -15.0]]
+
+
+def test_batch_files_that_disagree_on_a_spelling_get_the_same_name(tmp_path):
+    frame = generate_frame('rabo', 4, seed=3)
+    name = frame.columns[BANK_SPECS['rabo'].columns['Name']]
+    for month, names in (('january', ['ALBERT HEIJN 1234'] * 4), ('february', ['Albert Heijn 5678'] * 2)):
+        folder = tmp_path / 'data' / 'rabo' / '2024'
+        folder.mkdir(parents=True, exist_ok=True)
+        _write_export(folder / f'{month}.csv', frame.head(len(names)).assign(**{name: names}))
+
+    names_path = str(tmp_path / 'names.json')
+    results = run_batch(['rabo'], None, str(tmp_path / 'data'), str(tmp_path / 'results'), 2, ['csv'],
+                        names_path=names_path)
+    assert [result['error'] for result in results] == [None, None]
+    for result in results:
+        sheet = pd.read_csv(sheet_path(result['output']['csv'], 'Income & Expenses'), keep_default_na=False)
+        labels = set(sheet['Expense Names']) | set(sheet['Income Names'])
+        assert labels - {''} == {'ALBERT HEIJN'}, result['month']
+    assert set(NameCanonicalizer(names_path).names.values()) == {'ALBERT HEIJN'}
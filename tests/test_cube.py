@@ -0,0 +1,71 @@
+import pandas as pd
+
+from cube import AggregateCube, cube_cells, period_labels
+
+
+def _normalized(rows):
+    df = pd.DataFrame(rows, columns=['Date', 'Name', 'IBAN', 'Amount'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    df['Amount'] = df['Amount'].astype('int64')
+    return df
+
+
+JANUARY = _normalized([
+    ('2024-01-02', 'Jumbo', 'NL01', -1250),
+    ('2024-01-02', 'Jumbo', 'NL01', -750),
+    ('2024-01-25', 'Werkgever', 'NL02', 300000),
+    ('2024-01-30', None, 'NL03', -499),
+])
+FEBRUARY = _normalized([
+    ('2024-02-05', 'Jumbo', 'NL01', -1000),
+])
+
+
+def test_cube_cells_sum_per_day_and_counterparty():
+    cells = cube_cells(JANUARY)
+    jumbo = cells[cells['Name'] == 'Jumbo']
+    assert jumbo['Amount'].tolist() == [-2000]
+    assert jumbo['Count'].tolist() == [2]
+    assert cells['Count'].sum() == len(JANUARY)
+
+
+def test_add_replaces_only_the_slice_of_the_source(tmp_path):
+    cube = AggregateCube(str(tmp_path / 'cube.npz'))
+    cube.add_transactions('sns', '2024/january', JANUARY, 'a')
+    cube.add_transactions('sns', '2024/february', FEBRUARY, 'b')
+    cube.add_transactions('sns', '2024/january', JANUARY.iloc[:1], 'c')
+
+    monthly = cube.rollup('month', by_bank=False)
+    assert monthly.groupby('Period')['Transactions'].sum().to_dict() == {'2024-01': 1, '2024-02': 1}
+    assert cube.digests[('sns', '2024/january')] == 'c'
+
+    cube.remove('sns', '2024/february')
+    assert cube.rollup('month')['Period'].tolist() == ['2024-01']
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'cube.npz')
+    cube = AggregateCube(path)
+    cube.add_transactions('sns', '2024/january', JANUARY, 'a')
+    cube.add_transactions('ing', '2024/february', FEBRUARY, 'b')
+    cube.save()
+
+    loaded = AggregateCube(path)
+    assert loaded.digests == cube.digests
+    pd.testing.assert_frame_equal(loaded.rollup('quarter'), cube.rollup('quarter'))
+    assert loaded.rollup('month', by_bank=False)['Name'].isna().sum() == 1
+
+
+def test_rollup_nets_income_and_expenses_in_cents(tmp_path):
+    cube = AggregateCube(str(tmp_path / 'cube.npz'))
+    cube.add_transactions('sns', '2024/january', JANUARY)
+    quarterly = cube.rollup('quarter', by_bank=False)
+    assert quarterly['Net'].sum() == (300000 - 2000 - 499) / 100
+    assert quarterly['Period'].unique().tolist() == ['2024-Q1']
+
+
+def test_period_labels():
+    dates = pd.Series(pd.to_datetime(['2024-01-01', '2024-12-30', None]))
+    weeks = period_labels(dates, 'week')
+    assert weeks.iloc[:2].tolist() == ['2024-W01', '2025-W01'] and pd.isna(weeks.iloc[2])
+    assert period_labels(dates, 'month').iloc[:2].tolist() == ['2024-01', '2024-12']
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from dedup import FingerprintIndex, fingerprint
+
+
+def _normalized(rows):
+    df = pd.DataFrame(rows, columns=['Date', 'IBAN', 'Name', 'Amount', 'Description'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+
+JANUARY = _normalized([
+    ('2024-01-30', 'NL01', 'Coffee', -350, 'espresso'),
+    ('2024-01-30', 'NL01', 'Coffee', -350, 'espresso'),
+    ('2024-01-31', 'NL02', 'Jumbo', -1200, 'boodschappen'),
+])
+# A custom export that overlaps the end of January by one of the two coffees
+OVERLAP = _normalized([
+    ('2024-01-30', 'NL01', 'Coffee', -350, 'espresso'),
+    ('2024-02-01', 'NL03', 'Werkgever', 300000, 'salaris'),
+])
+
+
+def test_identical_payments_get_different_fingerprints():
+    fingerprints = fingerprint(JANUARY)
+    assert len(set(fingerprints.tolist())) == 3
+    assert (fingerprint(JANUARY.copy()) == fingerprints).all()
+
+
+def test_drop_duplicates_keeps_the_first_source_and_ignores_reruns(tmp_path):
+    index = FingerprintIndex(str(tmp_path / 'fingerprints.npz'))
+    assert len(index.drop_duplicates(JANUARY, 'january')) == 3
+    kept = index.drop_duplicates(OVERLAP, 'custom')
+    assert kept['Name'].tolist() == ['Werkgever']
+    assert index.dropped['custom'] == 1
+
+    # Converting January again drops nothing, also after reopening the index from disk
+    reopened = FingerprintIndex(str(tmp_path / 'fingerprints.npz'))
+    assert len(reopened.drop_duplicates(JANUARY, 'january')) == 3
+    assert len(reopened) == 4
@@ -0,0 +1,39 @@
+import pytest
+
+from bank_base import BankBase
+from bank_spec import BANK_SPECS
+from benchmarks.synthetic import write_csv
+from detect import detect_format
+
+
+@pytest.mark.parametrize('bank_name', sorted(BANK_SPECS))
+def test_detect_format_recognizes_each_bank(tmp_path, bank_name):
+    spec = BANK_SPECS[bank_name]
+    guess = detect_format(write_csv(bank_name, 200, str(tmp_path / f'{bank_name}.csv')))
+    assert guess.bank == bank_name
+    assert (guess.seperator, guess.decimal, guess.header) == (spec.seperator, spec.decimal, spec.header)
+
+
+def test_detect_format_rejects_unknown_files(tmp_path):
+    path = tmp_path / 'notes.csv'
+    path.write_text('title;pages\nA book;120\nAnother book;80\n', encoding='utf-8')
+    with pytest.raises(ValueError):
+        detect_format(str(path))
+
+
+@pytest.mark.parametrize('content', ['a,b,c\n1,2,3\n4,5,6\n', 'a,b,c,d,e,f\n1,2,3,4,5,6\n7,8\n"9,10\n'])
+def test_pyarrow_errors_fall_back_to_the_c_parser(tmp_path, content):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'malformed.csv')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(content)
+    settings = {'sep': ',', 'header': 0, 'usecols': [0, 5]}
+
+    try:
+        expected = BankBase._read_csv(path, 'c', **settings)
+    except Exception as e:
+        # The C parser's own error is raised, not pyarrow's
+        with pytest.raises(type(e)):
+            BankBase._read_csv(path, 'pyarrow', **settings)
+    else:
+        assert BankBase._read_csv(path, 'pyarrow', **settings).equals(expected)
@@ -0,0 +1,16 @@
+from file_manager import FileManager, month_sort_key
+
+
+def test_list_months_is_in_calendar_order(tmp_path):
+    year_dir = tmp_path / 'sns' / '2024'
+    year_dir.mkdir(parents=True)
+    for month in ('october', 'february', 'january', 'december', 'april', 'custom'):
+        (year_dir / f'{month}.csv').write_text('')
+    (year_dir / 'notes.txt').write_text('')
+
+    months = FileManager('sns', str(tmp_path), str(tmp_path / 'results')).list_months(2024)
+    assert months == ['january', 'february', 'april', 'october', 'december', 'custom']
+
+
+def test_month_sort_key_accepts_names_and_numbers():
+    assert sorted(['12', 'March', '02', 'january'], key=month_sort_key) == ['january', '02', 'March', '12']
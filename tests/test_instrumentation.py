@@ -0,0 +1,45 @@
+import json
+import os
+
+import pytest
+
+from batch import convert_file
+from benchmarks.synthetic import generate_frame
+from instrumentation import Metrics
+
+from test_parallel import _write_export
+
+KEYS = {'bank', 'file', 'stage', 'rows_in', 'rows_out', 'peak_mb', 'seconds', 'rows_per_second'}
+
+
+def test_metrics_report_one_record_per_stage(tmp_path):
+    folder = tmp_path / 'data' / 'rabo' / '2024'
+    folder.mkdir(parents=True)
+    _write_export(folder / 'january.csv', generate_frame('rabo', 300, seed=1))
+    metrics_path = str(tmp_path / 'metrics.jsonl')
+
+    result = convert_file('rabo', '2024', 'january', str(tmp_path / 'data'), str(tmp_path / 'results'), ['csv'],
+                          metrics_path=metrics_path, profile='hot')
+    assert result['error'] is None
+    with open(metrics_path, encoding='utf-8') as file:
+        records = [json.loads(line) for line in file]
+
+    assert [record['stage'] for record in records] == ['load', 'fill', 'dtypes', 'transactions', 'grouping',
+                                                       'categories', 'recurring', 'write']
+    for record in records:
+        assert KEYS <= set(record) <= KEYS | {'profile'}, record['stage']
+        assert record['bank'] == 'rabo' and record['file'].endswith('january.csv')
+        assert record['seconds'] >= 0 and record['peak_mb'] >= 0
+    assert records[0]['rows_out'] == 300 and records[-1]['rows_out'] == 300
+    profiles = [record['profile'] for record in records if 'profile' in record]
+    assert profiles and os.path.exists(profiles[-1])
+
+
+def test_a_failed_stage_is_recorded_with_its_error():
+    metrics = Metrics(track_memory=False)
+    with pytest.raises(ValueError):
+        with metrics.stage('load', rows_in=10):
+            raise ValueError('broken file')
+    record, = metrics.records
+    assert record['error'] == 'ValueError: broken file' and record['rows_per_second'] is not None
+    assert set(metrics.summary()) == {'load'}
@@ -0,0 +1,70 @@
+import pandas as pd
+
+from aggregation import group_amounts
+from batch import create_reader
+from benchmarks.synthetic import generate_frame
+from file_manager import FileManager
+from ledger import YearLedger
+from writers import sheet_path
+
+from test_parallel import _write_export
+
+
+def _ledger(tmp_path):
+    return YearLedger(create_reader('rabo', FileManager('rabo', str(tmp_path / 'data'), str(tmp_path / 'results'))),
+                      2024)
+
+
+def _month_totals(tmp_path, *months):
+    reader = create_reader('rabo', FileManager('rabo', str(tmp_path / 'data'), str(tmp_path / 'results')))
+    totals = []
+    for month in months:
+        reader.load_file(str(tmp_path / 'data' / 'rabo' / '2024' / f'{month}.csv'))
+        totals.append(group_amounts(reader.normalize()))
+    total = pd.concat(totals).groupby(level=[0, 1]).sum()
+    return total[total != 0].sort_index()
+
+
+def test_adding_and_removing_months_keeps_exact_cents(tmp_path):
+    folder = tmp_path / 'data' / 'rabo' / '2024'
+    folder.mkdir(parents=True)
+    for seed, month in enumerate(['january', 'february', 'march']):
+        _write_export(folder / f'{month}.csv', generate_frame('rabo', 500, seed=seed))
+
+    ledger = _ledger(tmp_path)
+    assert ledger.update() == ['january', 'february', 'march']
+    assert ledger.totals.dtype == 'int64'
+    pd.testing.assert_series_equal(ledger.totals[ledger.totals != 0].sort_index(),
+                                   _month_totals(tmp_path, 'january', 'february', 'march'), check_names=False)
+
+    (folder / 'february.csv').unlink()
+    ledger = _ledger(tmp_path)
+    assert ledger.update() == ['february']
+    assert ledger.totals.dtype == 'int64'
+    pd.testing.assert_series_equal(ledger.totals.sort_index(), _month_totals(tmp_path, 'january', 'march'),
+                                   check_names=False)
+
+    _write_export(folder / 'april.csv', generate_frame('rabo', 500, seed=9))
+    ledger = _ledger(tmp_path)
+    assert ledger.update() == ['april']
+    pd.testing.assert_series_equal(ledger.totals[ledger.totals != 0].sort_index(),
+                                   _month_totals(tmp_path, 'january', 'march', 'april'), check_names=False)
+
+    output = ledger.write(['csv'])['csv']
+    table = pd.read_csv(sheet_path(output, 'Income & Expenses'), keep_default_na=False)
+    amounts = pd.to_numeric(pd.concat([table['Income Amounts'], table['Expense Amounts']]), errors='coerce')
+    assert round(amounts.sum() * 100) == ledger.totals.sum()
+    assert len(pd.read_csv(sheet_path(output, 'Transactions'))) == 1500
+
+
+def test_a_ledger_with_euro_totals_is_ingested_again(tmp_path):
+    folder = tmp_path / 'data' / 'rabo' / '2024'
+    folder.mkdir(parents=True)
+    _write_export(folder / 'january.csv', generate_frame('rabo', 200, seed=1))
+    ledger = _ledger(tmp_path)
+    ledger.update()
+    (ledger.totals / 100).to_pickle(ledger._path('totals.pkl'))
+
+    ledger = _ledger(tmp_path)
+    assert ledger.manifest == {} and ledger.update() == ['january']
+    assert ledger.totals.dtype == 'int64'
@@ -0,0 +1,65 @@
+import pytest
+
+import main
+from benchmarks.synthetic import generate_frame
+
+from test_parallel import _write_export
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    folder = tmp_path / 'data' / 'rabo' / '2024'
+    folder.mkdir(parents=True)
+    for seed, month in enumerate(['january', 'february']):
+        _write_export(folder / f'{month}.csv', generate_frame('rabo', 200, seed=seed))
+    return tmp_path
+
+
+def _run(tmp_path, *argv):
+    main.main([*argv, '--data-dir', str(tmp_path / 'data'), '--results-dir', str(tmp_path / 'results')])
+
+
+def test_list(data_dir, capsys):
+    _run(data_dir, 'list')
+    assert capsys.readouterr().out.splitlines() == ['rabo 2024: january, february']
+
+
+def test_status_before_and_after_convert(data_dir, capsys):
+    _run(data_dir, 'status', '--bank', 'rabo')
+    assert capsys.readouterr().out.splitlines()[-1] == '2 file(s): 2 missing'
+
+    _run(data_dir, 'convert', '--bank', 'rabo', '--year', '2024', '--month', 'january', '--format', 'csv')
+    assert "Successfully converted" in capsys.readouterr().out
+    assert (data_dir / 'results' / 'rabo' / '2024' / 'january_transactions.csv').exists()
+
+    _run(data_dir, 'status', '--bank', 'rabo', '--format', 'csv')
+    assert capsys.readouterr().out.splitlines()[-1] == '2 file(s): 1 converted, 1 missing'
+
+
+def test_convert_a_file_from_anywhere(data_dir, tmp_path, capsys):
+    export = _write_export(tmp_path / 'export.csv', generate_frame('rabo', 200, seed=3))
+    _run(data_dir, 'convert', '--file', export, '--year', '2023', '--format', 'csv')
+    assert 'Detected' in capsys.readouterr().out
+    assert (data_dir / 'results' / 'rabo' / '2023' / 'export_transactions.csv').exists()
+
+    # Without --year, the year is read from a sample of the file when streaming
+    _run(data_dir, 'convert', '--file', export, '--stream', '--format', 'csv')
+    assert 'Successfully converted' in capsys.readouterr().out
+    assert len(list((data_dir / 'results' / 'rabo').glob('*/export_transactions.csv'))) == 2
+
+
+def test_convert_fails_without_a_bank_or_file(data_dir, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        _run(data_dir, 'convert', '--year', '2024')
+    assert exit_info.value.code == 1 and 'Pass --bank and --year' in capsys.readouterr().out
+
+
+def test_detect(data_dir, tmp_path, capsys):
+    main.main(['detect', str(data_dir / 'data' / 'rabo' / '2024' / 'january.csv')])
+    assert 'rabo' in capsys.readouterr().out.lower()
+
+    unknown = tmp_path / 'unknown.csv'
+    unknown.write_text('a|b\n1|2\n', encoding='utf-8')
+    with pytest.raises(SystemExit) as exit_info:
+        main.main(['detect', str(unknown)])
+    assert exit_info.value.code == 1
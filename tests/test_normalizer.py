@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bank_spec import BANK_SPECS
+from batch import create_reader
+from benchmarks.synthetic import write_csv
+from file_manager import FileManager
+from normalizer import count_unparsed, parse_dates, to_cents
+
+
+def _legacy_transactions(path, spec):
+    # The row-wise steps of the original SNS, RABO and ING readers, kept as the reference output
+    df = pd.read_csv(path, sep=spec.seperator, decimal=spec.decimal, encoding=spec.encoding, header=spec.header)
+    columns = spec.columns
+    if spec.drop_empty_rows:
+        df = df.dropna(how='all')
+    if spec.sign_column is not None:
+        df.iloc[:, columns['Amount']] = df.apply(
+            lambda row: -abs(row.iloc[columns['Amount']]) if row.iloc[spec.sign_column] == spec.debit_value
+            else abs(row.iloc[columns['Amount']]), axis=1)
+    if spec.name_fallback is not None:
+        df.iloc[:, columns['Name']] = df.iloc[:, columns['Name']].astype(object).fillna(
+            df.iloc[:, columns['Description']].apply(
+                lambda x: str(x).split(spec.name_fallback)[0] if pd.notnull(x) else 'Unknown'))
+    df.iloc[:, columns['IBAN']] = df.iloc[:, columns['IBAN']].astype(object).apply(
+        lambda x: 'Unknown IBAN' if not pd.notnull(x) or x == '' else x)
+    transactions = df.iloc[:, [columns[column] for column in ('Date', 'IBAN', 'Name', 'Amount', 'Description')]]
+    transactions.columns = ['Date', 'IBAN', 'Name', 'Amount', 'Description']
+    return transactions
+
+
+def _values(series):
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+@pytest.mark.parametrize('bank_name', sorted(BANK_SPECS))
+def test_normalize_matches_the_legacy_row_wise_output(tmp_path, bank_name):
+    spec = BANK_SPECS[bank_name]
+    path = write_csv(bank_name, 500, str(tmp_path / f'{bank_name}.csv'), seed=3)
+    reader = create_reader(bank_name, FileManager(bank_name, str(tmp_path), str(tmp_path)))
+    reader.load_file(path)
+    normalized = reader.normalize()
+    legacy = _legacy_transactions(path, spec)
+
+    assert len(normalized) == len(legacy)
+    for column in ('IBAN', 'Name', 'Description'):
+        assert _values(normalized[column]) == _values(legacy[column]), column
+    assert normalized['Amount'].tolist() == (legacy['Amount'].astype(float) * 100).round().astype(int).tolist()
+    dates = pd.to_datetime(legacy['Date'].astype(str), format=spec.date_format)
+    assert (normalized['Date'].to_numpy() == dates.to_numpy()).all()
+
+
+def test_to_cents_rounds_to_the_nearest_cent():
+    # 0.29 * 100 is 28.999999999999996 in floating point; exact halves round to even
+    amounts = pd.Series([0.29, -19.99, 1_000_000.01, 0.1 + 0.2, 0.005, -0.015])
+    assert to_cents(amounts).tolist() == [29, -1999, 100_000_001, 30, 0, -2]
+
+
+def test_to_cents_warns_only_about_amounts_that_were_not_blank(capsys):
+    cents = to_cents(pd.Series(['12.5', '', None, ' ', 'abc', '-0.01'], dtype=object))
+    assert cents.tolist() == [1250, 0, 0, 0, 0, -1]
+    output = capsys.readouterr().out
+    assert "1 amount(s) could not be parsed" in output and "'abc'" in output
+
+
+def test_parse_dates_warns_only_about_dates_that_were_not_blank(capsys):
+    dates = parse_dates(pd.Series(['2024-01-31', '', np.nan, '2024-13-01', 'soon']), '%Y-%m-%d')
+    assert dates.isna().tolist() == [False, True, True, True, True]
+    assert "2 date(s) could not be parsed" in capsys.readouterr().out
+
+    parse_dates(pd.Series([20240131, np.nan]), '%Y%m%d')
+    assert capsys.readouterr().out == ''
+
+
+def test_count_unparsed_ignores_blank_cells():
+    raw = pd.Series(['1', '', None, 'x'], dtype=object)
+    assert count_unparsed(raw, pd.to_numeric(raw, errors='coerce')) == 1
+
+
+def test_ing_reader_keeps_the_amount_type_index():
+    reader = create_reader('ing', FileManager('ing'))
+    assert reader.amount_type == BANK_SPECS['ing'].sign_column == 5
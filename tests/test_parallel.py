@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from bank_spec import BANK_SPECS
+from batch import create_reader
+from benchmarks.synthetic import generate_frame
+from file_manager import FileManager
+from parallel import split_ranges
+
+
+def _write_export(path, df, bank_name='rabo'):
+    spec = BANK_SPECS[bank_name]
+    df.to_csv(path, sep=spec.seperator, index=False, header=spec.header is not None, quoting=1,
+              encoding=spec.encoding)
+    return str(path)
+
+
+def _serial_and_parallel(tmp_path, path, bank_name='rabo'):
+    reader = create_reader(bank_name, FileManager(bank_name, str(tmp_path), str(tmp_path)))
+    reader.load_file(path)
+    serial = reader.normalize()
+    parallel = reader.parallel_normalize(path, workers=2)
+    return serial, parallel
+
+
+def _assert_same(serial, parallel):
+    assert list(parallel.columns) == list(serial.columns)
+    for column in serial.columns:
+        expected = serial[column].astype(object).where(serial[column].notna(), None).tolist()
+        actual = parallel[column].astype(object).where(parallel[column].notna(), None).tolist()
+        assert actual == expected, column
+
+
+def test_parallel_normalize_matches_normalize_with_quoted_newlines(tmp_path):
+    df = generate_frame('rabo', 400, seed=1)
+    description = df.columns[BANK_SPECS['rabo'].columns['Description']]
+    df.loc[::7, description] = df.loc[::7, description] + '\nsecond line; "quoted"'
+    path = _write_export(tmp_path / 'export.csv', df)
+
+    ranges = split_ranges(path, 4, BANK_SPECS['rabo'].header)
+    assert len(ranges) > 1
+    _assert_same(*_serial_and_parallel(tmp_path, path))
+
+
+def test_parallel_normalize_with_a_range_without_names(tmp_path):
+    df = generate_frame('rabo', 400, seed=2)
+    name = df.columns[BANK_SPECS['rabo'].columns['Name']]
+    df.loc[:250, name] = ''
+    path = _write_export(tmp_path / 'export.csv', df)
+
+    serial, parallel = _serial_and_parallel(tmp_path, path)
+    _assert_same(serial, parallel)
+    assert isinstance(parallel['Name'].dtype, pd.CategoricalDtype)
+
+
+def test_split_ranges_cover_the_data_once(tmp_path):
+    path = _write_export(tmp_path / 'export.csv', generate_frame('rabo', 100, seed=3))
+    ranges = split_ranges(path, 3, BANK_SPECS['rabo'].header)
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    with open(path, 'rb') as file:
+        data = file.read()
+    assert ranges[-1][1] == len(data)
+    assert all(data[end - 1:end] == b'\n' for _, end in ranges)
+
+
+@pytest.mark.parametrize('encoding', ['utf-16'])
+def test_parallel_parse_rejects_utf16(tmp_path, encoding):
+    from parallel import parallel_parse
+    path = tmp_path / 'export.csv'
+    path.write_text('a;b\n', encoding=encoding)
+    with pytest.raises(ValueError):
+        parallel_parse(str(path), {'encoding': encoding}, None)
@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+
+from bank_base import BankBase
+from batch import create_reader
+from benchmarks.synthetic import generate_frame
+from file_manager import FileManager
+from parse_cache import ParseCache
+
+from test_parallel import _write_export
+
+SETTINGS = create_reader('rabo', FileManager('rabo'))._read_settings()
+
+
+def _parse(path, calls):
+    def parse():
+        calls.append(path)
+        return BankBase._read_csv(path, 'c', **SETTINGS)
+    return parse
+
+
+def test_a_parsed_file_is_served_from_the_cache(tmp_path):
+    path = _write_export(tmp_path / 'export.csv', generate_frame('rabo', 200, seed=1))
+    cache, calls = ParseCache(str(tmp_path / 'cache')), []
+    first = cache.get(path, SETTINGS, _parse(path, calls))
+    second = ParseCache(str(tmp_path / 'cache')).get(path, SETTINGS, _parse(path, calls))
+    assert len(calls) == 1 and (cache.hits, cache.misses) == (0, 1)
+    # Integer column labels survive the round trip through Parquet
+    pd.testing.assert_frame_equal(second, first)
+    assert [name.rsplit('.', 1)[1] for name in os.listdir(tmp_path / 'cache')] == ['parquet']
+
+
+def test_the_key_follows_the_content_and_the_settings(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache'))
+    path = _write_export(tmp_path / 'export.csv', generate_frame('rabo', 50, seed=1))
+    key = cache.key(path, SETTINGS)
+
+    copy = _write_export(tmp_path / 'copy.csv', generate_frame('rabo', 50, seed=1))
+    assert cache.key(copy, SETTINGS) == key
+    assert cache.key(path, {**SETTINGS, 'sep': ';'}) != key
+    assert cache.key(path, {**SETTINGS, 'usecols': None}) != key
+
+    _write_export(path, generate_frame('rabo', 50, seed=2))
+    assert cache.key(path, SETTINGS) != key
+    calls = []
+    cache.get(path, SETTINGS, _parse(path, calls))
+    assert calls == [path]
+
+
+def test_entries_fall_back_to_pickle_without_pyarrow(tmp_path, monkeypatch):
+    def no_pyarrow(*args):
+        raise ImportError("No module named 'pyarrow'")
+
+    # pandas itself may store strings with pyarrow, so only the cache's own Parquet functions lose it
+    monkeypatch.setattr(ParseCache, '_write_parquet', staticmethod(no_pyarrow))
+    monkeypatch.setattr(ParseCache, '_read_parquet', staticmethod(no_pyarrow))
+    path = _write_export(tmp_path / 'export.csv', generate_frame('rabo', 100, seed=3))
+    calls = []
+    first = ParseCache(str(tmp_path / 'cache')).get(path, SETTINGS, _parse(path, calls))
+    cache = ParseCache(str(tmp_path / 'cache'))
+    pd.testing.assert_frame_equal(cache.get(path, SETTINGS, _parse(path, calls)), first)
+    assert len(calls) == 1 and cache.hits == 1
+    assert [name.rsplit('.', 1)[1] for name in os.listdir(tmp_path / 'cache')] == ['pkl']
+
+
+def test_the_reader_parses_an_unchanged_file_once(tmp_path):
+    path = _write_export(tmp_path / 'export.csv', generate_frame('rabo', 100, seed=4))
+    frames = []
+    for _ in range(2):
+        reader = create_reader('rabo', FileManager('rabo', str(tmp_path), str(tmp_path)))
+        reader.parse_cache = ParseCache(str(tmp_path / 'cache'))
+        reader.load_file(path)
+        frames.append(reader.normalize())
+    assert (reader.parse_cache.hits, reader.parse_cache.misses) == (1, 0)
+    pd.testing.assert_frame_equal(frames[1], frames[0])
@@ -0,0 +1,79 @@
+import os
+
+from batch import create_reader
+from benchmarks.synthetic import generate_frame
+from file_manager import FileManager
+from pipeline import StageCache
+
+from test_parallel import _write_export
+
+
+def _reader(tmp_path, **values):
+    frame = generate_frame('rabo', 300, seed=6).assign(**values)
+    path = _write_export(tmp_path / 'export.csv', frame)
+    reader = create_reader('rabo', FileManager('rabo', str(tmp_path), str(tmp_path)))
+    reader.prune_columns = False
+    reader.load_file(path)
+    reader.stage_cache.reset_report()
+    return reader, path
+
+
+def test_a_stage_is_computed_once_per_key():
+    cache, calls = StageCache(), []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get('normalize', 'a', compute) == 1
+    assert cache.get('normalize', 'a', compute) == 1
+    assert cache.get('normalize', 'b', compute) == 2
+    assert cache.key('normalize') == 'b'
+    cache.invalidate('normalize')
+    assert cache.key('normalize') is None and cache.get('normalize', 'b', compute) == 3
+    assert cache.hits == ['normalize'] and cache.misses == ['normalize'] * 3
+    cache.record('write')
+    assert cache.report() == 'normalize -> write'
+
+
+def test_sheets_are_reused_while_the_inputs_do_not_change(tmp_path):
+    reader, _ = _reader(tmp_path)
+    transactions = reader.create_transactions_sheet()
+    income_expense = reader.create_income_expense_sheet()
+    assert reader.create_transactions_sheet() is transactions
+    assert reader.create_income_expense_sheet() is income_expense
+    assert reader.stage_cache.misses == ['normalize', 'transactions', 'aggregates']
+    assert set(reader.stage_cache.hits) == {'normalize', 'transactions', 'aggregates'}
+
+
+def test_changing_the_date_or_name_column_recomputes_the_sheets(tmp_path):
+    reader, _ = _reader(tmp_path, Rentedatum='2024-03-01')
+    transactions = reader.create_transactions_sheet()
+    income_expense = reader.create_income_expense_sheet()
+
+    by_interest_date = reader.create_transactions_sheet(date=5)
+    assert set(by_interest_date['Date'].dt.strftime('%Y-%m-%d')) == {'2024-03-01'}
+    assert not by_interest_date['Date'].equals(transactions['Date'])
+
+    by_description = reader.create_income_expense_sheet(name=19)
+    assert set(by_description['Expense Names']) != set(income_expense['Expense Names'])
+    assert reader.stage_cache.misses.count('normalize') == 3
+    # Back to the spec columns: recomputed from the new key, not a stale sheet
+    assert reader.create_income_expense_sheet().equals(income_expense)
+
+
+def test_reloading_a_file_reuses_it_until_it_changes(tmp_path):
+    reader, path = _reader(tmp_path)
+    transactions = reader.create_transactions_sheet()
+
+    reader.load_file(path)
+    assert reader.stage_cache.hits == ['load']
+    assert reader.create_transactions_sheet() is transactions
+
+    _write_export(path, generate_frame('rabo', 200, seed=7))
+    os.utime(path, ns=(0, 0))
+    reader.stage_cache.reset_report()
+    reader.load_file(path)
+    assert reader.stage_cache.misses == ['load']
+    assert len(reader.create_transactions_sheet()) == 200
+    assert reader.stage_cache.misses == ['load', 'normalize', 'transactions']
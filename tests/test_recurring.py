@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from counterparties import NameCanonicalizer
+from recurring import recurring_table
+
+
+def _payments(name, iban, dates, amounts):
+    return pd.DataFrame({'Date': pd.to_datetime(dates), 'Name': name, 'IBAN': iban,
+                         'Amount': np.asarray(amounts, dtype='int64')})
+
+
+MONTHS = pd.to_datetime([f'2024-{month:02d}-05' for month in range(1, 9)])
+
+
+def test_monthly_fixed_payment_is_recurring_and_refunds_are_separate():
+    normalized = pd.concat([
+        _payments('SPOTIFY 123', 'NL01', MONTHS, [-1099] * 8),
+        _payments('Spotify 456', 'NL01', ['2024-03-20'], [1099]),
+        _payments('Jumbo', 'NL02', ['2024-01-03', '2024-01-04', '2024-02-28', '2024-06-01'], [-500] * 4),
+    ], ignore_index=True)
+    table = recurring_table(normalized, NameCanonicalizer(), as_of=MONTHS[-1])
+    recurring = table[table['Type'] == 'Recurring']
+    assert recurring[['Counterparty', 'Period', 'Occurrences', 'Detail']].values.tolist() == [
+        ['SPOTIFY', 'Monthly', 8, 'fixed amount']]
+    assert recurring['Expected Amount'].tolist() == [-10.99]
+    # The median interval is 31 days
+    assert recurring['Next Date'].iloc[0] == pd.Timestamp('2024-09-05')
+
+
+def test_missed_payment_is_overdue():
+    normalized = _payments('Verhuurder', 'NL03', MONTHS, [-95000] * 8)
+    table = recurring_table(normalized, as_of=MONTHS[-1] + pd.Timedelta(days=40))
+    assert table['Detail'].tolist() == ['fixed amount, overdue']
+
+
+def test_amount_far_from_the_earlier_payments_is_an_anomaly():
+    amounts = [-8000, -8200, -7900, -8100, -8050, -24000, -8000]
+    normalized = _payments('Eneco', 'NL04', MONTHS[:7], amounts)
+    anomalies = recurring_table(normalized).query("Type == 'Anomaly'")
+    assert anomalies['Amount'].tolist() == [-240.0]
+    assert anomalies['Detail'].tolist() == ['higher than usual']
+    assert anomalies['Occurrences'].tolist() == [5]
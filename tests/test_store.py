@@ -0,0 +1,52 @@
+import pandas as pd
+
+from store import TransactionStore
+
+
+def _normalized(rows):
+    df = pd.DataFrame(rows, columns=['Date', 'Name', 'IBAN', 'Amount', 'Description'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+
+TRANSACTIONS = _normalized([
+    ('2024-01-02', 'Albert Heijn 1234', 'NL01', -1250, 'boodschappen'),
+    ('2024-01-05', 'ALBERT_HEIJN', 'NL01', -750, '100% korting_actie'),
+    ('2024-01-25', 'Werkgever BV', 'NL02', 300000, 'salaris januari'),
+    ('2023-12-30', 'Albert Heijn 1234', 'NL01', -499, 'boodschappen'),
+])
+
+
+def _store(tmp_path):
+    store = TransactionStore(str(tmp_path / 'transactions.db'))
+    store.load('rabo', '2024/january', TRANSACTIONS, 'a')
+    return store
+
+
+def test_name_is_matched_exactly_even_with_wildcard_characters(tmp_path):
+    with _store(tmp_path) as store:
+        assert store.query(name='albert_heijn')['Amount'].tolist() == [-7.5]
+        assert store.query(name='Albert Heijn').empty
+        assert store.query(name='albert_heijn 1234').empty
+        assert len(store.query(name_like='albert%')) == 3
+        assert len(store.query(name_like='albert_heijn%')) == 3
+
+
+def test_text_is_matched_literally(tmp_path):
+    with _store(tmp_path) as store:
+        assert store.query(text='100% korting_')['Name'].tolist() == ['ALBERT_HEIJN']
+        assert store.query(text='0%k').empty
+
+
+def test_totals_filters_and_sums_in_euros(tmp_path):
+    with _store(tmp_path) as store:
+        totals = store.totals('year', iban='NL01')
+        assert totals.values.tolist() == [['2023', 1, 0.0, -4.99, -4.99], ['2024', 2, 0.0, -20.0, -20.0]]
+        assert store.totals('name', sign='income')['Name'].tolist() == ['Werkgever BV']
+
+
+def test_loading_a_source_again_replaces_its_rows(tmp_path):
+    with _store(tmp_path) as store:
+        store.load('rabo', '2024/january', TRANSACTIONS.iloc[:1], 'b')
+        assert len(store.query()) == 1
+        assert store.digest('rabo', '2024/january') == 'b'
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.synthetic import generate_frame
+
+from test_parallel import _write_export
+
+WATCHER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'watcher.py')
+
+
+def _watch_once(tmp_path) -> list:
+    completed = subprocess.run([sys.executable, WATCHER, '--once', '--bank', 'rabo', '--format', 'csv',
+                                '--data-dir', str(tmp_path / 'data'), '--results-dir', str(tmp_path / 'results')],
+                               cwd=tmp_path, capture_output=True, text=True, timeout=120, check=True)
+    return [line for line in completed.stdout.splitlines() if line.startswith('[watch] rabo/')]
+
+
+def test_once_converts_new_files_once_and_skips_unchanged_ones(tmp_path):
+    folder = tmp_path / 'data' / 'rabo' / '2024'
+    folder.mkdir(parents=True)
+    _write_export(folder / 'january.csv', generate_frame('rabo', 200, seed=1))
+
+    lines = _watch_once(tmp_path)
+    assert len(lines) == 1 and lines[0].startswith('[watch] rabo/2024/january converted')
+    output = tmp_path / 'results' / 'rabo' / '2024' / 'january_transactions.csv'
+    converted_at = output.stat().st_mtime_ns
+
+    assert _watch_once(tmp_path) == []
+    assert output.stat().st_mtime_ns == converted_at
+
+    _write_export(folder / 'february.csv', generate_frame('rabo', 200, seed=2))
+    lines = _watch_once(tmp_path)
+    assert len(lines) == 1 and lines[0].startswith('[watch] rabo/2024/february converted')
+    assert output.stat().st_mtime_ns == converted_at
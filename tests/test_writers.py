@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from writers import open_writer, sheet_path
+
+pytest.importorskip('pyarrow')
+
+
+def test_parquet_appends_several_chunks(tmp_path):
+    path = str(tmp_path / 'january.parquet')
+    chunks = [
+        pd.DataFrame({'Name': pd.Categorical(['Jumbo', 'Eneco']), 'Amount': [-12.5, -80.0]}),
+        pd.DataFrame({'Name': pd.Categorical(['Albert Heijn']), 'Amount': [-3.25]}),
+        pd.DataFrame({'Name': pd.Categorical([None]), 'Amount': [100.0]}),
+    ]
+    with open_writer('parquet', path) as writer:
+        for chunk in chunks:
+            writer.append('Transactions', chunk)
+
+    result = pd.read_parquet(sheet_path(path, 'Transactions'))
+    assert result['Name'].astype(object).where(result['Name'].notna(), None).tolist() == \
+        ['Jumbo', 'Eneco', 'Albert Heijn', None]
+    assert result['Amount'].tolist() == [-12.5, -80.0, -3.25, 100.0]
+
+
+def test_parquet_casts_empty_padding_to_first_schema(tmp_path):
+    path = str(tmp_path / 'report.parquet')
+    with open_writer('parquet', path) as writer:
+        writer.append('Income & Expenses', pd.DataFrame({'Income Names': ['Salary'], 'Income Amounts': [10.0]}))
+        writer.append('Income & Expenses', pd.DataFrame({'Income Names': [''], 'Income Amounts': ['']}))
+
+    result = pd.read_parquet(sheet_path(path, 'Income & Expenses'))
+    assert len(result) == 2
+    assert result['Income Amounts'].iloc[0] == 10.0
+    assert pd.isna(result['Income Names'].iloc[1])
+
+
+def test_parquet_chunk_with_more_categories_than_the_first(tmp_path):
+    path = str(tmp_path / 'january.parquet')
+    names = [f'Shop {number}' for number in range(200)]
+    with open_writer('parquet', path) as writer:
+        writer.append('Transactions', pd.DataFrame({'Name': pd.Categorical(['Jumbo'])}))
+        writer.append('Transactions', pd.DataFrame({'Name': pd.Categorical(names)}))
+
+    result = pd.read_parquet(sheet_path(path, 'Transactions'))
+    assert result['Name'].astype(object).tolist() == ['Jumbo'] + names
@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import BANKS, OUTPUT_FORMATS, convert_file
+from file_manager import FileManager
+
+# Seconds between two scans of the data folders
+DEFAULT_INTERVAL = 2.0
+# Seconds a file must stay unchanged (same size and modification time) before it is converted
+DEFAULT_SETTLE = 5.0
+
+
+class WatchService:
+    """
+    Long-running service that converts bank CSV files as they land in `data/<bank>/<year>/`.
+
+    The data folders of every bank are polled every `interval` seconds, which works on every platform
+    without OS-specific file notification APIs. A new or changed file is only queued once its size and
+    modification time stayed the same for `settle` seconds, so files that are still being written (or
+    copied) are not picked up half-way. Queued files are converted by a bounded pool of worker processes,
+    using the reader of their bank (see `batch.convert_file`).
+
+    Files whose outputs are newer than the file itself count as converted, so a restart only picks up
+    the files that changed while the service was down.
+
+    Attributes:
+        banks (list): Names of the watched banks.
+        base_dir (str): Root directory for input files.
+        results_dir (str): Root directory for output files.
+        formats (tuple): Output formats to write.
+        workers (int): Maximum number of files converted at the same time.
+        interval (float): Seconds between two scans.
+        settle (float): Seconds a file must stay unchanged before it is queued.
+        cache_dir (str): Directory of the parse cache, or None.
+        queue (asyncio.Queue): Files waiting for a worker. Created by `run`.
+        pending (dict): Files that changed but did not settle yet, mapped to (signature, first seen).
+        seen (dict): Files that were queued or converted, mapped to their signature (modification time, size).
+        latencies (deque): Seconds from queueing to finished conversion of the last 100 files.
+        processed (int): Number of converted files.
+        failed (int): Number of files that failed to convert.
+    """
+
+    def __init__(self, banks: list = None, base_dir: str = "data", results_dir: str = "results",
+                 formats: list = ("xlsx",), workers: int = 2, interval: float = DEFAULT_INTERVAL,
+                 settle: float = DEFAULT_SETTLE, cache_dir: str = None):
+        """
+        Parameters:
+            banks (list): Names of the banks to watch. Default is all known banks.
+            base_dir (str): Root directory for input files. Default is 'data'.
+            results_dir (str): Root directory for output files. Default is 'results'.
+            formats (list): Output formats to write. Default is ['xlsx'].
+            workers (int): Maximum number of files converted at the same time. Default is 2.
+            interval (float): Seconds between two scans. Default is `DEFAULT_INTERVAL`.
+            settle (float): Seconds a file must stay unchanged before it is queued. Default is `DEFAULT_SETTLE`.
+            cache_dir (str): Directory of the parse cache. Default is None (no cache).
+        """
+        self.banks = list(banks or BANKS)
+        self.base_dir = base_dir
+        self.results_dir = results_dir
+        self.formats = tuple(formats)
+        self.workers = workers
+        self.interval = interval
+        self.settle = settle
+        self.cache_dir = cache_dir
+        self.queue: asyncio.Queue = None
+        self.pending = {}
+        self.seen = {}
+        self.latencies = deque(maxlen=100)
+        self.processed = 0
+        self.failed = 0
+        self._in_progress = 0
+        self._stop = None
+
+    def scan(self) -> list:
+        """
+        List the CSV files in the data folders of the watched banks.
+
+        Returns:
+            list: (bank, year, month, path, signature) tuples. The signature is the (modification time, size)
+                  of the file.
+        """
+        files = []
+        for bank_name in self.banks:
+            file_manager = FileManager(bank_name, self.base_dir, self.results_dir)
+            for year in file_manager.list_years():
+                for month in file_manager.list_months(year):
+                    path = os.path.join(file_manager.base_dir, year, f"{month}.csv")
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        # Removed between listing and stat
+                        continue
+                    files.append((bank_name, year, month, path, (stat.st_mtime_ns, stat.st_size)))
+        return files
+
+    def is_converted(self, bank_name: str, year: str, month: str) -> bool:
+        """
+        Check whether every output of a file exists and is newer than the file.
+
+        Parameters:
+            bank_name (str): Name of the bank.
+            year (str): Year folder of the file.
+            month (str): Month name of the file.
+
+        Returns:
+            bool: True if the file does not need to be converted.
+        """
+        file_manager = FileManager(bank_name, self.base_dir, self.results_dir)
+        return file_manager.output_status(year, month, self.formats) == "converted"
+
+    def poll(self, now: float = None, settle: float = None) -> list:
+        """
+        Scan the data folders once and return the files that are ready to be converted.
+
+        Parameters:
+            now (float): Current `time.monotonic()` value. Default is the current time.
+            settle (float): Seconds a file must stay unchanged. Default is `settle`.
+
+        Returns:
+            list: (bank, year, month, path, signature) tuples of the new or changed files that settled.
+        """
+        now = time.monotonic() if now is None else now
+        settle = self.settle if settle is None else settle
+        ready = []
+        on_disk = set()
+
+        for job in self.scan():
+            bank_name, year, month, path, signature = job
+            on_disk.add(path)
+            if self.seen.get(path) == signature:
+                self.pending.pop(path, None)
+                continue
+            if path not in self.seen and self.is_converted(bank_name, year, month):
+                self.seen[path] = signature
+                continue
+
+            entry = self.pending.get(path)
+            if entry is None or entry[0] != signature:
+                # New or still changing: (re)start the settle timer
+                self.pending[path] = (signature, now)
+                entry = self.pending[path]
+            if now - entry[1] >= settle:
+                del self.pending[path]
+                self.seen[path] = signature
+                ready.append(job)
+
+        for path in [path for path in self.seen if path not in on_disk]:
+            del self.seen[path]
+        for path in [path for path in self.pending if path not in on_disk]:
+            del self.pending[path]
+        return ready
+
+    def status(self) -> dict:
+        """
+        Report the state of the service.
+
+        Returns:
+            dict: 'queued' (queue depth), 'in_progress', 'pending' (waiting to settle), 'processed', 'failed',
+                  and the average and maximum 'latency' in seconds (queueing to done) of the last 100 files.
+        """
+        latencies = list(self.latencies)
+        return {
+            'queued': self.queue.qsize() if self.queue is not None else 0,
+            'in_progress': self._in_progress,
+            'pending': len(self.pending),
+            'processed': self.processed,
+            'failed': self.failed,
+            'latency_avg': round(sum(latencies) / len(latencies), 3) if latencies else None,
+            'latency_max': round(max(latencies), 3) if latencies else None,
+        }
+
+    def stop(self):
+        """
+        Ask the service to stop. Files that are already queued are still converted before `run` returns.
+        """
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self, once: bool = False, status_interval: float = 60.0):
+        """
+        Watch the data folders until `stop` is called (or SIGINT/SIGTERM is received).
+
+        Parameters:
+            once (bool): Convert the files that need it right away (without waiting for them to settle)
+                         and return. Default is False.
+            status_interval (float): Seconds between two status lines. Default is 60.
+        """
+        self.queue = asyncio.Queue()
+        self._stop = asyncio.Event()
+        self._install_signal_handlers()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            workers = [asyncio.create_task(self._worker(executor)) for _ in range(self.workers)]
+            last_status = time.monotonic()
+            print(f"Watching {', '.join(self.banks)} under '{self.base_dir}' "
+                  f"(every {self.interval}s, settle {self.settle}s, {self.workers} worker(s)).")
+            while True:
+                for job in self.poll(settle=0.0 if once else None):
+                    self.queue.put_nowait((job, time.monotonic()))
+                if once or self._stop.is_set():
+                    break
+                if time.monotonic() - last_status >= status_interval:
+                    self._print_status()
+                    last_status = time.monotonic()
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            # Graceful shutdown: convert everything that was queued, then stop the workers
+            if self.queue.qsize() or self._in_progress:
+                print(f"Stopping: converting {self.queue.qsize() + self._in_progress} queued file(s) first.")
+            await self.queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        self._print_status()
+
+    async def _worker(self, executor: ProcessPoolExecutor):
+        loop = asyncio.get_running_loop()
+        while True:
+            (bank_name, year, month, path, signature), queued_at = await self.queue.get()
+            self._in_progress += 1
+            try:
+                result = await loop.run_in_executor(executor, convert_file, bank_name, year, month, self.base_dir,
+                                                    self.results_dir, self.formats, self.cache_dir)
+                error = result["error"]
+            except Exception as e:
+                # The worker process died; forget the file so that the next scan retries it
+                error = f"{type(e).__name__}: {e}"
+                self.seen.pop(path, None)
+            finally:
+                self._in_progress -= 1
+                self.queue.task_done()
+
+            latency = time.monotonic() - queued_at
+            self.latencies.append(latency)
+            if error:
+                self.failed += 1
+                print(f"[watch] {bank_name}/{year}/{month} failed: {error}")
+            else:
+                self.processed += 1
+                print(f"[watch] {bank_name}/{year}/{month} converted (latency {latency:.2f}s, "
+                      f"queue depth {self.queue.qsize()}).")
+
+    def _install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, self.stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows event loops have no signal handlers; fall back to the signal module
+                signal.signal(signal_number, lambda *_: loop.call_soon_threadsafe(self.stop))
+
+    def _print_status(self):
+        status = self.status()
+        latency = f"{status['latency_avg']}s avg, {status['latency_max']}s max" if self.latencies else "n/a"
+        print(f"[watch] queued {status['queued']}, in progress {status['in_progress']}, "
+              f"settling {status['pending']}, converted {status['processed']}, failed {status['failed']}, "
+              f"latency {latency}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch the data folders and convert new or changed CSV files.")
+    parser.add_argument("--bank", action="append", choices=BANKS, help="Bank to watch (repeatable).")
+    parser.add_argument("--data-dir", default="data", help="Root directory for input files.")
+    parser.add_argument("--results-dir", default="results", help="Root directory for output files.")
+    parser.add_argument("--workers", type=int, default=2, help="Maximum number of files converted at once.")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Seconds between two scans.")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE,
+                        help="Seconds a file must stay unchanged before it is converted.")
+    parser.add_argument("--format", action="append", choices=OUTPUT_FORMATS,
+                        help="Output format (repeatable). Default is xlsx.")
+    parser.add_argument("--cache-dir", help="Directory of the parse cache (default: no cache).")
+    parser.add_argument("--status-interval", type=float, default=60.0, help="Seconds between two status lines.")
+    parser.add_argument("--once", action="store_true", help="Convert the files that need it and exit.")
+    args = parser.parse_args()
+
+    service = WatchService(args.bank, args.data_dir, args.results_dir, args.format or ["xlsx"], args.workers,
+                           args.interval, args.settle, args.cache_dir)
+    asyncio.run(service.run(args.once, args.status_interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import os
+import re
+
+import pandas as pd
+
+
+def _cell_values(df: pd.DataFrame):
+    """
+    Yield the rows of a DataFrame as tuples, with missing values as None (empty cells).
+    """
+    values = df.astype(object).where(df.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def sheet_path(path: str, sheet_name: str) -> str:
+    """
+    Build the path of a single sheet for formats that store one sheet per file.
+
+    Parameters:
+        path (str): Base output path including the extension (e.g., 'results/sns/2024/january.csv').
+        sheet_name (str): Name of the sheet (e.g., 'Income & Expenses').
+
+    Returns:
+        str: The sheet path (e.g., 'results/sns/2024/january_income_expenses.csv').
+    """
+    root, extension = os.path.splitext(path)
+    slug = re.sub(r'[^0-9a-z]+', '_', sheet_name.lower()).strip('_')
+    return f"{root}_{slug}{extension}"
+
+
+class BaseWriter:
+    """
+    Base class for output writers. Sheets are written by appending DataFrames to them, one chunk at a time.
+
+    Attributes:
+        extension (str): File extension of the format (without the dot).
+        path (str): Output path including the extension.
+    """
+    extension = None
+
+    def __init__(self, path: str):
+        """
+        Parameters:
+            path (str): Output path including the extension.
+        """
+        self.path = path
+
+    def append(self, sheet_name: str, df: pd.DataFrame):
+        """
+        Append the rows of a DataFrame to a sheet, creating the sheet (with a header row) if needed.
+
+        Parameters:
+            sheet_name (str): Name of the sheet to write to.
+            df (pd.DataFrame): Rows to append.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Flush and close the output.
+        """
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class StreamingExcelWriter(BaseWriter):
+    """
+    Writes an Excel workbook row by row in constant memory.
+
+    With the 'openpyxl' engine the workbook is opened in write-only mode; with the 'xlsxwriter'
+    engine it uses the `constant_memory` option. Either way rows are flushed to disk as they are
+    appended, so the memory used does not depend on the size of the workbook.
+
+    Attributes:
+        engine (str): 'openpyxl' or 'xlsxwriter'.
+        workbook: The underlying openpyxl or xlsxwriter workbook.
+        sheets (dict): The sheets created so far, by name.
+    """
+    extension = 'xlsx'
+
+    def __init__(self, path: str, engine: str = 'openpyxl'):
+        """
+        Start a new workbook.
+
+        Parameters:
+            path (str): Path of the Excel file to write (including the '.xlsx' extension).
+            engine (str): 'openpyxl' or 'xlsxwriter'. Default is 'openpyxl'.
+
+        Raises:
+            ValueError: If the engine is not supported.
+            ImportError: If the 'xlsxwriter' engine is requested but not installed.
+        """
+        super().__init__(path)
+        self.engine = engine
+        self.sheets = {}
+        self.row_counts = {}
+
+        if engine == 'openpyxl':
+            from openpyxl import Workbook
+            self.workbook = Workbook(write_only=True)
+        elif engine == 'xlsxwriter':
+            try:
+                import xlsxwriter
+            except ImportError as e:
+                raise ImportError("The 'xlsxwriter' engine requires xlsxwriter (pip install xlsxwriter).") from e
+            self.workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        else:
+            raise ValueError(f"Unsupported Excel engine '{engine}'. Use 'openpyxl' or 'xlsxwriter'.")
+
+    def append(self, sheet_name: str, df: pd.DataFrame):
+        sheet = self.sheets.get(sheet_name)
+        if sheet is None:
+            if self.engine == 'openpyxl':
+                sheet = self.workbook.create_sheet(sheet_name)
+            else:
+                sheet = self.workbook.add_worksheet(sheet_name)
+            self.sheets[sheet_name] = sheet
+            self.row_counts[sheet_name] = 0
+            self._append_rows(sheet_name, [[str(column) for column in df.columns]])
+
+        self._append_rows(sheet_name, _cell_values(df))
+
+    def _append_rows(self, sheet_name: str, rows):
+        sheet = self.sheets[sheet_name]
+        if self.engine == 'openpyxl':
+            for row in rows:
+                sheet.append(row)
+        else:
+            row_index = self.row_counts[sheet_name]
+            for row in rows:
+                sheet.write_row(row_index, 0, row)
+                row_index += 1
+            self.row_counts[sheet_name] = row_index
+
+    def close(self):
+        """
+        Save the workbook to `path`.
+        """
+        if self.engine == 'openpyxl':
+            self.workbook.save(self.path)
+        else:
+            self.workbook.close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+
+class CsvWriter(BaseWriter):
+    """
+    Writes every sheet to its own CSV file (see `sheet_path`), appending chunk by chunk.
+
+    Attributes:
+        files (dict): Open file handles, by sheet name.
+        paths (dict): Paths of the written files, by sheet name.
+    """
+    extension = 'csv'
+
+    def __init__(self, path: str, seperator: str = ',', encoding: str = 'utf-8'):
+        """
+        Parameters:
+            path (str): Base output path including the '.csv' extension.
+            seperator (str): Delimiter to write. Default is ','.
+            encoding (str): Character encoding to write. Default is 'utf-8'.
+        """
+        super().__init__(path)
+        self.seperator = seperator
+        self.encoding = encoding
+        self.files = {}
+        self.paths = {}
+
+    def append(self, sheet_name: str, df: pd.DataFrame):
+        handle = self.files.get(sheet_name)
+        header = handle is None
+        if header:
+            self.paths[sheet_name] = sheet_path(self.path, sheet_name)
+            handle = self.files[sheet_name] = open(self.paths[sheet_name], 'w', newline='', encoding=self.encoding)
+
+        df.to_csv(handle, sep=self.seperator, index=False, header=header)
+
+    def close(self):
+        for handle in self.files.values():
+            handle.close()
+        self.files = {}
+
+
+class ParquetWriter(BaseWriter):
+    """
+    Writes every sheet to its own Parquet file (see `sheet_path`), one row group per appended chunk.
+
+    Requires pyarrow. Empty-string padding (as used by the income-expense table) is stored as null.
+
+    Attributes:
+        writers (dict): Open pyarrow Parquet writers, by sheet name.
+        schemas (dict): Schema of the first chunk of each sheet, which later chunks are cast to.
+        paths (dict): Paths of the written files, by sheet name.
+    """
+    extension = 'parquet'
+
+    def __init__(self, path: str):
+        """
+        Parameters:
+            path (str): Base output path including the '.parquet' extension.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        super().__init__(path)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow).") from e
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.writers = {}
+        self.schemas = {}
+        self.paths = {}
+
+    def append(self, sheet_name: str, df: pd.DataFrame):
+        df = df.replace('', None).infer_objects()
+        table = self.pa.Table.from_pandas(df, preserve_index=False)
+        writer = self.writers.get(sheet_name)
+        if writer is None:
+            self.paths[sheet_name] = sheet_path(self.path, sheet_name)
+            self.schemas[sheet_name] = self._sheet_schema(table.schema)
+            writer = self.writers[sheet_name] = self.pq.ParquetWriter(self.paths[sheet_name],
+                                                                      self.schemas[sheet_name])
+        if not table.schema.equals(self.schemas[sheet_name], check_metadata=False):
+            # A later chunk may infer other types (e.g. a column that is empty in this chunk)
+            table = table.cast(self.schemas[sheet_name])
+        writer.write_table(table)
+
+    def _sheet_schema(self, schema):
+        # Categoricals get 32-bit dictionary indices: pandas picks the smallest index type per chunk, so the
+        # first chunk's (e.g. int8 for a handful of names) would not fit a later chunk with more categories
+        fields = []
+        for field in schema:
+            if self.pa.types.is_dictionary(field.type):
+                value_type = field.type.value_type
+                if self.pa.types.is_null(value_type):
+                    value_type = self.pa.string()
+                field = field.with_type(self.pa.dictionary(self.pa.int32(), value_type))
+            fields.append(field)
+        return self.pa.schema(fields, metadata=schema.metadata)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+
+WRITERS = {writer.extension: writer for writer in (StreamingExcelWriter, CsvWriter, ParquetWriter)}
+
+
+def open_writer(file_format: str, path: str, engine: str = 'openpyxl') -> BaseWriter:
+    """
+    Open the writer for an output format.
+
+    Parameters:
+        file_format (str): One of the formats in `WRITERS` ('xlsx', 'csv' or 'parquet').
+        path (str): Output path including the extension.
+        engine (str): Excel engine for the 'xlsx' format. Default is 'openpyxl'.
+
+    Returns:
+        BaseWriter: The opened writer.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if file_format not in WRITERS:
+        raise ValueError(f"Unsupported output format '{file_format}'. Choose one of: {', '.join(WRITERS)}.")
+    if file_format == 'xlsx':
+        return StreamingExcelWriter(path, engine)
+    return WRITERS[file_format](path)